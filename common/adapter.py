@@ -1,37 +1,74 @@
+from __future__ import annotations
+
 import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
 from dataclasses import dataclass
+from decimal import Decimal
 from importlib.machinery import SourceFileLoader
 from pathlib import Path, PurePosixPath
 from types import ModuleType
-from typing import Any, Dict, List, Optional, Tuple
+from typing import TYPE_CHECKING, Any, Dict, Iterator, List, Optional, Tuple
 
 import agate  # type: ignore
-import cloudpickle  # type: ignore
-import pandas as pd  # type: ignore
 from dbt.adapters.base.impl import BaseAdapter  # type: ignore
 from dbt.adapters.base.relation import BaseRelation  # type: ignore
 from dbt.adapters.protocol import AdapterConfig  # type: ignore
 from dbt.clients.jinja import MacroGenerator  # type: ignore
 from dbt.context.providers import generate_runtime_model_context  # type: ignore
 from dbt.contracts.connection import AdapterResponse  # type: ignore
-from dbt.contracts.graph.manifest import Manifest, ManifestNode  # type: ignore
+from dbt.contracts.graph.manifest import (  # type: ignore
+    Manifest,
+    ManifestNode,
+    WritableManifest,
+)
 from dbt.events import AdapterLogger  # type: ignore
+from dbt.events.functions import get_invocation_id  # type: ignore
 from dbt.exceptions import RuntimeException  # type: ignore
 
-import layer
-from layer.decorators import model as model_decorator
-
-from . import pandas_helper
+from .admission import MemoryAdmission
+from .layer_backend import DEFAULT_LOCAL_REGISTRY, LayerBackend, LocalLayerBackend
+from .source_cache import SourceCache
 from .sql_parser import (
     LayerAutoMLFunction,
     LayerPredictFunction,
+    LayerSqlFunction,
     LayerSQLParser,
     LayerTrainFunction,
 )
 
 
+if TYPE_CHECKING:
+    import pandas as pd  # type: ignore
+    import pyarrow as pa  # type: ignore
+
+    from .spill import ArrowSpill
+
+
 logger = AdapterLogger("Layer")
 
+LAYER_BACKEND_LOCAL = "local"
+TRAIN_INPUT_DATAFRAME = "dataframe"
+TRAIN_INPUT_BATCHES = "batches"
+TRAIN_INPUT_PARQUET = "parquet"
+# profiles of the Layer statements are written to this directory of the target path
+PROFILES_DIR_NAME = "layer_profiles"
+# models compiled for fast inference are cached in this directory of the target path, one file per model version
+COMPILED_MODELS_DIR_NAME = "layer_compiled_models"
+# the history of the AutoML candidates is kept in this file of the target path for pruning, without a warm start path
+AUTOML_HISTORY_FILE_NAME = "layer_automl_history.json"
+# rows fetched to estimate the width of the rows of a statement, for its memory
+MEMORY_ESTIMATE_SAMPLE_ROWS = 1000
+# the warehouse types of whole and fractional numbers are the ones adapters give to these columns
+WHOLE_NUMBER_SAMPLE = agate.Table([[Decimal(1)]], ["number"], [agate.Number()])
+FRACTIONAL_NUMBER_SAMPLE = agate.Table([[Decimal("0.5")]], ["number"], [agate.Number()])
+
+# artifacts dbt writes to the target path, see dbt.task.runnable and dbt.parser.manifest
+MANIFEST_FILE_NAME = "manifest.json"
+PARTIAL_PARSE_FILE_NAME = "partial_parse.msgpack"
+
 
 @dataclass
 class LayerAdapterResponse(AdapterResponse):
@@ -39,6 +76,12 @@ class LayerAdapterResponse(AdapterResponse):
     Layer Adapter response
     """
 
+    # fetched data spilled to disk over the memory budget
+    spilled_bytes: Optional[int] = None
+    spill_seconds: Optional[float] = None
+    # distinct rows predicted for each input row, when predicting the distinct inputs only
+    deduplication_ratio: Optional[float] = None
+
 
 @dataclass
 class LayerMeta:
@@ -48,6 +91,36 @@ class LayerMeta:
 
     entrypoint: str = "handler.py"
     fabric: Optional[str] = None
+    # fetch the source in this many partitions of the hash of the column, each one over its own connection
+    fetch_partitions: int = 1
+    fetch_partition_column: Optional[str] = None
+    # predict in the warehouse with the models translated to sql, if they all can be
+    predict_pushdown: bool = False
+    # convert the fetched data to dataframes with categories, pyarrow strings and the narrowest numeric types
+    compact_dtypes: bool = False
+    # predict the distinct inputs only and take their predictions back to the repeated inputs
+    predict_deduplicate: bool = False
+    # fetches estimated to scan over this many megabytes either "fail" or "spill" to disk, defaults to the profile
+    scan_budget_mb: Optional[int] = None
+    scan_budget_exceeded: str = "fail"
+    # profile the statement to the layer_profiles directory of the target path
+    profile: bool = False
+    # what the train entrypoint takes: a "dataframe", an iterable of dataframe "batches" or a "parquet" directory
+    train_input: str = TRAIN_INPUT_DATAFRAME
+    # predict with the models compiled to ONNX Runtime, if they can be and agree with the models
+    fast_inference: bool = False
+
+
+@dataclass
+class ScanEstimate:
+    """
+    The data a query is estimated to scan before it runs
+    """
+
+    scan_bytes: Optional[int] = None
+    rows: Optional[int] = None
+    # the bytes the fetched data takes uncompressed, if the warehouse reports it
+    fetch_bytes: Optional[int] = None
 
 
 class LayerAdapter(BaseAdapter):  # pylint: disable=abstract-method
@@ -62,6 +135,16 @@ class LayerAdapter(BaseAdapter):  # pylint: disable=abstract-method
         super().__init__(config)
         self.sql_parser = self.LayerSQLParser()
         self._manifest_lazy: Optional[Manifest] = None
+        self._manifest_lock = threading.Lock()
+        # dbt registers a new adapter for each invocation, before the project is parsed
+        self._created_at = time.time()
+        self._layer_backend_lazy: Optional[LayerBackend] = None
+        # the Layer statements of all the threads share the memory budget
+        self._memory_admission = MemoryAdmission()
+        # source tables fetched by the Layer statements of the invocation, shared with the next ones reading them
+        self._source_cache = SourceCache(case_sensitive=self.CASE_SENSITIVE)
+        # scan estimates made to admit statements, by source unique id and sql, reused by the scan budget of their fetch
+        self._scan_estimates: Dict[Tuple[str, str], ScanEstimate] = {}
 
     @property
     def _manifest(self) -> Manifest:
@@ -71,22 +154,78 @@ class LayerAdapter(BaseAdapter):  # pylint: disable=abstract-method
 
     def load_manifest(self) -> Manifest:
         if self._manifest_lazy is None:
+            # nodes run on several threads, the first one loads the manifest while the others wait for it
+            with self._manifest_lock:
+                if self._manifest_lazy is None:
+                    self._manifest_lazy = self._load_manifest()
+        return self._manifest_lazy
+
+    def _load_manifest(self) -> Manifest:
+        start_load = time.perf_counter()
+        manifest_source = self._read_target_manifest()
+        if manifest_source is None:
             # avoid a circular import
             from dbt.parser.manifest import ManifestLoader  # type: ignore
 
-            manifest = ManifestLoader.get_full_manifest(self.config)
-            self._manifest_lazy = manifest
-        return self._manifest_lazy
+            manifest, source = ManifestLoader.get_full_manifest(self.config), "a full parse"
+        else:
+            manifest, source = manifest_source
+        logger.debug("Loaded manifest from {} in {:.2f}s", source, time.perf_counter() - start_load)
+        return manifest
+
+    def _read_target_manifest(self) -> Optional[Tuple[Manifest, str]]:
+        """
+        Reads the manifest dbt has already built for this invocation from the target path, instead of parsing the
+        project again. `manifest.json` is written before any node runs, `partial_parse.msgpack` whenever the project
+        was parsed. Artifacts left over from an earlier invocation may be stale, so they are ignored.
+        """
+        target_path = Path(self.config.project_root) / self.config.target_path
+        readers = [
+            (target_path / MANIFEST_FILE_NAME, _read_manifest_json),
+            (target_path / PARTIAL_PARSE_FILE_NAME, _read_manifest_msgpack),
+        ]
+        for path, reader in readers:
+            if not path.is_file() or path.stat().st_mtime < self._created_at:
+                continue
+            try:
+                manifest = reader(path)
+            except Exception as e:  # pylint: disable=broad-except
+                logger.debug("Unable to read manifest at {}: {}", path, e)
+                continue
+            if manifest.metadata.invocation_id != get_invocation_id():
+                logger.debug("Ignoring manifest at {}, it was written by another dbt invocation", path)
+                continue
+            manifest.build_flat_graph()
+            return manifest, str(path)
+        return None
+
+    @property
+    def layer_backend(self) -> LayerBackend:
+        if self._layer_backend_lazy is None:
+            credentials = self.config.credentials
+            if credentials.layer_backend == LAYER_BACKEND_LOCAL:
+                registry_path = Path(credentials.layer_local_registry or DEFAULT_LOCAL_REGISTRY).expanduser()
+                logger.debug("Using the local Layer backend at {}", registry_path)
+                self._layer_backend_lazy = LocalLayerBackend(registry_path)
+            else:
+                self._layer_backend_lazy = LayerBackend()
+        return self._layer_backend_lazy
 
     def _get_manifest_node_from_relation_name(self, name: str) -> Optional[Tuple[ManifestNode, BaseRelation]]:
         for node in self._manifest.nodes.values():
             for suffix in ["", "__dbt_tmp"]:
                 node = node.replace(alias=node.alias + suffix)
                 relation = self.Relation.create_from_node(self.config, node)
-                if relation.render() == name:
+                if name in self._get_relation_names(relation):
                     return node, relation
         return None
 
+    def _get_relation_names(self, relation: BaseRelation) -> List[str]:
+        """
+        The names the given relation can be referred to by in the compiled sql
+        """
+        return [relation.render()]
+
     def execute(
         self, sql: str, auto_begin: bool = False, fetch: bool = False
     ) -> Tuple[LayerAdapterResponse, agate.Table]:
@@ -96,6 +235,10 @@ class LayerAdapter(BaseAdapter):  # pylint: disable=abstract-method
         """
         layer_sql_function = self.sql_parser.parse(sql)
         if layer_sql_function is None:
+            # dbt runs the statements of a node on a connection named after it, they may rebuild a cached source
+            connection = self.connections.get_if_exists()
+            if connection is not None and connection.name is not None:
+                self._source_cache.invalidate(connection.name)
             return super().execute(sql, auto_begin, fetch)
 
         source_node_relation = self._get_manifest_node_from_relation_name(layer_sql_function.source_name)
@@ -108,17 +251,130 @@ class LayerAdapter(BaseAdapter):  # pylint: disable=abstract-method
 
         source_node, source_relation = source_node_relation
         target_node, target_relation = target_node_relation
-
-        if isinstance(layer_sql_function, LayerTrainFunction):
-            return self._run_layer_train(layer_sql_function, source_node, source_relation, target_node, target_relation)
-        elif isinstance(layer_sql_function, LayerPredictFunction):
-            return self._run_layer_predict(
-                layer_sql_function, source_node, source_relation, target_node, target_relation
+        self._source_cache.invalidate(target_node.unique_id)
+
+        # the data fetched by the statement is spilled to disk over the memory budget, until the statement is done
+        with self._new_spill() as spill, self._admit_statement(
+            layer_sql_function, source_node, source_relation, target_node, spill
+        ), self._profile_statement(target_node):
+            if isinstance(layer_sql_function, LayerTrainFunction):
+                return self._run_layer_train(
+                    layer_sql_function, source_node, source_relation, target_node, target_relation, spill
+                )
+            elif isinstance(layer_sql_function, LayerPredictFunction):
+                return self._run_layer_predict(
+                    layer_sql_function, source_node, source_relation, target_node, target_relation, spill
+                )
+            elif isinstance(layer_sql_function, LayerAutoMLFunction):
+                return self._run_layer_automl(layer_sql_function, source_node, target_node, spill)
+            else:
+                raise RuntimeException(f'Unknown layer function "{layer_sql_function.function_type}"')
+
+    @contextmanager
+    def _admit_statement(
+        self,
+        layer_sql_function: LayerSqlFunction,
+        source_node: ManifestNode,
+        source_relation: BaseRelation,
+        target_node: ManifestNode,
+        spill: ArrowSpill,
+    ) -> Iterator[None]:
+        """
+        Waits until the estimated memory of the statement fits in the memory budget of the statements running at once
+        """
+        memory_budget_mb = self.config.credentials.layer_concurrent_memory_budget_mb
+        if memory_budget_mb is None or (
+            isinstance(layer_sql_function, LayerPredictFunction) and self._get_layer_meta(target_node).predict_pushdown
+        ):
+            # predictions pushed down to the warehouse fetch no data
+            yield
+            return
+
+        if isinstance(layer_sql_function, LayerPredictFunction):
+            sql, columns, where_statement = (
+                layer_sql_function.sql,
+                layer_sql_function.all_columns,
+                layer_sql_function.where_statement,
             )
         elif isinstance(layer_sql_function, LayerAutoMLFunction):
-            return self._run_layer_automl(layer_sql_function, source_node, target_node)
+            sql, columns, where_statement = (
+                layer_sql_function.sql,
+                list(dict.fromkeys(layer_sql_function.feature_columns + [layer_sql_function.target_column])),
+                layer_sql_function.where_statement,
+            )
         else:
-            raise RuntimeException(f'Unknown layer function "{layer_sql_function.function_type}"')
+            # TODO: fix Possible SQL injection vector through string-based query construction. and remove nosec
+            sql, columns, where_statement = f"select * from {source_relation.render()}", None, ""  # nosec
+        cached_table = None
+        if self.config.credentials.layer_source_cache_mb is not None:
+            cached_table = self._source_cache.get(source_node.unique_id, where_statement, columns)
+        try:
+            # a cached source isn't fetched again, the statement takes as much memory as its table
+            nbytes = cached_table.nbytes if cached_table is not None else self._estimate_fetch_memory(source_node, sql)
+            if spill.memory_budget is not None:
+                # fetched data over the memory budget of the statement is spilled to disk
+                nbytes = min(nbytes, spill.memory_budget)
+
+            start_wait = time.perf_counter()
+            with self._memory_admission.admit(nbytes, memory_budget_mb * 1024 * 1024):
+                logger.debug(
+                    "Admitted {} with an estimated {} bytes after {:.2f}s",
+                    target_node.name,
+                    nbytes,
+                    time.perf_counter() - start_wait,
+                )
+                yield
+        finally:
+            # the fetch took it, unless it failed before or the source was cached
+            self._scan_estimates.pop((source_node.unique_id, sql), None)
+
+    @contextmanager
+    def _profile_statement(self, node: ManifestNode) -> Iterator[None]:
+        """
+        Profiles the statement of the given node if configured, to the profiles directory named after the node
+        """
+        if not (self._get_layer_meta(node).profile or self.config.credentials.layer_profile):
+            yield
+            return
+
+        from .profiling import StatementProfiler
+
+        profiles_path = Path(self.config.project_root) / self.config.target_path / PROFILES_DIR_NAME
+        with StatementProfiler(profiles_path, node.unique_id):
+            yield
+        logger.debug("Profiled {} to {}", node.name, profiles_path)
+
+    def _estimate_fetch_memory(self, node: ManifestNode, sql: str) -> int:
+        """
+        Estimates the memory the data of the given sql takes once fetched, from the scan estimate of the warehouse if
+        it reports the fetched bytes, otherwise from its row count and the width of its first rows. The scan estimate
+        is kept for the scan budget of the fetch.
+        """
+        # TODO: fix Possible SQL injection vector through string-based query construction. and remove nosec
+        count_sql = f"select count(*) from ({sql}) as layer_count"  # nosec
+        sample_sql = f"select * from ({sql}) as layer_sample limit {MEMORY_ESTIMATE_SAMPLE_ROWS}"  # nosec
+        with self.connection_for(node):
+            estimate = self._estimate_scan(sql)
+            if estimate is not None:
+                self._scan_estimates[(node.unique_id, sql)] = estimate
+            if estimate is not None and estimate.fetch_bytes is not None:
+                self.commit_if_has_connection()
+                logger.debug("Estimated {} bytes fetched for {}", estimate.fetch_bytes, node.name)
+                return estimate.fetch_bytes
+            row_count = self._fetch_arrow_batches(count_sql).read_all().column(0)[0].as_py()
+            sample = self._fetch_arrow_batches(sample_sql).read_all()
+            self.commit_if_has_connection()
+        row_width = sample.nbytes / sample.num_rows if sample.num_rows else 0
+        logger.debug("Estimated {} rows of {:.0f} bytes for {}", row_count, row_width, node.name)
+        return int(row_count * row_width)
+
+    def _new_spill(self) -> ArrowSpill:
+        from .spill import ArrowSpill
+
+        credentials = self.config.credentials
+        memory_budget_mb = credentials.layer_memory_budget_mb
+        memory_budget = None if memory_budget_mb is None else memory_budget_mb * 1024 * 1024
+        return ArrowSpill(memory_budget, credentials.layer_spill_path)
 
     def _run_layer_train(
         self,
@@ -127,20 +383,31 @@ class LayerAdapter(BaseAdapter):  # pylint: disable=abstract-method
         source_relation: BaseRelation,
         target_node: ManifestNode,
         target_relation: BaseRelation,
+        spill: Optional[ArrowSpill] = None,
     ) -> Tuple[LayerAdapterResponse, agate.Table]:
         """
         Train a machine learning model using the given python script and save it as a dbt model
         """
+        import pyarrow as pa
+
+        from .spill import ArrowSpill
+
+        spill = spill or ArrowSpill(None)
         # load entrypoint
         entrypoint_module = self._get_layer_entrypoint_module(target_node)
 
-        # load source dataframe
-        raw_input_df = self._fetch_dataframe(source_node, source_relation)
-        if layer_sql_function.train_columns == ["*"]:
-            input_df = raw_input_df
-        else:
-            input_df = raw_input_df[layer_sql_function.train_columns].reset_index(drop=True)
-        logger.debug("Fetched input dataframe - {}", input_df.shape)
+        # load source table
+        layer_meta = self._get_layer_meta(target_node)
+        if layer_meta.train_input not in (TRAIN_INPUT_DATAFRAME, TRAIN_INPUT_BATCHES, TRAIN_INPUT_PARQUET):
+            raise RuntimeException(f'Unknown train_input "{layer_meta.train_input}" of {target_node.name}')
+        if layer_meta.train_input != TRAIN_INPUT_DATAFRAME:
+            # the source is written to disk batch by batch as the adapter streams it, the entrypoint reads it from there
+            # a batch at a time
+            spill.memory_budget = 0
+        input_table = self._fetch_table(source_node, source_relation, layer_meta, spill)
+        if layer_sql_function.train_columns != ["*"]:
+            input_table = input_table.select(layer_sql_function.train_columns)
+        logger.debug("Fetched input table - {}", input_table.shape)
 
         # login to Layer
         self.login_layer()
@@ -148,31 +415,52 @@ class LayerAdapter(BaseAdapter):  # pylint: disable=abstract-method
         # build the dataframe
         project_name = self.get_project_name(target_node)
         logger.debug("Training model {}, in project {}", target_node.name, project_name)
-        layer.init(project_name)
+        self.layer_backend.init(project_name)
+
+        with self._train_input(input_table, layer_meta, spill) as train_input:
 
-        def training_func() -> Any:
-            return entrypoint_module.main(input_df)
+            def training_func() -> Any:
+                return entrypoint_module.main(train_input)
 
-        model_decorator(project_name)(training_func)()  # pylint: disable=no-value-for-parameter
+            self.layer_backend.model(project_name)(training_func)()
         logger.debug("Trained model {}, in project {}", target_node.name, project_name)
 
-        output_df = pd.DataFrame.from_records([[target_node.name]], columns=["name"])
+        output_table = pa.table({"name": [target_node.name]})
 
-        # save the resulting dataframe to the target
-        _, table = self._load_dataframe(target_node, output_df)
+        # save the resulting table to the target
+        _, table = self._load_table(target_node, output_table)
 
         response = LayerAdapterResponse(
-            _message=f"LAYER MODEL TRAIN {output_df.shape[0]}",
-            rows_affected=output_df.shape[0],
+            _message=f"LAYER MODEL TRAIN {output_table.num_rows}",
+            rows_affected=output_table.num_rows,
             code="LAYER TRAIN",
+            spilled_bytes=spill.spilled_bytes,
+            spill_seconds=spill.spill_seconds,
         )
         return response, table
 
+    @contextmanager
+    def _train_input(self, table: pa.Table, layer_meta: LayerMeta, spill: ArrowSpill) -> Iterator[Any]:
+        """
+        The input of the train entrypoint from the given table, in the form configured
+        """
+        from . import arrow_helper
+        from .spill import BATCH_ROWS
+
+        if layer_meta.train_input == TRAIN_INPUT_BATCHES:
+            yield arrow_helper.DataFrameBatches(table, BATCH_ROWS)
+        elif layer_meta.train_input == TRAIN_INPUT_PARQUET:
+            with tempfile.TemporaryDirectory(prefix="layer-train-", dir=spill.directory) as parquet_path:
+                arrow_helper.write_parquet_files(table, parquet_path, BATCH_ROWS)
+                yield parquet_path
+        else:
+            yield self._to_dataframe(table, layer_meta, spill.spilled)
+
     def login_layer(self) -> None:
         layer_api_key = self.config.credentials.layer_api_key
         if layer_api_key is not None:
-            layer.login_with_api_key(layer_api_key)
-        else:
+            self.layer_backend.login_with_api_key(layer_api_key)
+        elif not isinstance(self.layer_backend, LocalLayerBackend):
             raise RuntimeException("Missing credentials: Please configure 'layer_api_key' in your 'profiles.yaml'.")
 
     def get_project_name(self, node: ManifestNode) -> str:
@@ -189,8 +477,23 @@ class LayerAdapter(BaseAdapter):  # pylint: disable=abstract-method
         param: LayerAutoMLFunction,
         source_node: ManifestNode,
         target_node: ManifestNode,
+        spill: Optional[ArrowSpill] = None,
     ) -> Tuple[LayerAdapterResponse, agate.Table]:
-        input_df = self._fetch_dataframe_by_sql(source_node, param.sql)
+        import pyarrow as pa
+
+        from .spill import ArrowSpill
+
+        spill = spill or ArrowSpill(None)
+        layer_meta = self._get_layer_meta(target_node)
+        input_table = self._fetch_source_table(
+            source_node,
+            param.sql,
+            list(dict.fromkeys(param.feature_columns + [param.target_column])),
+            param.where_statement,
+            layer_meta,
+            spill,
+        )
+        input_df = self._to_dataframe(input_table, layer_meta, spill.spilled)
 
         model_name = target_node.fqn[-1]
 
@@ -200,21 +503,38 @@ class LayerAdapter(BaseAdapter):  # pylint: disable=abstract-method
         # init project
         project_name = self.get_project_name(target_node)
         logger.debug("Training AutoML model {}, in Layer project {}", model_name, project_name)
-        layer.init(project_name)
-
-        from .automl import AutoML
-
-        automl = AutoML(param.model_type, input_df, param.feature_columns, param.target_column)
+        self.layer_backend.init(project_name)
+
+        from .automl import AutoML, AutoMLPruning
+
+        credentials = self.config.credentials
+        pruning = None
+        history_path = None
+        if credentials.layer_automl_pruning is not None:
+            pruning = AutoMLPruning(**credentials.layer_automl_pruning)
+            history_path = str(Path(self.config.project_root) / self.config.target_path / AUTOML_HISTORY_FILE_NAME)
+        automl = AutoML(
+            param.model_type,
+            input_df,
+            param.feature_columns,
+            param.target_column,
+            self.layer_backend,
+            credentials.layer_automl_warm_start_path,
+            pruning,
+            history_path,
+        )
         automl.train(project_name, model_name)
 
         response = LayerAdapterResponse(
             _message="LAYER AUTOML COMPLETE",
             rows_affected=0,
             code="LAYER AUTOML",
+            spilled_bytes=spill.spilled_bytes,
+            spill_seconds=spill.spill_seconds,
         )
 
-        output_df = pd.DataFrame(data=[[project_name, model_name]], columns=["project_name", "model_name"])
-        _, table = self._load_dataframe(target_node, output_df)
+        output_table = pa.table({"project_name": [project_name], "model_name": [model_name]})
+        _, table = self._load_table(target_node, output_table)
 
         return response, table
 
@@ -225,46 +545,98 @@ class LayerAdapter(BaseAdapter):  # pylint: disable=abstract-method
         source_relation: BaseRelation,
         target_node: ManifestNode,
         target_relation: BaseRelation,
+        spill: Optional[ArrowSpill] = None,
     ) -> Tuple[LayerAdapterResponse, agate.Table]:
+        from . import arrow_helper
+        from .spill import ArrowSpill
+
+        spill = spill or ArrowSpill(None)
         try:
-            # load source dataframe
-            input_df = self._fetch_dataframe_by_sql(source_node, layer_sql_function.sql, layer_sql_function.all_columns)
-            logger.debug("Fetched input dataframe - {}", input_df.shape)
-
-            # Users can use the full path for fetching models. If they are authenticated, they can also use the model
-            # name as the path. So, we try to log in and init project, only if we have the Layer api key in the dbt
-            # profile
-            if self.config.credentials.layer_api_key:
-                self.login_layer()
-                layer.init(self.get_project_name(target_node))
-
-            # Fetch the model
-            layer_model_def = layer.get_model(layer_sql_function.model_name)
-
-            model_input = input_df[layer_sql_function.predict_columns]
-            predictions = layer_model_def.predict(model_input)
-            logger.debug("Prediction dataframe - {}", predictions.shape)
-            column_template = layer_sql_function.prediction_alias
-            prediction_column_count = len(predictions.columns)
-            if prediction_column_count > 1:
-                column_template += "_{ix}"
-            predictions.columns = [column_template.format(ix=ix) for ix in range(prediction_column_count)]
-            select_columns_from_source = list(set(layer_sql_function.select_columns) - set(predictions.columns))
-            result_df = pd.concat(
-                [
-                    input_df[select_columns_from_source].reset_index(drop=True),
-                    predictions.reset_index(drop=True),
-                ],
-                axis=1,
+            layer_meta = self._get_layer_meta(target_node)
+
+            def fetch_source() -> pa.Table:
+                input_table = self._fetch_source_table(
+                    source_node,
+                    layer_sql_function.sql,
+                    layer_sql_function.all_columns,
+                    layer_sql_function.where_statement,
+                    layer_meta,
+                    spill,
+                )
+                logger.debug("Fetched input table - {}", input_table.shape)
+                return input_table
+
+            if layer_meta.predict_pushdown:
+                # the models decide whether the source is fetched at all
+                models = self._get_models(layer_sql_function, target_node)
+                pushdown_result = self._run_layer_predict_pushdown(layer_sql_function, models)
+                if pushdown_result is not None:
+                    return pushdown_result
+                input_table = fetch_source()
+            else:
+                # Resolve and download the models on another thread while the source table is fetched, the fetch
+                # stays on this thread as dbt connections are per thread. Errors of either side are raised here.
+                with ThreadPoolExecutor(max_workers=1, thread_name_prefix="layer-models") as executor:
+                    models_future = executor.submit(self._get_models, layer_sql_function, target_node)
+                    try:
+                        input_table = fetch_source()
+                    except BaseException:
+                        # a download not started yet is cancelled, a running one is waited for leaving the executor
+                        models_future.cancel()
+                        raise
+                    models = models_future.result()
+
+            # Predict once for each model and input columns, even if several aliases share them. Models take pandas
+            # dataframes, everything else stays in arrow tables which share the column data with the source table.
+            model_predictions: Dict[Tuple[str, Tuple[str, ...]], pd.DataFrame] = {}
+            prediction_tables = []
+            input_rows, predicted_rows = 0, 0
+            for prediction in layer_sql_function.predictions:
+                prediction_key = (prediction.model_name, tuple(prediction.predict_columns))
+                predictions = model_predictions.get(prediction_key)
+                if predictions is None:
+                    model = models[prediction.model_name]
+                    model_input = input_table.select(prediction.predict_columns)
+                    if layer_meta.predict_deduplicate:
+                        predictions, model_predicted_rows = self._predict_unique(
+                            model, model_input, layer_meta, spill.spilled
+                        )
+                    else:
+                        predictions = self._predict(model, model_input, layer_meta, spill.spilled)
+                        model_predicted_rows = model_input.num_rows
+                    if not getattr(model, "compiled", True):
+                        logger.debug(
+                            "Compiled {} disagreed with the model, it predicted instead", prediction.model_name
+                        )
+                    input_rows += model_input.num_rows
+                    predicted_rows += model_predicted_rows
+                    model_predictions[prediction_key] = predictions
+                    logger.debug("Prediction dataframe of {} - {}", prediction.model_name, predictions.shape)
+                column_template = prediction.prediction_alias
+                prediction_column_count = len(predictions.columns)
+                if prediction_column_count > 1:
+                    column_template += "_{ix}"
+                prediction_columns = [column_template.format(ix=ix) for ix in range(prediction_column_count)]
+                prediction_tables.append(arrow_helper.from_dataframe(predictions, prediction_columns))
+
+            predicted_columns = {column for table in prediction_tables for column in table.column_names}
+            select_columns_from_source = [x for x in layer_sql_function.select_columns if x not in predicted_columns]
+            result_table = arrow_helper.concat_columns(
+                [input_table.select(select_columns_from_source)] + prediction_tables
             )
 
-            # save the resulting dataframe to the target
-            _, table = self._load_dataframe(target_node, result_df)
+            # save the resulting table to the target
+            _, table = self._load_table(target_node, result_table)
 
             response = LayerAdapterResponse(
-                _message=f"LAYER PREDICTION INSERT {predictions.shape[0]}",
-                rows_affected=predictions.shape[0],
+                _message=f"LAYER PREDICTION INSERT {result_table.num_rows}",
+                rows_affected=result_table.num_rows,
                 code="LAYER PREDICT",
+                spilled_bytes=spill.spilled_bytes,
+                spill_seconds=spill.spill_seconds,
+                deduplication_ratio=(
+                    predicted_rows / input_rows if layer_meta.predict_deduplicate and input_rows > 0 else None
+                ),
             )
             return response, table
         except Exception as e:
@@ -273,6 +645,181 @@ class LayerAdapter(BaseAdapter):  # pylint: disable=abstract-method
             traceback.print_exc()
             raise e
 
+    @classmethod
+    def _predict(cls, model: Any, model_input: pa.Table, layer_meta: LayerMeta, spilled: bool) -> pd.DataFrame:
+        """
+        Predicts from the given input, a chunk of rows at a time if it was spilled so only a chunk is in memory at once
+        """
+        import pandas as pd
+        import pyarrow as pa
+
+        from .spill import BATCH_ROWS
+
+        def predict(table: pa.Table) -> pd.DataFrame:
+            predict_table = getattr(model, "predict_table", None)
+            if predict_table is not None:
+                # served models take arrow tables, converted to dataframes by the daemon
+                return predict_table(table, layer_meta.compact_dtypes)
+            return model.predict(cls._to_dataframe(table, layer_meta, spilled))
+
+        if not spilled or model_input.num_rows == 0:
+            return predict(model_input)
+        chunk_predictions = [
+            predict(pa.Table.from_batches([batch])) for batch in model_input.to_batches(max_chunksize=BATCH_ROWS)
+        ]
+        return pd.concat(chunk_predictions, ignore_index=True)
+
+    @classmethod
+    def _predict_unique(
+        cls, model: Any, model_input: pa.Table, layer_meta: LayerMeta, spilled: bool
+    ) -> Tuple[pd.DataFrame, int]:
+        """
+        Predicts from the distinct rows of the given input only and takes their predictions back to all its rows,
+        returns the predictions with the number of rows predicted
+        """
+        import pyarrow as pa
+
+        from . import arrow_helper
+
+        try:
+            unique_input, unique_row_positions = arrow_helper.unique_rows(model_input)
+        except pa.ArrowNotImplementedError as e:
+            logger.debug("Predicting all the rows, their columns can't be compared - {}", e)
+            return cls._predict(model, model_input, layer_meta, spilled), model_input.num_rows
+        logger.debug("Deduplicated prediction input from {} to {} rows", model_input.num_rows, unique_input.num_rows)
+        predictions = cls._predict(model, unique_input, layer_meta, spilled)
+        return predictions.iloc[unique_row_positions].reset_index(drop=True), unique_input.num_rows
+
+    @staticmethod
+    def _to_dataframe(table: pa.Table, layer_meta: LayerMeta, spilled: bool) -> pd.DataFrame:
+        """
+        Converts the given arrow table to the pandas dataframe that models take, with compact types if configured
+        """
+        from . import arrow_helper
+
+        if not layer_meta.compact_dtypes:
+            # spilled columns are memory mapped, dataframe blocks of their own can share them instead of copying them
+            return table.to_pandas(split_blocks=spilled)
+        dataframe = arrow_helper.to_compact_dataframe(table)
+        logger.debug(
+            "Compacted dataframe {} from {} to {} bytes",
+            dataframe.shape,
+            arrow_helper.estimate_dataframe_nbytes(table),
+            dataframe.memory_usage(deep=True, index=False).sum(),
+        )
+        return dataframe
+
+    def _run_layer_predict_pushdown(
+        self, layer_sql_function: LayerPredictFunction, models: Dict[str, Any]
+    ) -> Optional[Tuple[LayerAdapterResponse, agate.Table]]:
+        """
+        Predicts in the warehouse, with each prediction replaced by the sql expression of its model in the statement,
+        so the source never leaves it. Returns None if any of the models can't be translated to sql.
+        """
+        from .model_compiler import compile_model
+
+        expressions = []
+        for prediction in layer_sql_function.predictions:
+            expression = compile_model(models[prediction.model_name].get_train(), prediction.predict_columns)
+            if expression is None:
+                logger.debug("Unable to translate model {} to sql, predicting in Python", prediction.model_name)
+                return None
+            expressions.append(expression)
+
+        logger.debug("Predicting in the warehouse with sql expressions of {} characters", sum(map(len, expressions)))
+        # call super() instead of self to avoid a potential infinite loop
+        response, table = super().execute(layer_sql_function.replace_predictions(expressions))
+        return (
+            LayerAdapterResponse(
+                _message="LAYER PREDICTION PUSHDOWN",
+                rows_affected=response.rows_affected,
+                code="LAYER PREDICT",
+                spilled_bytes=0,
+                spill_seconds=0.0,
+            ),
+            table,
+        )
+
+    def _get_models(self, layer_sql_function: LayerPredictFunction, target_node: ManifestNode) -> Dict[str, Any]:
+        """
+        Fetches the models of the given predictions, each one once, and loads them
+        """
+        # Users can use the full path for fetching models. If they are authenticated, they can also use the model
+        # name as the path. So, we try to log in and init project, only if we have the Layer api key in the dbt
+        # profile. The local backend needs no api key.
+        if self.config.credentials.layer_api_key or isinstance(self.layer_backend, LocalLayerBackend):
+            self.login_layer()
+            self.layer_backend.init(self.get_project_name(target_node))
+
+        layer_meta = self._get_layer_meta(target_node)
+        serving_socket = self.config.credentials.layer_serving_socket
+        # pushdown and fast inference take the trained models, which stay in the daemon
+        if serving_socket is not None and not (layer_meta.predict_pushdown or layer_meta.fast_inference):
+            served_models = self._get_served_models(serving_socket, layer_sql_function, target_node)
+            if served_models is not None:
+                return served_models
+
+        models = {}
+        for prediction in layer_sql_function.predictions:
+            if prediction.model_name not in models:
+                model = self.layer_backend.get_model(prediction.model_name)
+                model.get_train()
+                if layer_meta.fast_inference:
+                    model = self._compile_model(prediction.model_name, model, len(prediction.predict_columns))
+                models[prediction.model_name] = model
+                logger.debug("Loaded model {}", prediction.model_name)
+        return models
+
+    def _get_served_models(
+        self, socket_path: str, layer_sql_function: LayerPredictFunction, target_node: ManifestNode
+    ) -> Optional[Dict[str, Any]]:
+        """
+        The models of the given predictions, loaded by the serving daemon at the given socket if they aren't already.
+        Returns None if no daemon is running there.
+        """
+        from . import serving
+
+        project_name = self.get_project_name(target_node)
+        backend: serving.BackendSpec
+        if isinstance(self.layer_backend, LocalLayerBackend):
+            registry_path = str(self.layer_backend.registry_path)
+            backend = {"backend": LAYER_BACKEND_LOCAL, "registry": registry_path, "project": project_name}
+        else:
+            backend = {"backend": "layer", "api_key": self.config.credentials.layer_api_key, "project": project_name}
+
+        models: Dict[str, Any] = {}
+        for prediction in layer_sql_function.predictions:
+            if prediction.model_name not in models:
+                model = serving.ServedModel(socket_path, backend, prediction.model_name)
+                try:
+                    model.load()
+                except OSError as e:
+                    logger.debug("No model serving daemon at {}, loading the models in dbt - {}", socket_path, e)
+                    return None
+                models[prediction.model_name] = model
+                logger.debug("Loaded model {} in the serving daemon", prediction.model_name)
+        return models
+
+    def _compile_model(self, model_name: str, model: Any, n_features: int) -> Any:
+        """
+        Wraps the given model to predict with its ONNX Runtime compilation, cached for each model version.
+        Returns the model itself if it can't be compiled.
+        """
+        from . import fast_inference
+
+        version = getattr(model, "version", None)
+        if version is None:
+            onnx_model = fast_inference.compile_model(model.get_train(), n_features)
+        else:
+            cache_path = Path(self.config.project_root) / self.config.target_path / COMPILED_MODELS_DIR_NAME
+            cache_path = cache_path.joinpath(*model_name.split(":")[0].split("/"), f"{version}.onnx")
+            onnx_model = fast_inference.compile_model_cached(model.get_train(), n_features, cache_path)
+        if onnx_model is None:
+            logger.debug("Model {} can't be compiled for fast inference", model_name)
+            return model
+        logger.debug("Compiled model {} for fast inference", model_name)
+        return fast_inference.FastInferenceModel(model, onnx_model)
+
     def _get_layer_entrypoint_module(self, node: ManifestNode) -> ModuleType:
         """
         get the entrypoint absolute path
@@ -282,7 +829,7 @@ class LayerAdapter(BaseAdapter):  # pylint: disable=abstract-method
         then load the module at that path
         """
 
-        layer_meta = LayerMeta(**node.meta.get("layer", {}))
+        layer_meta = self._get_layer_meta(node)
 
         entrypoint = PurePosixPath(layer_meta.entrypoint)
 
@@ -299,25 +846,74 @@ class LayerAdapter(BaseAdapter):  # pylint: disable=abstract-method
             f"layer_entrypoint.{node.unique_id}", str(entrypoint)
         ).load_module(None)
 
+        import cloudpickle  # type: ignore
+
         # register this module to be pickled, otherwise pickling fails on dynamically created modules
         cloudpickle.register_pickle_by_value(entrypoint_module)
 
         return entrypoint_module
 
-    def _fetch_dataframe(self, node: ManifestNode, relation: BaseRelation) -> pd.DataFrame:
+    def _fetch_table(
+        self,
+        node: ManifestNode,
+        relation: BaseRelation,
+        layer_meta: Optional[LayerMeta] = None,
+        spill: Optional[ArrowSpill] = None,
+    ) -> pa.Table:
         """
-        Fetches all the data from the given node/relation and returns it as a pandas dataframe
+        Fetches all the data from the given node/relation and returns it as an arrow table
         """
         # TODO: fix Possible SQL injection vector through string-based query construction. and remove nosec
         sql = f"select * from {relation.render()}"  # nosec
-        return self._fetch_dataframe_by_sql(node=node, sql=sql)
+        return self._fetch_source_table(node, sql, None, "", layer_meta, spill)
 
-    def _fetch_dataframe_by_sql(
-        self, node: ManifestNode, sql: str, query_column_names: Optional[List[str]] = None
-    ) -> pd.DataFrame:
+    def _fetch_source_table(
+        self,
+        node: ManifestNode,
+        sql: str,
+        columns: Optional[List[str]],
+        where_statement: str,
+        layer_meta: Optional[LayerMeta] = None,
+        spill: Optional[ArrowSpill] = None,
+    ) -> pa.Table:
+        """
+        Fetches the given columns of the source node, all of them if None, from the rows of the given where clause.
+        With `layer_source_cache_mb`, the tables fetched in memory are cached for the statements reading them next.
         """
-        Fetches all the data from the given sql and returns it as a pandas dataframe
+        from .spill import ArrowSpill
+
+        spill = spill or ArrowSpill(None)
+        source_cache_mb = self.config.credentials.layer_source_cache_mb
+        if source_cache_mb is None:
+            return self._fetch_table_by_sql(node, sql, columns, layer_meta, spill)
+        table = self._source_cache.get(node.unique_id, where_statement, columns)
+        if table is not None:
+            logger.debug("Took {} columns of {} from the source cache", table.num_columns, node.name)
+            return table
+        table = self._fetch_table_by_sql(node, sql, columns, layer_meta, spill)
+        # spilled tables are read from files removed with the statement
+        if not spill.spilled:
+            self._source_cache.put(node.unique_id, where_statement, columns, table, source_cache_mb * 1024 * 1024)
+        return table
+
+    def _fetch_table_by_sql(
+        self,
+        node: ManifestNode,
+        sql: str,
+        query_column_names: Optional[List[str]] = None,
+        layer_meta: Optional[LayerMeta] = None,
+        spill: Optional[ArrowSpill] = None,
+    ) -> pa.Table:
+        """
+        Fetches all the data from the given sql and returns it as an arrow table, spilled to disk over the memory
+        budget of the given spill
         """
+        from . import arrow_helper
+        from .spill import ArrowSpill
+
+        spill = spill or ArrowSpill(None)
+        layer_meta = layer_meta or LayerMeta()
+        self._check_scan_budget(node, sql, layer_meta, spill)
         # If case sensitive, don't map any columns
         # If not case sensitive, map upper columns to the names given in the query
         column_names_map = (
@@ -326,21 +922,132 @@ class LayerAdapter(BaseAdapter):  # pylint: disable=abstract-method
             else {column.upper(): column for column in query_column_names}
         )
 
-        with self.connection_for(node):
-            # call super() instead of self to avoid a potential infinite loop
-            unused_response, table = super().execute(sql, auto_begin=True, fetch=True)
-            super().commit_if_has_connection()
-            dataframe = pandas_helper.from_agate_table(table, column_names_map)
+        if layer_meta.fetch_partitions > 1:
+            table = self._fetch_partitioned_table(
+                node, sql, layer_meta.fetch_partition_column, layer_meta.fetch_partitions, spill
+            )
+        else:
+            with self.connection_for(node):
+                table = spill.read_all(self._fetch_arrow_batches(sql))
+                self.commit_if_has_connection()
 
-        return dataframe
+        return arrow_helper.rename_columns(table, column_names_map)
+
+    def _check_scan_budget(self, node: ManifestNode, sql: str, layer_meta: LayerMeta, spill: ArrowSpill) -> None:
+        """
+        Estimates the data the given sql scans, over the scan budget the fetch fails or streams to disk
+        """
+        scan_budget_mb = layer_meta.scan_budget_mb
+        if scan_budget_mb is None:
+            scan_budget_mb = self.config.credentials.layer_scan_budget_mb
+        if scan_budget_mb is None:
+            return
+        if layer_meta.scan_budget_exceeded not in ("fail", "spill"):
+            raise RuntimeException(f'Unknown scan_budget_exceeded "{layer_meta.scan_budget_exceeded}" of {node.name}')
+
+        # the statement was admitted with the estimate of the same sql
+        estimate = self._scan_estimates.pop((node.unique_id, sql), None)
+        if estimate is None:
+            with self.connection_for(node):
+                estimate = self._estimate_scan(sql)
+                self.commit_if_has_connection()
+        if estimate is None or estimate.scan_bytes is None:
+            logger.debug("Unable to estimate the scan of {}, fetching it regardless of the scan budget", node.name)
+            return
+        logger.debug("Estimated scan of {} - {} bytes, {} rows", node.name, estimate.scan_bytes, estimate.rows)
+        if estimate.scan_bytes <= scan_budget_mb * 1024 * 1024:
+            return
+
+        if layer_meta.scan_budget_exceeded == "fail":
+            scan_mb = estimate.scan_bytes / 1024 / 1024
+            raise RuntimeException(
+                f"Fetching {node.name} scans an estimated {scan_mb:.1f} MB, over its {scan_budget_mb} MB budget"
+            )
+        logger.debug("Scan of {} is over the budget of {} MB, spilling it to disk", node.name, scan_budget_mb)
+        # the rest of the statement writes its fetches to disk batch by batch as the adapter streams them, an adapter
+        # fetching through the base agate rows would still load each fetch whole before it is written
+        spill.memory_budget = 0
+
+    def _estimate_scan(self, sql: str) -> Optional[ScanEstimate]:
+        """
+        Estimates the data the given sql scans on the current connection without running it, adapters override it
+        with the dry run of their warehouse. None if it can't be estimated.
+        """
+        return None
+
+    def _fetch_partitioned_table(
+        self, node: ManifestNode, sql: str, partition_column: Optional[str], partitions: int, spill: ArrowSpill
+    ) -> pa.Table:
+        """
+        Splits the given sql in partitions by the hash of the given column, fetches them concurrently, each one over
+        its own connection, and concatenates them in partition order
+        """
+        from . import arrow_helper
+
+        if partition_column is None:
+            raise RuntimeException(f"Missing 'fetch_partition_column' to fetch {partitions} partitions of {node.name}")
+        column: str = partition_column
+
+        def fetch_partition(partition: int) -> pa.Table:
+            partition_filter = self._partition_filter(column, partitions, partition)
+            # TODO: fix Possible SQL injection vector through string-based query construction. and remove nosec
+            partition_sql = f"select * from ({sql}) as layer_partition where {partition_filter}"  # nosec
+            # connections are per thread, each partition opens its own one
+            with self.connection_named(f"{node.unique_id}.partition_{partition}", node):
+                table = spill.read_all(self._fetch_arrow_batches(partition_sql))
+                self.commit_if_has_connection()
+            logger.debug("Fetched partition {} of {} - {}", partition + 1, partitions, table.shape)
+            return table
+
+        with ThreadPoolExecutor(max_workers=partitions, thread_name_prefix="layer-fetch") as executor:
+            tables = list(executor.map(fetch_partition, range(partitions)))
+        return arrow_helper.concat_tables(tables)
+
+    def _partition_filter(self, column: str, partitions: int, partition: int) -> str:
+        """
+        The sql condition of the rows of the given partition, adapters override it with their own hash function
+        """
+        return f"abs(mod(hash({column}), {partitions})) = {partition}"
+
+    def _fetch_arrow_batches(self, sql: str) -> pa.RecordBatchReader:
+        """
+        Runs the given sql on the current connection and returns a reader of its results as arrow batches. The results
+        are loaded whole as agate rows first, adapters which can fetch arrow natively override it to stream the batches
+        so that spilling bounds the memory of the fetch.
+        """
+        import pyarrow as pa
+
+        from . import arrow_helper
+        from .spill import BATCH_ROWS
+
+        # call super() instead of self to avoid a potential infinite loop
+        unused_response, table = super().execute(sql, auto_begin=True, fetch=True)
+        arrow_table = arrow_helper.from_agate_table(table)
+        return pa.RecordBatchReader.from_batches(arrow_table.schema, arrow_table.to_batches(max_chunksize=BATCH_ROWS))
+
+    @classmethod
+    def convert_number_type(cls, agate_table: agate.Table, col_idx: int) -> str:
+        """
+        The warehouse type of the given number column, from its kind for columns typed from their arrow type instead
+        of a pass over their values
+        """
+        from . import arrow_helper
 
-    def _load_dataframe(self, node: ManifestNode, dataframe: pd.DataFrame) -> Tuple[Dict[Any, Any], agate.Table]:
+        column_type = agate_table.column_types[col_idx]
+        if isinstance(column_type, arrow_helper.SchemaNumber):
+            sample = WHOLE_NUMBER_SAMPLE if column_type.whole else FRACTIONAL_NUMBER_SAMPLE
+            return super().convert_number_type(sample, 0)
+        return super().convert_number_type(agate_table, col_idx)
+
+    def _load_table(self, node: ManifestNode, arrow_table: pa.Table) -> Tuple[Dict[Any, Any], agate.Table]:
         """
-        Loads the given pandas dataframe into the given node/relation
+        Loads the given arrow table into the given node/relation
         """
+        from . import arrow_helper
+
         with tempfile.TemporaryDirectory() as tmpdirname:
             file = Path(tmpdirname) / "data.csv"
-            table = pandas_helper.to_agate_table_with_path(dataframe, file)
+            table = arrow_helper.to_agate_table_with_path(arrow_table, file)
 
             materialization_macro = self._manifest.find_materialization_macro_by_name(
                 self.config.project_name,
@@ -355,3 +1062,22 @@ class LayerAdapter(BaseAdapter):  # pylint: disable=abstract-method
                 result = MacroGenerator(materialization_macro, context)()
 
         return result, table
+
+
+def _read_manifest_json(path: Path) -> Manifest:
+    writable_manifest = WritableManifest.read_and_check_versions(str(path))
+    return Manifest(
+        nodes=writable_manifest.nodes,
+        sources=writable_manifest.sources,
+        macros=writable_manifest.macros,
+        docs=writable_manifest.docs,
+        exposures=writable_manifest.exposures,
+        metrics=writable_manifest.metrics,
+        selectors=writable_manifest.selectors,
+        disabled=writable_manifest.disabled,
+        metadata=writable_manifest.metadata,
+    )
+
+
+def _read_manifest_msgpack(path: Path) -> Manifest:
+    return Manifest.from_msgpack(path.read_bytes())
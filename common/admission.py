@@ -0,0 +1,36 @@
+import threading
+from collections import deque
+from contextlib import contextmanager
+from typing import Deque, Iterator
+
+
+class MemoryAdmission:
+    """
+    Admits statements while their estimated memory fits in a memory budget, the others wait in the order they came for
+    the admitted ones to release theirs. A statement over the whole budget is admitted once no other statement is.
+    """
+
+    def __init__(self) -> None:
+        self.admitted_bytes = 0
+        self._waiting: Deque[object] = deque()
+        self._condition = threading.Condition()
+
+    @contextmanager
+    def admit(self, nbytes: int, memory_budget: int) -> Iterator[None]:
+        ticket = object()
+        with self._condition:
+            self._waiting.append(ticket)
+            self._condition.wait_for(lambda: self._waiting[0] is ticket and self._fits(nbytes, memory_budget))
+            self._waiting.popleft()
+            self.admitted_bytes += nbytes
+            # the next statement in line may fit too
+            self._condition.notify_all()
+        try:
+            yield
+        finally:
+            with self._condition:
+                self.admitted_bytes -= nbytes
+                self._condition.notify_all()
+
+    def _fits(self, nbytes: int, memory_budget: int) -> bool:
+        return self.admitted_bytes == 0 or self.admitted_bytes + nbytes <= memory_budget
@@ -0,0 +1,312 @@
+import decimal
+import itertools
+import pathlib
+from typing import Any, Iterator, List, Mapping, Sequence, Tuple
+
+import agate  # type:ignore
+import numpy as np
+import numpy.typing as npt
+import pandas as pd  # type:ignore
+import pyarrow as pa  # type:ignore
+import pyarrow.compute as pc  # type:ignore
+import pyarrow.csv  # type:ignore
+from dbt.clients import agate_helper  # type:ignore
+
+
+# strings with at most this ratio of distinct values to rows become categories in compact dataframes
+CATEGORY_MAX_DISTINCT_RATIO = 0.5
+# rows converted to estimate the memory of a whole dataframe
+ESTIMATE_SAMPLE_ROWS = 10_000
+
+
+def from_agate_table(table: agate.Table) -> pa.Table:
+    """
+    Converts the given agate table to an arrow table, column by column
+    """
+    column_values = zip(*table.rows) if table.rows else [[] for _ in table.column_names]
+    columns = [_from_agate_column(list(values)) for values in column_values]
+    return pa.Table.from_arrays(columns, names=list(table.column_names))
+
+
+def _from_agate_column(values: List[Any]) -> pa.Array:
+    """
+    Agate keeps numbers as decimals, whole numbers become integers and the others floats
+    """
+    decimals = [value for value in values if isinstance(value, decimal.Decimal)]
+    if not decimals:
+        return pa.array(values)
+    if all(value.as_tuple().exponent >= 0 for value in decimals):
+        return pa.array([None if value is None else int(value) for value in values], type=pa.int64())
+    return pa.array([None if value is None else float(value) for value in values], type=pa.float64())
+
+
+def decimals_to_numbers(reader: pa.RecordBatchReader) -> pa.RecordBatchReader:
+    """
+    Casts decimal columns the way agate decimals are converted, to integers without a scale and floats otherwise,
+    one batch at a time as they are read
+    """
+    schema = pa.schema(
+        [
+            pa.field(field.name, (pa.int64() if field.type.scale == 0 else pa.float64()), field.nullable)
+            if pa.types.is_decimal(field.type)
+            else field
+            for field in reader.schema
+        ]
+    )
+    if schema.equals(reader.schema):
+        return reader
+
+    def cast_batches() -> Iterator[pa.RecordBatch]:
+        for batch in reader:
+            columns = [column.cast(field.type) for column, field in zip(batch.columns, schema)]
+            yield pa.RecordBatch.from_arrays(columns, schema=schema)
+
+    return pa.RecordBatchReader.from_batches(schema, cast_batches())
+
+
+def from_record_batches(batches: Iterator[pa.RecordBatch], column_names: Sequence[str]) -> pa.RecordBatchReader:
+    """
+    Streams the given batches of a warehouse result with the given columns, one batch at a time as they are read.
+    Warehouses may type the numbers of each batch from its own values, they are cast to the types agate would convert
+    them to: integers and decimals without a scale to 64 bits integers, the other decimals to floats. A result without
+    batches reads as an empty table of the columns.
+    """
+    first_batch = next(batches, None)
+    if first_batch is None:
+        empty_table = from_agate_table(agate.Table([], column_names))
+        return pa.RecordBatchReader.from_batches(empty_table.schema, empty_table.to_batches())
+    schema = pa.schema([pa.field(field.name, _number_type(field.type)) for field in first_batch.schema])
+
+    def cast_batches() -> Iterator[pa.RecordBatch]:
+        for batch in itertools.chain([first_batch], batches):
+            columns = [column.cast(field.type) for column, field in zip(batch.columns, schema)]
+            yield pa.RecordBatch.from_arrays(columns, schema=schema)
+
+    return pa.RecordBatchReader.from_batches(schema, cast_batches())
+
+
+def _number_type(column_type: pa.DataType) -> pa.DataType:
+    if pa.types.is_integer(column_type) or (pa.types.is_decimal(column_type) and column_type.scale == 0):
+        return pa.int64()
+    if pa.types.is_decimal(column_type):
+        return pa.float64()
+    return column_type
+
+
+def to_compact_dataframe(table: pa.Table) -> pd.DataFrame:
+    """
+    Converts the given arrow table to a pandas dataframe with compact column types: strings with few distinct values
+    become categories and the other strings stay in arrow, numbers take the narrowest type which keeps their values
+    """
+    series = [_to_compact_series(column) for column in table.columns]
+    dataframe = pd.DataFrame(dict(enumerate(series)), index=pd.RangeIndex(table.num_rows))
+    dataframe.columns = table.column_names
+    return dataframe
+
+
+def _to_compact_series(column: pa.ChunkedArray) -> pd.Series:
+    column_type = column.type
+    if pa.types.is_string(column_type) or pa.types.is_large_string(column_type):
+        if pc.count_distinct(column).as_py() <= len(column) * CATEGORY_MAX_DISTINCT_RATIO:
+            return column.dictionary_encode().to_pandas()
+        return pd.Series(pd.arrays.ArrowStringArray(column.cast(pa.string())))
+    if pa.types.is_integer(column_type) and column.null_count == 0:
+        return column.cast(_narrowest_integer_type(column)).to_pandas()
+    if pa.types.is_integer(column_type) or pa.types.is_floating(column_type):
+        # integers with nulls become floats in pandas either way
+        column = column.cast(pa.float64())
+        float32_column = column.cast(pa.float32(), safe=False)
+        is_lossless = pc.or_kleene(pc.equal(float32_column.cast(pa.float64()), column), pc.is_nan(column))
+        return (float32_column if pc.all(is_lossless).as_py() is not False else column).to_pandas()
+    return column.to_pandas()
+
+
+def _narrowest_integer_type(column: pa.ChunkedArray) -> pa.DataType:
+    min_max = pc.min_max(column)
+    min_value, max_value = min_max["min"].as_py() or 0, min_max["max"].as_py() or 0
+    for integer_type in (pa.int8(), pa.int16(), pa.int32()):
+        bound = 2 ** (integer_type.bit_width - 1)
+        if -bound <= min_value and max_value < bound:
+            return integer_type
+    return column.type
+
+
+def estimate_dataframe_nbytes(table: pa.Table) -> int:
+    """
+    Estimates the memory a pandas dataframe of the given arrow table would take with the default column types,
+    from the memory taken by its first rows
+    """
+    if table.num_rows == 0:
+        return 0
+    sample = table.slice(0, ESTIMATE_SAMPLE_ROWS).to_pandas()
+    sample_nbytes = sample.memory_usage(deep=True, index=False).sum()
+    return int(sample_nbytes * table.num_rows / len(sample))
+
+
+def unique_rows(table: pa.Table) -> Tuple[pa.Table, npt.NDArray[np.intp]]:
+    """
+    Finds the distinct rows of the given table, nulls and NaNs included. Returns them in the order they first appear,
+    with the position of the distinct row of each row so values computed for them can be taken back to all the rows.
+    """
+    row_keys = np.zeros(table.num_rows, dtype=np.int64)
+    first_rows = np.arange(min(table.num_rows, 1))
+    for column in table.columns:
+        encoded = pc.dictionary_encode(column, null_encoding="encode")
+        value_keys = pa.chunked_array([chunk.indices for chunk in encoded.chunks], pa.int32()).to_numpy()
+        value_count = len(encoded.chunks[-1].dictionary) if encoded.num_chunks else 0
+        # keys stay below the row count, combining them with the values of the next column can't overflow
+        _, first_rows, row_keys = np.unique(row_keys * value_count + value_keys, return_index=True, return_inverse=True)
+    # keep the distinct rows in the order they first appear
+    first_rows_order = np.argsort(first_rows)
+    unique_row_positions = np.empty_like(first_rows_order)
+    unique_row_positions[first_rows_order] = np.arange(len(first_rows_order))
+    return table.take(first_rows[first_rows_order]), unique_row_positions[row_keys]
+
+
+class DataFrameBatches:
+    """
+    The rows of an arrow table as pandas dataframes of at most the given number of rows, converted one at a time as
+    they are iterated. It can be iterated several times, for several epochs.
+    """
+
+    def __init__(self, table: pa.Table, batch_rows: int) -> None:
+        self.table = table
+        self.batch_rows = batch_rows
+
+    @property
+    def columns(self) -> List[str]:
+        return list(self.table.column_names)
+
+    @property
+    def num_rows(self) -> int:
+        return int(self.table.num_rows)
+
+    def __iter__(self) -> Iterator[pd.DataFrame]:
+        for batch in self.table.to_batches(max_chunksize=self.batch_rows):
+            yield batch.to_pandas()
+
+
+def write_parquet_files(table: pa.Table, path: str, batch_rows: int) -> None:
+    """
+    Writes the given arrow table to parquet files in the given directory, a row group for each batch of rows
+    """
+    import pyarrow.dataset  # type:ignore
+
+    pyarrow.dataset.write_dataset(
+        table,
+        path,
+        format="parquet",
+        basename_template="part-{i}.parquet",
+        max_rows_per_group=batch_rows,
+        existing_data_behavior="overwrite_or_ignore",
+    )
+
+
+def rename_columns(table: pa.Table, column_names_map: Mapping[str, str]) -> pa.Table:
+    """
+    Renames the columns found in the map by their upper case name, without copying the data
+    """
+    if not column_names_map:
+        return table
+    return table.rename_columns([column_names_map.get(column.upper(), column) for column in table.column_names])
+
+
+def from_dataframe(dataframe: pd.DataFrame, column_names: Sequence[str]) -> pa.Table:
+    """
+    Converts the given pandas dataframe to an arrow table with the given column names, ignoring its index
+    """
+    return pa.Table.from_pandas(dataframe, preserve_index=False).rename_columns(list(column_names))
+
+
+def concat_columns(tables: Sequence[pa.Table]) -> pa.Table:
+    """
+    Puts the columns of the given tables, of the same length, side by side without copying the data
+    """
+    columns = [column for table in tables for column in table.columns]
+    names = [name for table in tables for name in table.column_names]
+    return pa.Table.from_arrays(columns, names=names)
+
+
+def concat_tables(tables: Sequence[pa.Table]) -> pa.Table:
+    """
+    Puts the rows of the given tables, with the same columns, one after the other without copying the data.
+    Column types inferred from a part of the rows may differ: columns without values take the type of the others
+    and integers become floats when mixed with them.
+    """
+    if len(tables) == 1:
+        return tables[0]
+    fields = []
+    for field in tables[0].schema:
+        types = {table.schema.field(field.name).type for table in tables} - {pa.null()}
+        if len(types) > 1 and all(pa.types.is_integer(t) or pa.types.is_floating(t) for t in types):
+            types = {pa.float64()}
+        fields.append(pa.field(field.name, types.pop() if len(types) == 1 else field.type))
+    schema = pa.schema(fields)
+    return pa.concat_tables([table if table.schema.equals(schema) else table.cast(schema) for table in tables])
+
+
+def _format_timestamp_column(column: pa.ChunkedArray) -> pa.ChunkedArray:
+    """
+    Formats timestamps like pandas does, with microseconds only if any timestamp has a fraction of a second
+    """
+    has_fraction = pc.any(pc.not_equal(pc.subsecond(column), 0)).as_py()
+    column = column.cast(pa.timestamp("us" if has_fraction else "s", column.type.tz), safe=False)
+    if column.type.tz is None:
+        return pc.strftime(column, "%Y-%m-%d %H:%M:%S")
+    return pc.replace_substring_regex(pc.strftime(column, "%Y-%m-%d %H:%M:%S%z"), r"([+-]\d\d)(\d\d)$", r"\1:\2")
+
+
+def _table_to_csv(table: pa.Table, path: pathlib.Path) -> None:
+    """
+    Writes the csv some warehouses load the agate table from, with the timestamps they can parse
+    """
+    for ix, field in enumerate(table.schema):
+        if pa.types.is_timestamp(field.type):
+            table = table.set_column(ix, field.name, _format_timestamp_column(table.column(ix)))
+    pyarrow.csv.write_csv(table, path)
+
+
+class SchemaNumber(agate_helper.Number):
+    """
+    The agate type of a number column typed from its arrow type, whole for integers and fractional otherwise,
+    so the warehouse type doesn't depend on the values
+    """
+
+    def __init__(self, whole: bool) -> None:
+        super().__init__(null_values=("null", ""))
+        self.whole = whole
+
+
+def _to_agate_column(column: pa.ChunkedArray) -> Tuple[agate.data_types.DataType, List[Any]]:
+    """
+    The agate type of the given column from its arrow type, with its values
+    """
+    column_type = column.type
+    if pa.types.is_integer(column_type) or pa.types.is_null(column_type):
+        # columns without values are whole numbers, the type agate infers for them
+        return SchemaNumber(whole=True), column.to_pylist()
+    if pa.types.is_floating(column_type) or pa.types.is_decimal(column_type):
+        return SchemaNumber(whole=False), column.to_pylist()
+    if pa.types.is_boolean(column_type):
+        return agate.Boolean(), column.to_pylist()
+    if pa.types.is_date(column_type):
+        return agate.Date(), column.to_pylist()
+    if pa.types.is_timestamp(column_type) and column_type.tz is None:
+        # microseconds convert to datetimes, nanoseconds to pandas timestamps
+        return agate.DateTime(), column.cast(pa.timestamp("us"), safe=False).to_pylist()
+    if pa.types.is_timestamp(column_type):
+        # timestamps with a time zone are kept as text with their offset
+        return agate.Text(), _format_timestamp_column(column).to_pylist()
+    return agate.Text(), [value if value is None else str(value) for value in column.to_pylist()]
+
+
+def to_agate_table_with_path(table: pa.Table, path: pathlib.Path) -> agate.Table:
+    """
+    Converts the given arrow table to an agate table, with the column types of its schema instead of the ones
+    inferred from its values, and writes it to the given csv
+    """
+    _table_to_csv(table, path)
+    column_types, column_values = zip(*map(_to_agate_column, table.columns)) if table.num_columns else ((), ())
+    agate_table = agate.Table(list(zip(*column_values)), table.column_names, list(column_types))
+    agate_table.original_abspath = path
+    return agate_table
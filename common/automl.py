@@ -1,19 +1,230 @@
-from typing import Any, List, Type
+import json
+import os
+import sys
+import threading
+import time
+import types
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Type
 
+import numpy as np
 import pandas as pd  # type: ignore
 
-import layer
 from common.automl_models.base_model import AutoMLModel, TrainDataset
+from common.automl_models.lightgbm_models import LightGBMClassifier, LightGBMRegressor
 from common.automl_models.sklearn_models import (
     ScikitLearnAdaBoostClassifier,
     ScikitLearnDecisionTreeClassifier,
     ScikitLearnDecisionTreeRegressor,
+    ScikitLearnHistGradientBoostingClassifier,
+    ScikitLearnHistGradientBoostingRegressor,
     ScikitLearnLinearRegression,
     ScikitLearnRandomForestClassifier,
     ScikitLearnRidgeClassifier,
 )
-from common.automl_models.xgboost_models import XGBoostClassifier, XGBoostRegressor
-from layer.decorators import model as model_decorator
+from common.automl_models.xgboost_models import (
+    XGBoostClassifier,
+    XGBoostHistClassifier,
+    XGBoostHistRegressor,
+    XGBoostRegressor,
+)
+from common.layer_backend import LayerBackend
+
+
+# a warm started model is kept without training the others if it scores within this of the last full search
+WARM_START_SCORE_TOLERANCE = 0.02
+# the runs of each candidate model kept in the warm start or history file, for pruning
+CANDIDATE_HISTORY_RUNS = 10
+# the resident memory of the process is sampled this often while a candidate trains
+MEMORY_SAMPLE_SECONDS = 0.01
+
+
+@dataclass
+class CandidateCost:
+    # the time to train, without predicting the test split
+    fit_seconds: float
+    # the time to predict the test split, None if the model didn't time it
+    predict_seconds: Optional[float]
+    # the growth of the resident memory of the process and its children while training, None where it can't be read.
+    # Pages the children share, like memory mapped training data, are counted once per process.
+    peak_memory_bytes: Optional[int]
+    # the estimated size of the trained model in memory
+    model_bytes: int
+
+
+@dataclass
+class AutoMLPruning:
+    """
+    Skips the candidate models which lost each of their last runs by more than the score tolerance, while taking at
+    least the given share of the fit time of those runs. They are trained again once skipped for the given number of
+    runs, in case the data changed.
+    """
+
+    after_runs: int = 3
+    score_tolerance: float = 0.02
+    min_cost_share: float = 0.1
+    retry_after_runs: int = 10
+
+    def should_skip(self, history: Dict[str, Any]) -> bool:
+        after_runs = self.after_runs
+        runs = history.get("runs", [])[-after_runs:]
+        if len(runs) < after_runs or history.get("skipped_runs", 0) >= self.retry_after_runs:
+            return False
+        fit_seconds = sum(run["fit_seconds"] for run in runs)
+        run_fit_seconds = sum(run["run_fit_seconds"] for run in runs)
+        return fit_seconds >= self.min_cost_share * run_fit_seconds and all(
+            run["best_score"] - run["score"] > self.score_tolerance for run in runs
+        )
+
+
+class _PeakMemory:
+    """
+    Samples the resident memory of the process and its children, like joblib workers, from /proc in a thread, for the
+    peak growth while in the context
+    """
+
+    def __init__(self) -> None:
+        self.peak_bytes: Optional[int] = None
+        self._start_bytes: Optional[int] = None
+        self._stopped = threading.Event()
+        self._thread = threading.Thread(target=self._sample, daemon=True)
+
+    def __enter__(self) -> "_PeakMemory":
+        self._start_bytes = _read_tree_rss()
+        if self._start_bytes is not None:
+            self.peak_bytes = 0
+            self._thread.start()
+        return self
+
+    def __exit__(self, *args: Any) -> None:
+        if self._start_bytes is not None:
+            self._stopped.set()
+            self._thread.join()
+            self._update()
+
+    def _sample(self) -> None:
+        while not self._stopped.wait(MEMORY_SAMPLE_SECONDS):
+            self._update()
+
+    def _update(self) -> None:
+        rss = _read_tree_rss()
+        if rss is not None and self._start_bytes is not None and self.peak_bytes is not None:
+            self.peak_bytes = max(self.peak_bytes, rss - self._start_bytes)
+
+
+def _read_rss(pid: str = "self") -> Optional[int]:
+    try:
+        with open(f"/proc/{pid}/statm", encoding="ascii") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError, AttributeError):
+        return None
+
+
+def _child_pids(pid: str = "self") -> List[str]:
+    """
+    The pids of the descendants of the process, from the children of each of its threads
+    """
+    children = []
+    try:
+        tasks = os.listdir(f"/proc/{pid}/task")
+    except OSError:
+        return []
+    for task in tasks:
+        try:
+            with open(f"/proc/{pid}/task/{task}/children", encoding="ascii") as f:
+                children.extend(f.read().split())
+        except OSError:
+            continue
+    return children + [descendant for child in children for descendant in _child_pids(child)]
+
+
+def _read_tree_rss() -> Optional[int]:
+    rss = _read_rss()
+    if rss is None:
+        return None
+    # children may exit while they are read
+    return rss + sum(_read_rss(pid) or 0 for pid in _child_pids())
+
+
+def estimate_model_bytes(model: Any) -> int:
+    """
+    Estimates the size of a trained model in memory from its arrays and attributes, without serialising all of it
+    """
+    # the values are kept by id, so that the ids of the pickled states can't be reused while estimating
+    seen: Dict[int, Any] = {}
+
+    def estimate(value: Any) -> int:
+        if id(value) in seen or isinstance(value, (type, types.ModuleType, types.FunctionType, types.MethodType)):
+            return 0
+        seen[id(value)] = value
+        if isinstance(value, np.ndarray):
+            return int(value.nbytes)
+        if isinstance(value, (pd.DataFrame, pd.Series, pd.Index)):
+            return int(np.sum(value.memory_usage()))
+        if isinstance(value, dict):
+            return sys.getsizeof(value) + sum(estimate(key) + estimate(item) for key, item in value.items())
+        if isinstance(value, (list, tuple, set, frozenset)):
+            return sys.getsizeof(value) + sum(estimate(item) for item in value)
+        # extension types, like the trees of scikit-learn and the boosters of xgboost, keep their data in their
+        # pickled state
+        state = None
+        if hasattr(type(value), "__getstate__"):
+            try:
+                state = value.__getstate__()
+            except Exception:  # pylint: disable=broad-except
+                state = None
+        if state is None:
+            state = getattr(value, "__dict__", None)
+        return sys.getsizeof(value) + (estimate(state) if state is not None else 0)
+
+    return estimate(model)
+
+
+def measure_training(trainer: AutoMLModel, train_dataset: TrainDataset) -> CandidateCost:
+    """
+    Trains the given candidate, measuring what it costs
+    """
+    with _PeakMemory() as peak_memory:
+        start = time.perf_counter()
+        trainer.train(train_dataset)
+        train_seconds = time.perf_counter() - start
+    # the test split is predicted while training, for the score of the model
+    predict_seconds = trainer.predict_seconds
+    fit_seconds = train_seconds - (predict_seconds or 0)
+    return CandidateCost(fit_seconds, predict_seconds, peak_memory.peak_bytes, estimate_model_bytes(trainer.model))
+
+
+class AutoMLWarmStart:
+    """
+    The winning AutoML models of previous runs with their hyperparameters and scores, kept in a json file
+    """
+
+    _lock = threading.Lock()
+
+    def __init__(self, path: Path) -> None:
+        self.path = path
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            return self._read().get(key)
+
+    def put(self, key: str, run: Dict[str, Any]) -> None:
+        with self._lock:
+            runs = self._read()
+            runs[key] = run
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            temp_path = self.path.with_name(f"{self.path.name}.tmp")
+            temp_path.write_text(json.dumps(runs, indent=2, sort_keys=True))
+            os.replace(temp_path, self.path)
+
+    def _read(self) -> Dict[str, Any]:
+        if not self.path.is_file():
+            return {}
+        try:
+            return json.loads(self.path.read_text())
+        except ValueError:
+            return {}
 
 
 class AutoML:
@@ -25,55 +236,140 @@ class AutoML:
         ScikitLearnRidgeClassifier,
         ScikitLearnLinearRegression,
         ScikitLearnDecisionTreeRegressor,
+        ScikitLearnHistGradientBoostingClassifier,
+        ScikitLearnHistGradientBoostingRegressor,
         # xgboost models
         XGBoostClassifier,
         XGBoostRegressor,
+        XGBoostHistClassifier,
+        XGBoostHistRegressor,
+        # lightgbm models, if lightgbm is installed
+        LightGBMClassifier,
+        LightGBMRegressor,
     ]
 
-    def __init__(self, model_type: str, df: pd.DataFrame, features: List[str], target: str) -> None:
+    def __init__(
+        self,
+        model_type: str,
+        df: pd.DataFrame,
+        features: List[str],
+        target: str,
+        layer_backend: Optional[LayerBackend] = None,
+        warm_start_path: Optional[str] = None,
+        pruning: Optional[AutoMLPruning] = None,
+        history_path: Optional[str] = None,
+    ) -> None:
         self.model_type = model_type
         self.df = df
         self.features = features
         self.target = target
         self.score = None
+        self.layer_backend = layer_backend or LayerBackend()
+        self.warm_start = AutoMLWarmStart(Path(warm_start_path)) if warm_start_path else None
+        self.pruning = pruning
+        # the runs are recorded with the warm starts, or in the history file for pruning without them
+        self.runs = self.warm_start or (AutoMLWarmStart(Path(history_path)) if history_path else None)
 
     def train(self, project_name: str, model_name: str) -> None:
         if self.model_type not in [AutoMLModel.CLASSIFIER, AutoMLModel.REGRESSOR]:
             raise Exception(f"Model type '{self.model_type}' not supported yet!")
 
-        def log_models(trained_models: List[AutoMLModel]) -> None:
+        def log_models(trained_models: List[AutoMLModel], costs: Dict[str, CandidateCost]) -> None:
             model_comparison = {model.name: model.score for model in trained_models}
-            layer.log({"models": model_comparison})
+            self.layer_backend.log(
+                {
+                    "models": model_comparison,
+                    "model fit seconds": {name: cost.fit_seconds for name, cost in costs.items()},
+                    "model predict seconds": {
+                        name: cost.predict_seconds for name, cost in costs.items() if cost.predict_seconds is not None
+                    },
+                    "model peak memory bytes": {
+                        name: cost.peak_memory_bytes
+                        for name, cost in costs.items()
+                        if cost.peak_memory_bytes is not None
+                    },
+                    "model size bytes": {name: cost.model_bytes for name, cost in costs.items()},
+                }
+            )
+
+        warm_start_key = json.dumps([project_name, model_name, self.model_type, self.target, sorted(self.features)])
+        recorded_run = (self.runs.get(warm_start_key) if self.runs else None) or {}
+        previous_run = recorded_run if self.warm_start else {}
+        # warm started runs are compared to the last run training every candidate, so that their scores can't slide
+        # down by the tolerance run after run. Runs recorded before the baseline was kept have their own score.
+        baseline_score = previous_run.get("baseline_score", previous_run.get("score"))
 
         def training_func() -> Any:
             # Prepare dataset
             train_dataset = TrainDataset(self.df, self.features, self.target)
 
-            # Run all models matches the requested model type
+            # Run all models matches the requested model type and the training data size, the winner of the previous
+            # run first
+            trainers = [
+                automl_model() for automl_model in self.automl_models if automl_model.is_candidate(len(self.df))
+            ]
+            trainers = [trainer for trainer in trainers if trainer.model_type == self.model_type]
+            trainers.sort(key=lambda trainer: trainer.name != previous_run.get("model"))
+            candidate_history = recorded_run.get("candidates", {})
+            skipped_models = self._prune(trainers, candidate_history)
+            if skipped_models:
+                self.layer_backend.log({"skipped models": skipped_models})
+                trainers = [trainer for trainer in trainers if trainer.name not in skipped_models]
             best_model = None
             best_score = 0
 
             trained_models = []
-            for automl_model in self.automl_models:
-                trainer = automl_model()
-
-                if trainer.model_type == self.model_type:
+            costs: Dict[str, CandidateCost] = {}
+            kept_warm_start = False
+            try:
+                for trainer in trainers:
+                    is_warm_started = trainer.name == previous_run.get("model")
+                    if is_warm_started:
+                        trainer.warm_start_params = previous_run["params"]
                     trained_models.append(trainer)
-                    trainer.train(train_dataset)
+                    costs[trainer.name] = measure_training(trainer, train_dataset)
+                    if trainer.logs:
+                        self.layer_backend.log(trainer.logs)
                     if trainer.compare_score(best_score):
                         best_model = trainer
                         best_score = trainer.score
 
                     # Update models scoreboard after training
-                    log_models(trained_models)
+                    log_models(trained_models, costs)
+
+                    # the data barely changed if the previous winner scores about the same, the others are skipped
+                    if (
+                        is_warm_started
+                        and best_model is trainer
+                        and trainer.score >= baseline_score - WARM_START_SCORE_TOLERANCE
+                    ):
+                        self.layer_backend.log({"warm start": f"kept {trainer.name} of the previous run"})
+                        kept_warm_start = True
+                        break
+            finally:
+                train_dataset.close()
 
             if best_model is None:
                 raise Exception("AutoML failed! Check your model type!")
 
+            if self.runs:
+                self.runs.put(
+                    warm_start_key,
+                    {
+                        "model": best_model.name,
+                        "params": best_model.params,
+                        "score": float(best_score),
+                        "baseline_score": baseline_score if kept_warm_start else float(best_score),
+                        "candidates": self._record_candidates(
+                            candidate_history, trained_models, costs, skipped_models, float(best_score)
+                        ),
+                    },
+                )
+
             trained_model = best_model.model
 
-            layer.log({"best model": best_model.name})
-            layer.log({"best score": best_score})
+            self.layer_backend.log({"best model": best_model.name})
+            self.layer_backend.log({"best score": best_score})
 
             if best_model.feature_importances is not None:
                 import matplotlib as plt  # type: ignore
@@ -83,8 +379,51 @@ class AutoML:
                     best_model.feature_importances, index=self.features, columns=["Importance"]
                 )
                 feat_importances.sort_values(by="Importance", ascending=False, inplace=True)
-                layer.log({"feature importances": feat_importances.plot(kind="bar", figsize=(12, 7))})
+                self.layer_backend.log({"feature importances": feat_importances.plot(kind="bar", figsize=(12, 7))})
 
             return trained_model
 
-        model_decorator(model_name)(training_func)()  # pylint: disable=no-value-for-parameter
+        self.layer_backend.model(model_name)(training_func)()
+
+    def _prune(self, trainers: List[AutoMLModel], candidate_history: Dict[str, Any]) -> List[str]:
+        """
+        The names of the candidates the pruning policy skips given their history, none if it would skip them all
+        """
+        if self.pruning is None:
+            return []
+        pruning = self.pruning
+        skipped_models = [
+            trainer.name for trainer in trainers if pruning.should_skip(candidate_history.get(trainer.name, {}))
+        ]
+        return skipped_models if len(skipped_models) < len(trainers) else []
+
+    @staticmethod
+    def _record_candidates(
+        candidate_history: Dict[str, Any],
+        trained_models: List[AutoMLModel],
+        costs: Dict[str, CandidateCost],
+        skipped_models: List[str],
+        best_score: float,
+    ) -> Dict[str, Any]:
+        """
+        The history of the candidates with this run, the last runs of the trained ones and the skipped count of the
+        others
+        """
+        run_fit_seconds = sum(cost.fit_seconds for cost in costs.values())
+        candidates = {name: dict(history) for name, history in candidate_history.items()}
+        for trainer in trained_models:
+            cost = costs[trainer.name]
+            run = {
+                "score": float(trainer.score),
+                "best_score": best_score,
+                "fit_seconds": cost.fit_seconds,
+                "run_fit_seconds": run_fit_seconds,
+                "predict_seconds": cost.predict_seconds,
+                "peak_memory_bytes": cost.peak_memory_bytes,
+                "model_bytes": cost.model_bytes,
+            }
+            runs = candidates.get(trainer.name, {}).get("runs", []) + [run]
+            candidates[trainer.name] = {"runs": runs[-CANDIDATE_HISTORY_RUNS:], "skipped_runs": 0}
+        for name in skipped_models:
+            candidates[name]["skipped_runs"] = candidates[name].get("skipped_runs", 0) + 1
+        return candidates
@@ -1,10 +1,23 @@
+import itertools
+import shutil
+import tempfile
+import time
 from abc import abstractmethod
-from typing import List
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
 
+import numpy as np
+import numpy.typing as npt
 import pandas as pd  # type: ignore
 from sklearn.model_selection import train_test_split  # type: ignore
 
 
+# training data with this many rows is large, exact split trees are too slow for it and histogram based ones are used
+LARGE_DATA_ROWS = 1_000_000
+# training data from this size is memory mapped, joblib pickles smaller data to its workers
+MEMMAP_MIN_BYTES = 1024 * 1024
+
+
 class TrainDataset:
     def __init__(self, df: pd.DataFrame, features: List[str], target: str):
         self.df = df
@@ -18,18 +31,85 @@ class TrainDataset:
         self.x_test, self.x_val, self.y_test, self.y_val = train_test_split(
             self.x_test, self.y_test, test_size=0.5, random_state=42
         )
+        self._memmap_path: Optional[Path] = None
+        self.x_train, self.y_train = self._memmap(self.x_train, self.y_train)
+
+    def __enter__(self) -> "TrainDataset":
+        return self
+
+    def __exit__(self, *args: Any) -> None:
+        self.close()
+
+    def close(self) -> None:
+        if self._memmap_path is not None:
+            shutil.rmtree(self._memmap_path, ignore_errors=True)
+            self._memmap_path = None
+
+    def _memmap(self, x: pd.DataFrame, y: pd.Series) -> Tuple[pd.DataFrame, pd.Series]:
+        """
+        Moves numeric training data to memory mapped files. The workers of parallel searches map the same files then,
+        instead of getting copies of the data pickled or dumped for each search.
+        """
+        # categories and other extension types are kept in memory
+        if (
+            x.shape[1] == 0
+            or not all(isinstance(dtype, np.dtype) and dtype.kind in "biuf" for dtype in [*x.dtypes, y.dtype])
+            or x.memory_usage(index=False).sum() < MEMMAP_MIN_BYTES
+        ):
+            return x, y
+
+        memmap_path = self._memmap_path = Path(tempfile.mkdtemp(prefix="layer-automl-"))
+        # one file per block of consecutive columns of a dtype, so the dtypes and the order of the columns are kept
+        blocks: List[pd.DataFrame] = []
+        start = 0
+        for _, block_dtypes in itertools.groupby(x.dtypes):
+            end = start + len(list(block_dtypes))
+            columns = [x.iloc[:, ix] for ix in range(start, end)]
+            values = self._memmap_columns(memmap_path / f"x{len(blocks)}", columns)
+            blocks.append(pd.DataFrame(values, index=x.index, columns=x.columns[start:end]))
+            start = end
+        return (
+            pd.concat(blocks, axis=1, copy=False),
+            pd.Series(self._memmap_columns(memmap_path / "y", [y])[:, 0], index=y.index, name=y.name),
+        )
+
+    @staticmethod
+    def _memmap_columns(path: Path, columns: List[pd.Series]) -> npt.NDArray[Any]:
+        """
+        Writes columns of one dtype to a memory mapped file, mapped read only from there on like joblib maps the data
+        it shares
+        """
+        dtype, shape = columns[0].dtype, (len(columns[0]), len(columns))
+        values = np.memmap(path, dtype=dtype, mode="w+", shape=shape)
+        for ix, column in enumerate(columns):
+            values[:, ix] = column.to_numpy()
+        values.flush()
+        return np.memmap(path, dtype=dtype, mode="r", shape=shape)
 
 
 class AutoMLModel:
     # model types
     CLASSIFIER = "classifier"
     REGRESSOR = "regressor"
+    # training data sizes
+    SMALL_DATA = "small"
+    LARGE_DATA = "large"
+
+    # the training data size the model is a candidate for, any size if unset
+    data_size: Optional[str] = None
 
     def __init__(self) -> None:
-        self.model = None
+        self.model: Any = None
         self.score = 0
         self.feature_importances = None
         self.explainer = None
+        # data to log to Layer once the model is trained
+        self.logs: Dict[str, Any] = {}
+        # hyperparameters the model was trained with, and the ones of a previous run to search around first
+        self.params: Dict[str, Any] = {}
+        self.warm_start_params: Optional[Dict[str, Any]] = None
+        # seconds the trained model took to predict the test split, unset if the model didn't time it
+        self.predict_seconds: Optional[float] = None
 
     @property
     @abstractmethod
@@ -47,6 +127,17 @@ class AutoMLModel:
         :return: Model type
         """
 
+    @classmethod
+    def is_candidate(cls, row_count: int) -> bool:
+        """
+        Whether the model is trained for training data with the given number of rows
+        :param row_count: Number of rows of the training data
+        :return: True/False if it is trained or not
+        """
+        if cls.data_size is None:
+            return True
+        return cls.data_size == (cls.LARGE_DATA if row_count >= LARGE_DATA_ROWS else cls.SMALL_DATA)
+
     @abstractmethod
     def train(self, dataset: TrainDataset) -> None:
         """
@@ -56,6 +147,19 @@ class AutoMLModel:
         :return: None
         """
 
+    def predict_test(self, model: Any, dataset: TrainDataset) -> Any:
+        """
+        Predicts the test split with the trained model, timing the prediction for the cost of the model
+
+        :param model: Trained model
+        :param dataset: Dataset the model was trained with
+        :return: Predictions for the test split
+        """
+        start = time.perf_counter()
+        predictions = model.predict(dataset.x_test)
+        self.predict_seconds = time.perf_counter() - start
+        return predictions
+
     def compare_score(self, score: float) -> bool:
         """
         Compares the model score to define the best model
@@ -0,0 +1,61 @@
+import importlib.util
+
+from sklearn.metrics import accuracy_score, r2_score  # type: ignore
+
+from .base_model import AutoMLModel, TrainDataset
+
+
+class LightGBMClassifier(AutoMLModel):
+    name = "LightGBM Classifier"
+    model_type = AutoMLModel.CLASSIFIER
+    data_size = AutoMLModel.LARGE_DATA
+
+    def __init__(self) -> None:
+        super().__init__()
+
+    @classmethod
+    def is_candidate(cls, row_count: int) -> bool:
+        # lightgbm is optional
+        return importlib.util.find_spec("lightgbm") is not None and super().is_candidate(row_count)
+
+    def train(self, ds: TrainDataset) -> None:
+        lightgbm = importlib.import_module("lightgbm")
+        model = lightgbm.LGBMClassifier(random_state=42)
+        model.fit(ds.x_train, ds.y_train)
+        predictions = self.predict_test(model, ds)
+        model_accuracy = accuracy_score(ds.y_test, predictions)
+
+        self.score = model_accuracy
+        self.model = model
+        self.feature_importances = model.feature_importances_
+
+    def compare_score(self, score: float) -> bool:
+        return self.score > score
+
+
+class LightGBMRegressor(AutoMLModel):
+    name = "LightGBM Regressor"
+    model_type = AutoMLModel.REGRESSOR
+    data_size = AutoMLModel.LARGE_DATA
+
+    def __init__(self) -> None:
+        super().__init__()
+
+    @classmethod
+    def is_candidate(cls, row_count: int) -> bool:
+        # lightgbm is optional
+        return importlib.util.find_spec("lightgbm") is not None and super().is_candidate(row_count)
+
+    def train(self, ds: TrainDataset) -> None:
+        lightgbm = importlib.import_module("lightgbm")
+        model = lightgbm.LGBMRegressor(random_state=42)
+        model.fit(ds.x_train, ds.y_train)
+        y_pred = self.predict_test(model, ds)
+        model_accuracy = r2_score(ds.y_test, y_pred)
+
+        self.score = model_accuracy
+        self.model = model
+        self.feature_importances = model.feature_importances_
+
+    def compare_score(self, score: float) -> bool:
+        return self.score > score
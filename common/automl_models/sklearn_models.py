@@ -1,4 +1,9 @@
-from sklearn.ensemble import AdaBoostClassifier, RandomForestClassifier  # type: ignore
+from sklearn.ensemble import (  # type: ignore
+    AdaBoostClassifier,
+    HistGradientBoostingClassifier,
+    HistGradientBoostingRegressor,
+    RandomForestClassifier,
+)
 from sklearn.linear_model import LinearRegression, RidgeClassifier  # type: ignore
 from sklearn.metrics import accuracy_score, r2_score  # type: ignore
 from sklearn.tree import DecisionTreeClassifier, DecisionTreeRegressor  # type: ignore
@@ -17,7 +22,7 @@ class ScikitLearnLinearRegression(AutoMLModel):
     def train(self, ds: TrainDataset) -> None:
         model = LinearRegression(normalize=True, fit_intercept=False, copy_X=True)
         model.fit(ds.x_train, ds.y_train)
-        y_pred = model.predict(ds.x_test)
+        y_pred = self.predict_test(model, ds)
         model_accuracy = r2_score(ds.y_test, y_pred)
 
         self.score = model_accuracy
@@ -31,6 +36,7 @@ class ScikitLearnDecisionTreeRegressor(AutoMLModel):
 
     name = "Scikit-Learn DecisionTreeRegressor"
     model_type = AutoMLModel.REGRESSOR
+    data_size = AutoMLModel.SMALL_DATA
 
     def __init__(self) -> None:
         super().__init__()
@@ -38,7 +44,7 @@ class ScikitLearnDecisionTreeRegressor(AutoMLModel):
     def train(self, ds: TrainDataset) -> None:
         model = DecisionTreeRegressor(max_depth=7)
         model.fit(ds.x_train, ds.y_train)
-        y_pred = model.predict(ds.x_test)
+        y_pred = self.predict_test(model, ds)
         model_accuracy = r2_score(ds.y_test, y_pred)
 
         self.score = model_accuracy
@@ -52,6 +58,7 @@ class ScikitLearnDecisionTreeRegressor(AutoMLModel):
 class ScikitLearnRandomForestClassifier(AutoMLModel):
     name = "Scikit-Learn RandomForestClassifier"
     model_type = AutoMLModel.CLASSIFIER
+    data_size = AutoMLModel.SMALL_DATA
 
     def __init__(self) -> None:
         super().__init__()
@@ -59,7 +66,7 @@ class ScikitLearnRandomForestClassifier(AutoMLModel):
     def train(self, ds: TrainDataset) -> None:
         model = RandomForestClassifier()
         model.fit(ds.x_train, ds.y_train)
-        predictions = model.predict(ds.x_test)
+        predictions = self.predict_test(model, ds)
         model_accuracy = accuracy_score(ds.y_test, predictions)
 
         self.score = model_accuracy
@@ -80,7 +87,7 @@ class ScikitLearnRidgeClassifier(AutoMLModel):
     def train(self, ds: TrainDataset) -> None:
         model = RidgeClassifier()
         model.fit(ds.x_train, ds.y_train)
-        predictions = model.predict(ds.x_test)
+        predictions = self.predict_test(model, ds)
         model_accuracy = accuracy_score(ds.y_test, predictions)
 
         self.score = model_accuracy
@@ -93,6 +100,7 @@ class ScikitLearnRidgeClassifier(AutoMLModel):
 class ScikitLearnDecisionTreeClassifier(AutoMLModel):
     name = "Scikit-Learn DecisionTreeClassifier"
     model_type = AutoMLModel.CLASSIFIER
+    data_size = AutoMLModel.SMALL_DATA
 
     def __init__(self) -> None:
         super().__init__()
@@ -100,7 +108,7 @@ class ScikitLearnDecisionTreeClassifier(AutoMLModel):
     def train(self, ds: TrainDataset) -> None:
         model = DecisionTreeClassifier(max_depth=5)
         model.fit(ds.x_train, ds.y_train)
-        predictions = model.predict(ds.x_test)
+        predictions = self.predict_test(model, ds)
         model_accuracy = accuracy_score(ds.y_test, predictions)
 
         self.score = model_accuracy
@@ -114,6 +122,7 @@ class ScikitLearnDecisionTreeClassifier(AutoMLModel):
 class ScikitLearnAdaBoostClassifier(AutoMLModel):
     name = "Scikit-Learn AdaBoostClassifier"
     model_type = AutoMLModel.CLASSIFIER
+    data_size = AutoMLModel.SMALL_DATA
 
     def __init__(self) -> None:
         super().__init__()
@@ -121,7 +130,7 @@ class ScikitLearnAdaBoostClassifier(AutoMLModel):
     def train(self, ds: TrainDataset) -> None:
         model = AdaBoostClassifier()
         model.fit(ds.x_train, ds.y_train)
-        predictions = model.predict(ds.x_test)
+        predictions = self.predict_test(model, ds)
         model_accuracy = accuracy_score(ds.y_test, predictions)
 
         self.score = model_accuracy
@@ -130,3 +139,45 @@ class ScikitLearnAdaBoostClassifier(AutoMLModel):
 
     def compare_score(self, score: float) -> bool:
         return self.score > score
+
+
+class ScikitLearnHistGradientBoostingClassifier(AutoMLModel):
+    name = "Scikit-Learn HistGradientBoostingClassifier"
+    model_type = AutoMLModel.CLASSIFIER
+    data_size = AutoMLModel.LARGE_DATA
+
+    def __init__(self) -> None:
+        super().__init__()
+
+    def train(self, ds: TrainDataset) -> None:
+        model = HistGradientBoostingClassifier(random_state=42)
+        model.fit(ds.x_train, ds.y_train)
+        predictions = self.predict_test(model, ds)
+        model_accuracy = accuracy_score(ds.y_test, predictions)
+
+        self.score = model_accuracy
+        self.model = model
+
+    def compare_score(self, score: float) -> bool:
+        return self.score > score
+
+
+class ScikitLearnHistGradientBoostingRegressor(AutoMLModel):
+    name = "Scikit-Learn HistGradientBoostingRegressor"
+    model_type = AutoMLModel.REGRESSOR
+    data_size = AutoMLModel.LARGE_DATA
+
+    def __init__(self) -> None:
+        super().__init__()
+
+    def train(self, ds: TrainDataset) -> None:
+        model = HistGradientBoostingRegressor(random_state=42)
+        model.fit(ds.x_train, ds.y_train)
+        y_pred = self.predict_test(model, ds)
+        model_accuracy = r2_score(ds.y_test, y_pred)
+
+        self.score = model_accuracy
+        self.model = model
+
+    def compare_score(self, score: float) -> bool:
+        return self.score > score
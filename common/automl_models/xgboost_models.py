@@ -1,36 +1,68 @@
+from typing import Any, Dict, List, Optional, Union
+
 from sklearn.metrics import accuracy_score, r2_score  # type: ignore
 from sklearn.model_selection import GridSearchCV  # type: ignore
 from xgboost import XGBClassifier, XGBRegressor
 
-import layer
-
 from .base_model import AutoMLModel, TrainDataset
 
 
+HYPERPARAMETER_GRID: Dict[str, List[Any]] = {
+    "max_depth": [2, 6, 10],
+    "n_estimators": [60, 200],
+    "learning_rate": [0.1, 0.01],
+}
+
+
+def search_grid(
+    hyperparameter_grid: Dict[str, List[Any]], warm_start_params: Optional[Dict[str, Any]]
+) -> Union[Dict[str, List[Any]], List[Dict[str, List[Any]]]]:
+    """
+    The grid to search, the full one or around the parameters of a previous run: those parameters, and each one of
+    them changed to its neighbouring values in the full grid with the others kept
+    """
+    if not warm_start_params or set(warm_start_params) != set(hyperparameter_grid):
+        return hyperparameter_grid
+    warm_start_grid = {name: [value] for name, value in warm_start_params.items()}
+    grids = [warm_start_grid]
+    for name, values in hyperparameter_grid.items():
+        if warm_start_params[name] not in values:
+            return hyperparameter_grid
+        ix = values.index(warm_start_params[name])
+        neighbour_values = [
+            values[neighbour_ix] for neighbour_ix in (ix - 1, ix + 1) if 0 <= neighbour_ix < len(values)
+        ]
+        if neighbour_values:
+            grids.append({**warm_start_grid, name: neighbour_values})
+    return grids
+
+
 class XGBoostClassifier(AutoMLModel):
     name = "XGBoost Classifier"
     model_type = AutoMLModel.CLASSIFIER
+    data_size = AutoMLModel.SMALL_DATA
+    # xgboost picks the tree method if unset
+    tree_method: Optional[str] = None
 
     def __init__(self) -> None:
         super().__init__()
 
     def train(self, ds: TrainDataset) -> None:
-        hyperparameter_grid = {
-            "max_depth": [2, 6, 10],
-            "n_estimators": [60, 200],
-            "learning_rate": [0.1, 0.01],
-        }
+        hyperparameter_grid = search_grid(HYPERPARAMETER_GRID, self.warm_start_params)
 
-        layer.log({"xgboost hyperparameter grid": hyperparameter_grid})
+        self.logs["xgboost hyperparameter grid"] = hyperparameter_grid
 
-        estimator = XGBClassifier(seed=42, eval_metric="mlogloss", use_label_encoder=False)
+        estimator = XGBClassifier(
+            seed=42, eval_metric="mlogloss", use_label_encoder=False, tree_method=self.tree_method
+        )
         self.model: GridSearchCV = GridSearchCV(
             estimator=estimator, param_grid=hyperparameter_grid, scoring="accuracy", cv=2, n_jobs=-1, verbose=False
         )
         self.model.fit(ds.x_train, ds.y_train)
 
-        layer.log({"xgboost best parameters": self.model.best_params_})
-        preds = self.model.predict(ds.x_test)
+        self.params = self.model.best_params_
+        self.logs["xgboost best parameters"] = self.model.best_params_
+        preds = self.predict_test(self.model, ds)
         self.score = accuracy_score(ds.y_test, preds)
         self.feature_importances = self.model.best_estimator_.feature_importances_
 
@@ -41,29 +73,41 @@ class XGBoostClassifier(AutoMLModel):
 class XGBoostRegressor(AutoMLModel):
     name = "XGBoost XGBRegressor"
     model_type = AutoMLModel.REGRESSOR
+    data_size = AutoMLModel.SMALL_DATA
+    # xgboost picks the tree method if unset
+    tree_method: Optional[str] = None
 
     def __init__(self) -> None:
         super().__init__()
 
     def train(self, ds: TrainDataset) -> None:
-        hyperparameter_grid = {
-            "max_depth": [2, 6, 10],
-            "n_estimators": [60, 200],
-            "learning_rate": [0.1, 0.01],
-        }
+        hyperparameter_grid = search_grid(HYPERPARAMETER_GRID, self.warm_start_params)
 
-        layer.log({"xgboost hyperparameter grid": hyperparameter_grid})
+        self.logs["xgboost hyperparameter grid"] = hyperparameter_grid
 
-        estimator = XGBRegressor(n_estimators=1000, objective="reg:squarederror")
+        estimator = XGBRegressor(n_estimators=1000, objective="reg:squarederror", tree_method=self.tree_method)
         self.model: GridSearchCV = GridSearchCV(
             estimator=estimator, param_grid=hyperparameter_grid, cv=2, n_jobs=-1, verbose=False
         )
         self.model.fit(ds.x_train, ds.y_train)
 
-        layer.log({"xgboost best parameters": self.model.best_params_})
-        preds = self.model.predict(ds.x_test)
+        self.params = self.model.best_params_
+        self.logs["xgboost best parameters"] = self.model.best_params_
+        preds = self.predict_test(self.model, ds)
         self.score = r2_score(ds.y_test, preds)
         self.feature_importances = self.model.best_estimator_.feature_importances_
 
     def compare_score(self, score: float) -> bool:
         return self.score > score
+
+
+class XGBoostHistClassifier(XGBoostClassifier):
+    name = "XGBoost Hist Classifier"
+    data_size = AutoMLModel.LARGE_DATA
+    tree_method = "hist"
+
+
+class XGBoostHistRegressor(XGBoostRegressor):
+    name = "XGBoost Hist XGBRegressor"
+    data_size = AutoMLModel.LARGE_DATA
+    tree_method = "hist"
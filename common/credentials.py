@@ -9,3 +9,24 @@ class LayerCredentials:
     layer_configfile_json: Optional[Dict[str, Any]] = None
     layer_project: Optional[str] = None
     layer_api_key: Optional[str] = None
+    # Layer backend, either "layer" (default) or "local" to use a filesystem model registry
+    layer_backend: Optional[str] = None
+    layer_local_registry: Optional[str] = None
+    # fetched data over this many megabytes is spilled to arrow files in the spill path, the temp directory if unset
+    layer_memory_budget_mb: Optional[int] = None
+    layer_spill_path: Optional[str] = None
+    # Layer statements running at once are admitted while their estimated memory fits in this many megabytes
+    layer_concurrent_memory_budget_mb: Optional[int] = None
+    # profile every Layer statement to the layer_profiles directory of the target path
+    layer_profile: Optional[bool] = None
+    # fetches estimated to scan over this many megabytes fail, or spill with the scan_budget_exceeded meta
+    layer_scan_budget_mb: Optional[int] = None
+    # source tables fetched by Layer statements are kept in this many megabytes for the next statements reading them
+    layer_source_cache_mb: Optional[int] = None
+    # predict with the models kept loaded by the serving daemon listening on this unix socket, if it is running
+    layer_serving_socket: Optional[str] = None
+    # the winning AutoML models are kept in this json file, the next runs start from them
+    layer_automl_warm_start_path: Optional[str] = None
+    # AutoML skips the candidate models losing by far at a high cost, with these AutoMLPruning fields. Their history is
+    # kept in the warm start file, or in the target path without one.
+    layer_automl_pruning: Optional[Dict[str, Any]] = None
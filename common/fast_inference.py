@@ -0,0 +1,137 @@
+import importlib
+import importlib.util
+import os
+import tempfile
+from pathlib import Path
+from typing import Any, Optional
+
+import numpy as np
+import numpy.typing as npt
+import pandas as pd  # type: ignore
+
+
+ONNX_TARGET_OPSET = 15
+# rows of the first input predicted by both the model and its compilation, which must agree before it is used
+EQUIVALENCE_CHECK_ROWS = 1000
+# the compilation predicts in float precision
+EQUIVALENCE_RTOL = 1e-5
+EQUIVALENCE_ATOL = 1e-6
+
+
+def is_available() -> bool:
+    # onnx runtime and the converter are optional
+    return all(importlib.util.find_spec(name) is not None for name in ("onnxruntime", "skl2onnx"))
+
+
+def compile_model(trained_model: Any, n_features: int) -> Optional[bytes]:
+    """
+    Converts the given trained scikit-learn model to a serialized ONNX model taking the given number of float
+    features. Returns None if ONNX Runtime isn't installed or the model can't be converted.
+    """
+    if not is_available():
+        return None
+    # grid searches predict with their best estimator
+    model = getattr(trained_model, "best_estimator_", trained_model)
+    if type(model).__module__.split(".")[0] != "sklearn":
+        return None
+    if getattr(model, "n_features_in_", n_features) != n_features:
+        return None
+    skl2onnx = importlib.import_module("skl2onnx")
+    data_types = importlib.import_module("skl2onnx.common.data_types")
+    # classifiers output their probabilities as a tensor instead of a list of dicts
+    options = {id(model): {"zipmap": False}} if hasattr(model, "classes_") else None
+    try:
+        onnx_model = skl2onnx.convert_sklearn(
+            model,
+            initial_types=[("input", data_types.FloatTensorType([None, n_features]))],
+            options=options,
+            target_opset=ONNX_TARGET_OPSET,
+        )
+    except Exception:  # pylint: disable=broad-except
+        return None
+    return onnx_model.SerializeToString()
+
+
+def compile_model_cached(trained_model: Any, n_features: int, cache_path: Path) -> Optional[bytes]:
+    """
+    Compiles the given trained model once, to the given path of the model version
+    """
+    # a compilation cached by an environment with ONNX Runtime can't be run without it
+    if not is_available():
+        return None
+    if cache_path.exists():
+        return cache_path.read_bytes()
+    onnx_model = compile_model(trained_model, n_features)
+    if onnx_model is not None:
+        cache_path.parent.mkdir(parents=True, exist_ok=True)
+        # statements of other threads may compile the same model at once
+        with tempfile.NamedTemporaryFile(dir=cache_path.parent, suffix=".tmp", delete=False) as f:
+            f.write(onnx_model)
+        os.replace(f.name, cache_path)
+    return onnx_model
+
+
+class FastInferenceModel:
+    """
+    A fetched model predicting with its compilation to ONNX Runtime. Before its first prediction, the compilation
+    predicts the first rows next to the model, and the model predicts everything if they don't agree. Inputs which
+    aren't all numbers, or have missing values, are predicted by the model too.
+    """
+
+    def __init__(self, model: Any, onnx_model: bytes) -> None:
+        onnxruntime = importlib.import_module("onnxruntime")
+
+        self.model = model
+        self._session: Any = onnxruntime.InferenceSession(onnx_model, providers=["CPUExecutionProvider"])
+        self._n_features = self._session.get_inputs()[0].shape[1]
+        # the predictions of the model the compilation agreed with, without rows, to take their columns and types
+        self._expected_like: Optional[pd.DataFrame] = None
+
+    @property
+    def compiled(self) -> bool:
+        """
+        Whether the compilation predicts, false once it disagreed with the model
+        """
+        return self._session is not None
+
+    def get_train(self) -> Any:
+        return self.model.get_train()
+
+    def predict(self, input_df: pd.DataFrame) -> pd.DataFrame:
+        features = self._to_features(input_df)
+        if features is None:
+            return self.model.predict(input_df)
+        if self._expected_like is None:
+            expected = self.model.predict(input_df.iloc[:EQUIVALENCE_CHECK_ROWS])
+            if not self._agrees(self._run(features[:EQUIVALENCE_CHECK_ROWS]), expected):
+                self._session = None
+                return self.model.predict(input_df)
+            self._expected_like = expected.iloc[:0]
+        predictions = self._run(features)
+        return pd.DataFrame(predictions, columns=self._expected_like.columns).astype(
+            self._expected_like.dtypes.to_dict()
+        )
+
+    def _to_features(self, input_df: pd.DataFrame) -> Optional[npt.NDArray[np.float32]]:
+        if self._session is None or len(input_df.columns) != self._n_features:
+            return None
+        try:
+            features = input_df.to_numpy(dtype=np.float32)
+        except (TypeError, ValueError):
+            return None
+        if np.isnan(features).any():
+            return None
+        return features
+
+    def _run(self, features: npt.NDArray[np.float32]) -> npt.NDArray[Any]:
+        # classifiers output their labels first, then their probabilities
+        return self._session.run(None, {"input": features})[0].reshape(len(features), -1)
+
+    @staticmethod
+    def _agrees(predictions: npt.NDArray[Any], expected: pd.DataFrame) -> bool:
+        expected_values = expected.to_numpy()
+        if predictions.shape != expected_values.shape:
+            return False
+        if expected_values.dtype.kind == "f":
+            return np.allclose(predictions, expected_values, rtol=EQUIVALENCE_RTOL, atol=EQUIVALENCE_ATOL)
+        return bool((predictions == expected_values).all())
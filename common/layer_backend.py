@@ -0,0 +1,167 @@
+from __future__ import annotations
+
+import json
+import re
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Callable, Dict, List, Optional, Tuple
+
+
+if TYPE_CHECKING:
+    import pandas as pd  # type: ignore
+
+
+# the registry of the local backend if the profile sets none
+DEFAULT_LOCAL_REGISTRY = "~/.layer/local_registry"
+
+
+class LayerBackend:
+    """
+    The subset of the Layer sdk used by the adapter, backed by Layer itself
+    """
+
+    def login_with_api_key(self, api_key: str) -> None:
+        import layer
+
+        layer.login_with_api_key(api_key)
+
+    def init(self, project_name: str) -> None:
+        import layer
+
+        layer.init(project_name)
+
+    def get_model(self, name: str) -> Any:
+        import layer
+
+        return layer.get_model(name)
+
+    def model(self, name: str) -> Callable[[Callable[..., Any]], Callable[..., Any]]:
+        from layer.decorators import model as model_decorator
+
+        return model_decorator(name)
+
+    def log(self, data: Dict[str, Any]) -> None:
+        import layer
+
+        layer.log(data)
+
+
+class LocalLayerModel:
+    """
+    A model fetched from the local model registry
+    """
+
+    def __init__(self, name: str, version: str, path: Path) -> None:
+        self.name = name
+        self.version = version
+        self.path = path
+        self._model_lazy: Any = None
+
+    def get_train(self) -> Any:
+        if self._model_lazy is None:
+            import cloudpickle  # type: ignore
+
+            with open(self.path / LocalLayerBackend.MODEL_FILE_NAME, "rb") as f:
+                self._model_lazy = cloudpickle.load(f)
+        return self._model_lazy
+
+    def predict(self, input_df: pd.DataFrame) -> pd.DataFrame:
+        import pandas as pd
+
+        predictions = self.get_train().predict(input_df)
+        if isinstance(predictions, pd.DataFrame):
+            return predictions
+        return pd.DataFrame(predictions)
+
+
+class LocalLayerBackend(LayerBackend):
+    """
+    A stand-in for Layer which keeps models and logs in a local filesystem registry
+
+    Models are stored as `<registry>/<project>/models/<model>/<version>/model.pkl`, versions are
+    increasing integers. It needs no account or network, so full pipelines can run on a single machine.
+    """
+
+    MODEL_FILE_NAME = "model.pkl"
+    LOGS_FILE_NAME = "logs.json"
+
+    def __init__(self, registry_path: Path) -> None:
+        self.registry_path = registry_path
+        self.project_name: Optional[str] = None
+        self._run_logs: Optional[Dict[str, Any]] = None
+
+    def login_with_api_key(self, api_key: str) -> None:
+        pass
+
+    def init(self, project_name: str) -> None:
+        self.project_name = project_name
+
+    def get_model(self, name: str) -> LocalLayerModel:
+        project_name, model_name, version = self._parse_model_name(name)
+        model_path = self.registry_path / project_name / "models" / model_name
+        versions = self._list_versions(model_path)
+        if not versions:
+            raise Exception(f"Model '{name}' not found in the local registry at {self.registry_path}")
+        if version is None:
+            version = versions[-1]
+        elif version not in versions:
+            raise Exception(f"Model '{name}' has no version {version}, available versions are {versions}")
+        return LocalLayerModel(model_name, version, model_path / version)
+
+    def model(self, name: str) -> Callable[[Callable[..., Any]], Callable[..., Any]]:
+        def decorator(func: Callable[..., Any]) -> Callable[..., Any]:
+            def wrapper(*args: Any, **kwargs: Any) -> Any:
+                self._run_logs = {}
+                try:
+                    trained_model = func(*args, **kwargs)
+                    self._save_model(name, trained_model, self._run_logs)
+                finally:
+                    self._run_logs = None
+                return trained_model
+
+            return wrapper
+
+        return decorator
+
+    def log(self, data: Dict[str, Any]) -> None:
+        if self._run_logs is not None:
+            self._run_logs.update({key: _to_loggable(value) for key, value in data.items()})
+
+    def _save_model(self, name: str, trained_model: Any, logs: Dict[str, Any]) -> None:
+        import cloudpickle
+
+        if self.project_name is None:
+            raise Exception("Layer project is not initialised, please call init first")
+        model_path = self.registry_path / self.project_name / "models" / name
+        versions = self._list_versions(model_path)
+        version_path = model_path / str(int(versions[-1]) + 1 if versions else 1)
+        version_path.mkdir(parents=True)
+        with open(version_path / self.MODEL_FILE_NAME, "wb") as f:
+            cloudpickle.dump(trained_model, f)
+        with open(version_path / self.LOGS_FILE_NAME, "w") as f:
+            json.dump(logs, f, indent=2, default=str)
+
+    def _parse_model_name(self, name: str) -> Tuple[str, str, Optional[str]]:
+        """
+        Accepts the same model paths as Layer: `model`, `project/models/model` and
+        `owner/project/models/model`, with an optional `:version` suffix
+        """
+        match = re.fullmatch(r"(?:(?:[^/]+/)?([^/]+)/models/)?([^/:]+)(?::([^/]+))?", name)
+        if not match:
+            raise Exception(f"Invalid model name '{name}'")
+        project_name, model_name, version = match.groups()
+        project_name = project_name or self.project_name
+        if project_name is None:
+            raise Exception(f"Model '{name}' has no project, please call init first or use the full model path")
+        return project_name, model_name, version
+
+    @staticmethod
+    def _list_versions(model_path: Path) -> List[str]:
+        if not model_path.is_dir():
+            return []
+        return sorted((path.name for path in model_path.iterdir() if path.name.isdigit()), key=int)
+
+
+def _to_loggable(value: Any) -> Any:
+    if isinstance(value, (str, int, float, bool, dict, list)) or value is None:
+        return value
+    return repr(value)
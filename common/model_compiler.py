@@ -0,0 +1,267 @@
+import json
+import math
+import operator
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+
+# larger expressions are slow to compile in the warehouse, BigQuery rejects queries over 1MB
+MAX_EXPRESSION_LENGTH = 500_000
+MAX_TREE_DEPTH = 64
+
+ModelCompiler = Callable[[Any, List[str]], str]
+
+
+def compile_model(model: Any, feature_columns: List[str]) -> Optional[str]:
+    """
+    Translates the prediction of the given trained model to a sql expression of the given feature columns,
+    in the order the model was trained with. Returns None if the model can't be translated.
+
+    Trees compare the features as doubles, scikit-learn and XGBoost compare them as floats, so values within
+    float precision of a split may take another branch. Missing values take the branch XGBoost would take, and
+    the right branch of scikit-learn trees, which don't accept them.
+    """
+    # grid searches predict with their best estimator
+    model = getattr(model, "best_estimator_", model)
+    compiler = _get_compilers().get(type(model).__name__)
+    if compiler is None or type(model).__module__.split(".")[0] not in ("sklearn", "xgboost"):
+        return None
+    if getattr(model, "n_features_in_", len(feature_columns)) != len(feature_columns):
+        return None
+    try:
+        expression = compiler(model, feature_columns)
+    except (ValueError, RecursionError):
+        return None
+    if len(expression) > MAX_EXPRESSION_LENGTH:
+        return None
+    return expression
+
+
+def _get_compilers() -> Dict[str, ModelCompiler]:
+    return {
+        "DecisionTreeClassifier": _compile_decision_tree_classifier,
+        "DecisionTreeRegressor": _compile_decision_tree_regressor,
+        "RandomForestClassifier": _compile_random_forest_classifier,
+        "AdaBoostClassifier": _compile_ada_boost_classifier,
+        "LinearRegression": _compile_linear_regression,
+        "RidgeClassifier": _compile_ridge_classifier,
+        "XGBClassifier": _compile_xgboost_classifier,
+        "XGBRegressor": _compile_xgboost_regressor,
+    }
+
+
+def _compile_decision_tree_classifier(model: Any, feature_columns: List[str]) -> str:
+    _check_single_output(model)
+    labels = [_literal(label) for label in model.classes_]
+    return _sklearn_tree(model.tree_, feature_columns, lambda tree, node: labels[tree.value[node][0].argmax()])
+
+
+def _compile_decision_tree_regressor(model: Any, feature_columns: List[str]) -> str:
+    _check_single_output(model)
+    return _sklearn_tree(model.tree_, feature_columns, lambda tree, node: _literal(tree.value[node][0][0]))
+
+
+def _compile_random_forest_classifier(model: Any, feature_columns: List[str]) -> str:
+    """
+    The forest predicts the class with the highest probability, summed over its trees
+    """
+    _check_single_output(model)
+    trees = [estimator.tree_ for estimator in model.estimators_]
+
+    def leaf_scores(tree_ix: int, node: int) -> Sequence[float]:
+        counts = trees[tree_ix].value[node][0]
+        return counts / counts.sum()
+
+    return _tree_ensemble_classifier(trees, feature_columns, model.classes_, leaf_scores)
+
+
+def _compile_ada_boost_classifier(model: Any, feature_columns: List[str]) -> str:
+    """
+    AdaBoost predicts the class with the highest score, summed over its trees: the weighted votes of the trees
+    with the SAMME algorithm, their centered log probabilities with SAMME.R
+    """
+    class_count = len(model.classes_)
+    if any(estimator.n_classes_ != class_count for estimator in model.estimators_):
+        raise ValueError("Only AdaBoost trees of all the classes can be compiled")
+    trees = [estimator.tree_ for estimator in model.estimators_]
+
+    def leaf_scores(tree_ix: int, node: int) -> Sequence[float]:
+        counts = trees[tree_ix].value[node][0]
+        if model.algorithm == "SAMME":
+            return [model.estimator_weights_[tree_ix] if ix == counts.argmax() else 0.0 for ix in range(class_count)]
+        probabilities = np.clip(counts / counts.sum(), np.finfo(counts.dtype).eps, None)
+        log_probabilities = np.log(probabilities)
+        return (class_count - 1) * (log_probabilities - log_probabilities.mean())
+
+    return _tree_ensemble_classifier(trees, feature_columns, model.classes_, leaf_scores)
+
+
+def _compile_linear_regression(model: Any, feature_columns: List[str]) -> str:
+    if model.coef_.ndim != 1:
+        raise ValueError("Only single target linear regressions can be compiled")
+    return _weighted_sum(model.coef_, model.intercept_, feature_columns)
+
+
+def _compile_ridge_classifier(model: Any, feature_columns: List[str]) -> str:
+    labels = [_literal(label) for label in model.classes_]
+    scores = [
+        _weighted_sum(coefficients, intercept, feature_columns)
+        for coefficients, intercept in zip(model.coef_, model.intercept_)
+    ]
+    if len(scores) == 1:
+        return f"case when {scores[0]} > 0 then {labels[1]} else {labels[0]} end"
+    return _argmax(scores, labels)
+
+
+def _compile_xgboost_classifier(model: Any, feature_columns: List[str]) -> str:
+    """
+    XGBoost predicts the class with the highest margin, the sum of the base margin and the leaves of its trees
+    """
+    if getattr(model, "_le", None) is not None:
+        raise ValueError("Models with a label encoder can't be compiled")
+    objective, margins = _xgboost_margins(model, feature_columns)
+    if objective == "binary:logistic":
+        return f"case when {margins[0]} > 0 then 1 else 0 end"
+    if objective in ("multi:softprob", "multi:softmax"):
+        return _argmax(margins, [str(ix) for ix in range(len(margins))])
+    raise ValueError(f"Unsupported XGBoost objective {objective}")
+
+
+def _compile_xgboost_regressor(model: Any, feature_columns: List[str]) -> str:
+    objective, margins = _xgboost_margins(model, feature_columns)
+    if objective not in ("reg:squarederror", "reg:linear"):
+        raise ValueError(f"Unsupported XGBoost objective {objective}")
+    return margins[0]
+
+
+def _check_single_output(model: Any) -> None:
+    if model.n_outputs_ != 1:
+        raise ValueError("Only single output models can be compiled")
+
+
+def _sklearn_tree(tree: Any, feature_columns: List[str], leaf: Callable[[Any, int], str]) -> str:
+    if tree.max_depth > MAX_TREE_DEPTH:
+        raise ValueError(f"Trees deeper than {MAX_TREE_DEPTH} can't be compiled")
+
+    def node_expression(node: int) -> str:
+        left, right = tree.children_left[node], tree.children_right[node]
+        if left == right:
+            return leaf(tree, node)
+        column = feature_columns[tree.feature[node]]
+        threshold = _literal(tree.threshold[node])
+        return f"case when {column} <= {threshold} then {node_expression(left)} else {node_expression(right)} end"
+
+    return node_expression(0)
+
+
+def _tree_ensemble_classifier(
+    trees: List[Any],
+    feature_columns: List[str],
+    classes: Sequence[Any],
+    leaf_scores: Callable[[int, int], Sequence[float]],
+) -> str:
+    """
+    The class with the highest score, summed over the given trees from the class scores of their leaves
+    """
+    labels = [_literal(label) for label in classes]
+
+    def class_score(score: Callable[[Sequence[float]], float]) -> str:
+        def tree_score(tree_ix: int) -> str:
+            return _sklearn_tree(
+                trees[tree_ix], feature_columns, lambda _, node: _literal(score(leaf_scores(tree_ix, node)))
+            )
+
+        return " + ".join(tree_score(tree_ix) for tree_ix in range(len(trees)))
+
+    if len(labels) == 2:
+        # the second class only wins with a higher score, sum the difference of both instead of each one
+        difference = class_score(lambda scores: scores[1] - scores[0])
+        return f"case when {difference} > 0 then {labels[1]} else {labels[0]} end"
+    return _argmax([class_score(operator.itemgetter(ix)) for ix in range(len(labels))], labels)
+
+
+def _xgboost_margins(model: Any, feature_columns: List[str]) -> Tuple[str, List[str]]:
+    """
+    The objective of the given XGBoost model and the margin expression of each class, a single one unless the model
+    is a multi class classifier
+    """
+    booster = model.get_booster()
+    config = json.loads(booster.save_config())
+    learner = config["learner"]
+    if learner["gradient_booster"]["name"] != "gbtree":
+        raise ValueError("Only XGBoost tree boosters can be compiled")
+    objective = learner["objective"]["name"]
+    base_score = float(learner["learner_model_param"]["base_score"])
+    class_count = max(int(learner["learner_model_param"]["num_class"]), 1)
+    base_margin = math.log(base_score / (1 - base_score)) if objective == "binary:logistic" else base_score
+
+    feature_names = booster.feature_names or [f"f{ix}" for ix in range(len(feature_columns))]
+    columns = dict(zip(feature_names, feature_columns))
+
+    def node_expression(node: Dict[str, Any]) -> str:
+        if "leaf" in node:
+            return _literal(node["leaf"])
+        if "split_condition" not in node or node["split"] not in columns:
+            raise ValueError("Only numeric XGBoost splits can be compiled")
+        children = {child["nodeid"]: node_expression(child) for child in node["children"]}
+        column = columns[node["split"]]
+        condition = f"{column} < {_literal(node['split_condition'])}"
+        if node["missing"] == node["yes"]:
+            condition = f"({condition} or {column} is null)"
+        return f"case when {condition} then {children[node['yes']]} else {children[node['no']]} end"
+
+    trees = [json.loads(tree) for tree in booster.get_dump(dump_format="json")]
+    best_iteration = booster.attr("best_iteration")
+    if best_iteration is not None:
+        # models predict with the trees up to their best boosting round
+        parallel_tree_count = int(learner["gradient_booster"]["gbtree_train_param"]["num_parallel_tree"])
+        trees = trees[: (int(best_iteration) + 1) * class_count * parallel_tree_count]
+    class_trees: List[List[str]] = [[] for _ in range(class_count)]
+    for ix, tree in enumerate(trees):
+        # multi class models have a tree per class in each boosting round
+        class_trees[ix % class_count].append(node_expression(tree))
+    margins = [" + ".join([_literal(base_margin)] + expressions) for expressions in class_trees]
+    return objective, margins
+
+
+def _weighted_sum(coefficients: Sequence[float], intercept: float, feature_columns: List[str]) -> str:
+    terms = [f"{_literal(coefficient)} * {column}" for coefficient, column in zip(coefficients, feature_columns)]
+    return f"({' + '.join(terms + [_literal(intercept)])})"
+
+
+def _argmax(scores: List[str], labels: List[str]) -> str:
+    """
+    The label of the highest score, the first one if several are the highest. A score only needs to be compared
+    with the following ones, as a previous highest score would have matched first.
+    """
+    conditions = [
+        " and ".join(f"{scores[ix]} >= {scores[other_ix]}" for other_ix in range(ix + 1, len(scores)))
+        for ix in range(len(scores) - 1)
+    ]
+    whens = " ".join(f"when {condition} then {label}" for condition, label in zip(conditions, labels))
+    return f"case {whens} else {labels[-1]} end"
+
+
+def _literal(value: Any) -> str:
+    """
+    A sql literal of the given number, boolean or string. Floats are written with an exponent so every warehouse
+    reads them as doubles.
+    """
+    if isinstance(value, str):
+        if "'" in value or "\\" in value:
+            raise ValueError("Strings with quotes or backslashes can't be compiled")
+        return f"'{value}'"
+    if hasattr(value, "item"):
+        # numpy scalars
+        value = value.item()
+    if isinstance(value, bool):
+        return "true" if value else "false"
+    if isinstance(value, int):
+        return str(value)
+    if isinstance(value, float):
+        if not math.isfinite(value):
+            raise ValueError("Infinite numbers can't be compiled")
+        literal = repr(value)
+        return literal if "e" in literal else f"{literal}e0"
+    raise ValueError(f"Values of type {type(value).__name__} can't be compiled")
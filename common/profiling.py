@@ -0,0 +1,107 @@
+import cProfile
+import sys
+import threading
+import tracemalloc
+from pathlib import Path
+from types import FrameType
+from typing import Any, Counter, Optional
+
+
+# seconds between the stack samples of the collapsed stacks
+SAMPLE_INTERVAL_SECONDS = 0.005
+# lines allocating the most memory written to the allocations file
+TOP_ALLOCATIONS = 25
+# frames kept for each allocation, to attribute it to the adapter method it was made under
+TRACEMALLOC_FRAMES = 25
+
+_tracemalloc_lock = threading.Lock()
+_tracemalloc_profilers = 0
+_tracemalloc_started = False
+
+
+class StatementProfiler:
+    """
+    Profiles the statement run by the current thread and writes to the given directory, named after the given name:
+    its cProfile stats to `<name>.pstats`, its sampled stacks in the collapsed format of flame graphs to
+    `<name>.collapsed` and the lines allocating the most memory, traced by tracemalloc, to `<name>.allocations.txt`.
+    Memory is traced for the whole process, it includes the allocations of statements profiled at the same time.
+    """
+
+    def __init__(self, directory: Path, name: str, sample_interval: float = SAMPLE_INTERVAL_SECONDS) -> None:
+        self.directory = directory
+        self.name = name
+        self.sample_interval = sample_interval
+        self._profile: Optional[cProfile.Profile] = None
+        self._stacks: Counter[str] = Counter()
+        self._sampling_stopped = threading.Event()
+        self._sampler: Optional[threading.Thread] = None
+
+    def __enter__(self) -> "StatementProfiler":
+        _start_tracemalloc()
+        self._sampler = threading.Thread(
+            target=self._sample, args=(threading.get_ident(),), name="layer-profile", daemon=True
+        )
+        self._sampler.start()
+        self._profile = cProfile.Profile()
+        self._profile.enable()
+        return self
+
+    def __exit__(self, *args: Any) -> None:
+        if self._profile is not None:
+            self._profile.disable()
+        self._sampling_stopped.set()
+        if self._sampler is not None:
+            self._sampler.join()
+        snapshot = tracemalloc.take_snapshot()
+        peak_bytes = tracemalloc.get_traced_memory()[1]
+        _stop_tracemalloc()
+
+        self.directory.mkdir(parents=True, exist_ok=True)
+        if self._profile is not None:
+            self._profile.dump_stats(str(self.directory / f"{self.name}.pstats"))
+        with open(self.directory / f"{self.name}.collapsed", "w", encoding="utf-8") as f:
+            for stack, count in sorted(self._stacks.items()):
+                f.write(f"{stack} {count}\n")
+        with open(self.directory / f"{self.name}.allocations.txt", "w", encoding="utf-8") as f:
+            f.write(f"Peak traced memory: {peak_bytes} bytes\n")
+            snapshot = snapshot.filter_traces([tracemalloc.Filter(False, __file__)])
+            for statistic in snapshot.statistics("traceback")[:TOP_ALLOCATIONS]:
+                f.write(f"\n{statistic.size} bytes in {statistic.count} blocks\n")
+                f.writelines(f"  {line}\n" for line in statistic.traceback.format(most_recent_first=True))
+
+    def _sample(self, thread_id: int) -> None:
+        while not self._sampling_stopped.wait(self.sample_interval):
+            frame = sys._current_frames().get(thread_id)  # pylint: disable=protected-access
+            if frame is not None:
+                self._stacks[_collapsed_stack(frame)] += 1
+
+
+def _collapsed_stack(frame: Optional[FrameType]) -> str:
+    """
+    The functions of the stack of the given frame, outermost first, as `function (file:line)` separated by `;`
+    """
+    functions = []
+    while frame is not None:
+        code = frame.f_code
+        functions.append(f"{code.co_name} ({code.co_filename}:{code.co_firstlineno})")
+        frame = frame.f_back
+    return ";".join(reversed(functions))
+
+
+def _start_tracemalloc() -> None:
+    global _tracemalloc_profilers, _tracemalloc_started  # pylint: disable=global-statement
+    with _tracemalloc_lock:
+        if _tracemalloc_profilers == 0 and not tracemalloc.is_tracing():
+            tracemalloc.start(TRACEMALLOC_FRAMES)
+            _tracemalloc_started = True
+        _tracemalloc_profilers += 1
+
+
+def _stop_tracemalloc() -> None:
+    global _tracemalloc_profilers, _tracemalloc_started  # pylint: disable=global-statement
+    with _tracemalloc_lock:
+        _tracemalloc_profilers -= 1
+        # tracing started elsewhere is left running
+        if _tracemalloc_profilers == 0 and _tracemalloc_started:
+            tracemalloc.stop()
+            _tracemalloc_started = False
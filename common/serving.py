@@ -0,0 +1,325 @@
+import argparse
+import json
+import os
+import signal
+import socket
+import socketserver
+import struct
+import sys
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import IO, Any, Dict, List, Mapping, Optional, Tuple
+
+import pandas as pd  # type: ignore
+import pyarrow as pa  # type: ignore
+
+from .layer_backend import (
+    DEFAULT_LOCAL_REGISTRY,
+    LayerBackend,
+    LocalLayerBackend,
+    LocalLayerModel,
+)
+
+
+# loaded models unused for this long are evicted
+DEFAULT_IDLE_SECONDS = 30 * 60
+# models of Layer, which may have a new version, are fetched again once loaded for this long
+DEFAULT_MODEL_TTL_SECONDS = 10 * 60
+# the length of the json header of each message
+HEADER_LENGTH = struct.Struct("!I")
+# the socket is only accessible to the user running the daemon, from its creation
+SOCKET_UMASK = 0o177
+
+# the backend a model is fetched from: "local" with its "registry", or "layer" with its "api_key", and a "project"
+BackendSpec = Mapping[str, Optional[str]]
+# the backend spec as json, the model name and its version, None for models of Layer
+ModelKey = Tuple[str, str, Optional[str]]
+
+
+class ModelServingError(Exception):
+    """
+    A model the serving daemon failed to load or predict with
+    """
+
+
+def send_message(f: IO[bytes], header: Dict[str, Any], table: Optional[pa.Table] = None) -> None:
+    """
+    Writes the given json header, then the given table as an arrow ipc stream if any
+    """
+    data = json.dumps(dict(header, table=table is not None)).encode("utf-8")
+    f.write(HEADER_LENGTH.pack(len(data)))
+    f.write(data)
+    if table is not None:
+        with pa.ipc.new_stream(f, table.schema) as writer:
+            writer.write_table(table)
+    f.flush()
+
+
+def receive_message(f: IO[bytes]) -> Tuple[Dict[str, Any], Optional[pa.Table]]:
+    header_length = f.read(HEADER_LENGTH.size)
+    if len(header_length) < HEADER_LENGTH.size:
+        raise ModelServingError("Connection closed before a message")
+    header = json.loads(f.read(HEADER_LENGTH.unpack(header_length)[0]).decode("utf-8"))
+    table = pa.ipc.open_stream(f).read_all() if header["table"] else None
+    return header, table
+
+
+class ServedModel:
+    """
+    A model loaded and kept by the serving daemon listening on the given socket, which predicts in its process
+    """
+
+    def __init__(self, socket_path: str, backend: BackendSpec, name: str) -> None:
+        self.socket_path = socket_path
+        self.backend = backend
+        self.name = name
+
+    def load(self) -> None:
+        """
+        Loads the model in the daemon if it isn't already, raises OSError if the daemon isn't running
+        """
+        self._request("load")
+
+    def predict_table(self, input_table: pa.Table, compact_dtypes: bool = False) -> pd.DataFrame:
+        predictions = self._request("predict", input_table, compact_dtypes=compact_dtypes)
+        assert predictions is not None
+        return predictions.to_pandas()
+
+    def _request(self, operation: str, table: Optional[pa.Table] = None, **options: Any) -> Optional[pa.Table]:
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as connection:
+            connection.connect(self.socket_path)
+            with connection.makefile("wb") as f:
+                send_message(f, dict(options, operation=operation, backend=self.backend, model=self.name), table)
+            with connection.makefile("rb") as f:
+                header, predictions = receive_message(f)
+        if header["error"] is not None:
+            raise ModelServingError(f"Serving model {self.name} failed: {header['error']}")
+        return predictions
+
+
+class LoadedModel:
+    """
+    A model loaded by the daemon, with its estimated size and when it was loaded and last used
+    """
+
+    def __init__(self, model: Any, nbytes: int) -> None:
+        self.model = model
+        self.nbytes = nbytes
+        self.loaded_at = time.monotonic()
+        self.used_at = self.loaded_at
+
+
+class LoadedModels:
+    """
+    The models loaded by the daemon, the least recently used ones are evicted over the memory budget or once idle.
+    Models of the local registry are loaded again for each new version, the ones of Layer once they get old. Local
+    models are only loaded from the given registries, the default local registry if none.
+    """
+
+    def __init__(
+        self,
+        memory_budget: Optional[int] = None,
+        idle_seconds: float = DEFAULT_IDLE_SECONDS,
+        model_ttl_seconds: float = DEFAULT_MODEL_TTL_SECONDS,
+        registries: Optional[List[Path]] = None,
+    ) -> None:
+        self.memory_budget = memory_budget
+        self.idle_seconds = idle_seconds
+        self.model_ttl_seconds = model_ttl_seconds
+        self.registries = [path.expanduser().resolve() for path in registries or [Path(DEFAULT_LOCAL_REGISTRY)]]
+        self.loaded_bytes = 0
+        self._models: "OrderedDict[ModelKey, LoadedModel]" = OrderedDict()
+        self._backends: Dict[str, LayerBackend] = {}
+        self._lock = threading.Lock()
+        # the Layer sdk keeps the project it was initialised with globally, models are loaded one at a time
+        self._load_lock = threading.Lock()
+
+    def get(self, backend_spec: BackendSpec, name: str) -> Any:
+        backend = self._get_backend(backend_spec)
+        model = None
+        version = None
+        if isinstance(backend, LocalLayerBackend):
+            # resolving the version of a local model is cheap, it is loaded when used
+            model = backend.get_model(name)
+            version = model.version
+            # model names with relative path components could point anywhere, models are unpickled
+            if not _is_relative_to(model.path.resolve(), backend.registry_path):
+                raise ModelServingError(f"Model {name} is outside of the local registry")
+        key = (json.dumps(backend_spec, sort_keys=True), name, version)
+        loaded_model = self._get_loaded(key)
+        if loaded_model is not None:
+            return loaded_model
+        with self._load_lock:
+            # another request may have loaded it meanwhile
+            loaded_model = self._get_loaded(key)
+            if loaded_model is not None:
+                return loaded_model
+            if model is None:
+                backend.init(str(backend_spec["project"]))
+                model = backend.get_model(name)
+            model.get_train()
+            loaded_model = LoadedModel(model, _estimate_model_nbytes(model))
+        with self._lock:
+            self._evict(key)
+            self._models[key] = loaded_model
+            self.loaded_bytes += loaded_model.nbytes
+            # the model just loaded stays, even over the budget on its own
+            while self.memory_budget is not None and self.loaded_bytes > self.memory_budget and len(self._models) > 1:
+                self._evict(next(iter(self._models)))
+        return model
+
+    def _get_loaded(self, key: ModelKey) -> Any:
+        with self._lock:
+            loaded_model = self._models.get(key)
+            if loaded_model is None:
+                return None
+            # models of Layer are only identified by their name, newer versions may have been trained since
+            if key[2] is None and time.monotonic() - loaded_model.loaded_at >= self.model_ttl_seconds:
+                return None
+            loaded_model.used_at = time.monotonic()
+            self._models.move_to_end(key)
+            return loaded_model.model
+
+    def evict_idle(self) -> List[str]:
+        """
+        Evicts the models unused for the idle time, returns their names
+        """
+        with self._lock:
+            now = time.monotonic()
+            idle_keys = [key for key, model in self._models.items() if now - model.used_at >= self.idle_seconds]
+            for key in idle_keys:
+                self._evict(key)
+        return [name for _, name, _ in idle_keys]
+
+    def _evict(self, key: ModelKey) -> None:
+        loaded_model = self._models.pop(key, None)
+        if loaded_model is not None:
+            self.loaded_bytes -= loaded_model.nbytes
+
+    def _get_backend(self, backend_spec: BackendSpec) -> LayerBackend:
+        backend_key = json.dumps(backend_spec, sort_keys=True)
+        with self._lock:
+            backend = self._backends.get(backend_key)
+            if backend is None:
+                if backend_spec["backend"] == "local":
+                    registry_path = Path(str(backend_spec["registry"])).expanduser().resolve()
+                    if registry_path not in self.registries:
+                        raise ModelServingError(f"The local registry {registry_path} isn't served by this daemon")
+                    backend = LocalLayerBackend(registry_path)
+                    backend.init(str(backend_spec["project"]))
+                else:
+                    backend = LayerBackend()
+                    if backend_spec.get("api_key") is not None:
+                        backend.login_with_api_key(str(backend_spec["api_key"]))
+                self._backends[backend_key] = backend
+            return backend
+
+
+def _is_relative_to(path: Path, parent: Path) -> bool:
+    try:
+        path.relative_to(parent)
+    except ValueError:
+        return False
+    return True
+
+
+def _estimate_model_nbytes(model: Any) -> int:
+    """
+    The size of the given model pickled, close to what it takes in memory for most models
+    """
+    if isinstance(model, LocalLayerModel):
+        return (model.path / LocalLayerBackend.MODEL_FILE_NAME).stat().st_size
+    import cloudpickle  # type: ignore
+
+    return len(cloudpickle.dumps(model.get_train()))
+
+
+class _RequestHandler(socketserver.StreamRequestHandler):
+    server: "ModelServer"
+
+    def handle(self) -> None:
+        try:
+            header, table = receive_message(self.rfile)
+        except ModelServingError:
+            # connections checking whether the daemon is running send nothing
+            return
+        try:
+            model = self.server.models.get(header["backend"], header["model"])
+            predictions = None
+            if header["operation"] == "predict":
+                assert table is not None
+                predictions = _predict(model, table, header.get("compact_dtypes", False))
+        except Exception as e:  # pylint: disable=broad-except
+            send_message(self.wfile, {"error": f"{type(e).__name__}: {e}"})
+            return
+        send_message(self.wfile, {"error": None}, predictions)
+
+
+def _predict(model: Any, input_table: pa.Table, compact_dtypes: bool) -> pa.Table:
+    from . import arrow_helper
+
+    input_df = arrow_helper.to_compact_dataframe(input_table) if compact_dtypes else input_table.to_pandas()
+    predictions = model.predict(input_df)
+    # arrow columns are named by strings, the predictions are taken by position
+    predictions.columns = [str(column) for column in predictions.columns]
+    return pa.Table.from_pandas(predictions, preserve_index=False)
+
+
+class ModelServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    """
+    Serves the models it loads over a unix socket, to the dbt invocations on this machine
+    """
+
+    daemon_threads = True
+
+    def __init__(self, socket_path: str, models: LoadedModels) -> None:
+        self.models = models
+        # the requests carry Layer api keys, the socket is never open to other users, not even before binding returns
+        umask = os.umask(SOCKET_UMASK)
+        try:
+            super().__init__(socket_path, _RequestHandler)
+        finally:
+            os.umask(umask)
+
+    def service_actions(self) -> None:
+        self.models.evict_idle()
+
+
+def serve(socket_path: str, models: LoadedModels) -> None:
+    if os.path.exists(socket_path):
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as connection:
+            if connection.connect_ex(socket_path) == 0:
+                raise SystemExit(f"A daemon is already serving models at {socket_path}")
+        # left over by a daemon which didn't exit cleanly
+        os.unlink(socket_path)
+    # stopping the daemon removes its socket
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
+    with ModelServer(socket_path, models) as server:
+        try:
+            server.serve_forever()
+        finally:
+            os.unlink(socket_path)
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Keeps Layer models loaded and predicts with them for dbt")
+    parser.add_argument("--socket", required=True, help="the unix socket to listen on, layer_serving_socket of dbt")
+    parser.add_argument("--memory-budget-mb", type=int, help="evict the least recently used models over this size")
+    parser.add_argument(
+        "--idle-seconds", type=float, default=DEFAULT_IDLE_SECONDS, help="evict models unused this long"
+    )
+    parser.add_argument(
+        "--registry",
+        action="append",
+        type=Path,
+        help=f"a local registry to load models from, repeated for several, {DEFAULT_LOCAL_REGISTRY} by default",
+    )
+    args = parser.parse_args(argv)
+    memory_budget = None if args.memory_budget_mb is None else args.memory_budget_mb * 1024 * 1024
+    serve(args.socket, LoadedModels(memory_budget, args.idle_seconds, registries=args.registry))
+
+
+if __name__ == "__main__":
+    main()
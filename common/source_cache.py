@@ -0,0 +1,83 @@
+from __future__ import annotations
+
+import threading
+from collections import OrderedDict
+from typing import TYPE_CHECKING, List, Optional, Tuple
+
+
+if TYPE_CHECKING:
+    import pyarrow as pa  # type: ignore
+
+
+# the source unique id, the where clause the rows were fetched with and the fetched columns, None for all of them
+SourceKey = Tuple[str, str, Optional[Tuple[str, ...]]]
+
+
+class SourceCache:
+    """
+    Source tables fetched by Layer statements, kept in memory for the other statements of the dbt invocation which
+    read the same rows of the same source. A table fetched with a set of columns serves any subset of them. The least
+    recently used tables are evicted to keep them under the given memory budget, the tables of a source are dropped
+    when it is rebuilt.
+    """
+
+    def __init__(self, case_sensitive: bool = True) -> None:
+        self.case_sensitive = case_sensitive
+        self.cached_bytes = 0
+        self._tables: OrderedDict[SourceKey, pa.Table] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, source_id: str, where_statement: str, columns: Optional[List[str]]) -> Optional[pa.Table]:
+        """
+        The given columns of the source, all of them if None, if a cached table has them
+        """
+        with self._lock:
+            for key, table in reversed(self._tables.items()):
+                if key[:2] != (source_id, where_statement) or not self._covers(key[2], columns):
+                    continue
+                if columns is None:
+                    self._tables.move_to_end(key)
+                    return table
+                names = {self._normalize(name): name for name in table.column_names}
+                if any(self._normalize(column) not in names for column in columns):
+                    # the columns of a select * are named by the warehouse, not after quoted identifiers
+                    continue
+                self._tables.move_to_end(key)
+                return table.select([names[self._normalize(column)] for column in columns]).rename_columns(columns)
+        return None
+
+    def put(
+        self, source_id: str, where_statement: str, columns: Optional[List[str]], table: pa.Table, memory_budget: int
+    ) -> None:
+        """
+        Caches the given columns of the source, all of them if None, fetched to the given table
+        """
+        if table.nbytes > memory_budget:
+            return
+        fetched_columns = None if columns is None else tuple(self._normalize(column) for column in columns)
+        with self._lock:
+            # tables with fewer columns of the same rows are served by this one from now on
+            for key in [key for key in self._tables if key[:2] == (source_id, where_statement)]:
+                if self._covers(fetched_columns, None if key[2] is None else list(key[2])):
+                    self.cached_bytes -= self._tables.pop(key).nbytes
+            self._tables[(source_id, where_statement, fetched_columns)] = table
+            self.cached_bytes += table.nbytes
+            while self.cached_bytes > memory_budget:
+                _, evicted_table = self._tables.popitem(last=False)
+                self.cached_bytes -= evicted_table.nbytes
+
+    def invalidate(self, source_id: str) -> None:
+        """
+        Drops the cached tables of the given source
+        """
+        with self._lock:
+            for key in [key for key in self._tables if key[0] == source_id]:
+                self.cached_bytes -= self._tables.pop(key).nbytes
+
+    def _covers(self, cached_columns: Optional[Tuple[str, ...]], columns: Optional[List[str]]) -> bool:
+        if cached_columns is None:
+            return True
+        return columns is not None and {self._normalize(column) for column in columns} <= set(cached_columns)
+
+    def _normalize(self, column: str) -> str:
+        return column if self.case_sensitive else column.upper()
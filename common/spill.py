@@ -0,0 +1,91 @@
+import itertools
+import shutil
+import tempfile
+import threading
+import time
+from pathlib import Path
+from typing import Any, List, Optional
+
+import pyarrow as pa  # type: ignore
+
+
+# rows of the batches fetched, spilled and predicted at a time
+BATCH_ROWS = 100_000
+
+
+class ArrowSpill:
+    """
+    Keeps the tables read through it in memory up to a memory budget. Tables which don't fit are written to arrow
+    files in a scratch directory and memory mapped back, their columns are then paged in from disk as they are used.
+    The files are removed once the spill is closed.
+    """
+
+    def __init__(self, memory_budget: Optional[int], directory: Optional[str] = None) -> None:
+        self.memory_budget = memory_budget
+        self.directory = directory
+        self.spilled_bytes = 0
+        self.spill_seconds = 0.0
+        self._memory_bytes = 0
+        self._file_count = 0
+        self._spill_path: Optional[Path] = None
+        self._lock = threading.Lock()
+
+    def __enter__(self) -> "ArrowSpill":
+        return self
+
+    def __exit__(self, *args: Any) -> None:
+        self.close()
+
+    @property
+    def spilled(self) -> bool:
+        return self.spilled_bytes > 0
+
+    def read_all(self, reader: pa.RecordBatchReader) -> pa.Table:
+        """
+        Reads all the batches of the given reader, to memory while they fit in the budget and to disk otherwise
+        """
+        batches: List[pa.RecordBatch] = []
+        for batch in reader:
+            batches.append(batch)
+            if not self._reserve(batch.nbytes):
+                return self._spill(reader, batches)
+        return pa.Table.from_batches(batches, schema=reader.schema)
+
+    def close(self) -> None:
+        if self._spill_path is not None:
+            shutil.rmtree(self._spill_path, ignore_errors=True)
+            self._spill_path = None
+
+    def _reserve(self, nbytes: int) -> bool:
+        with self._lock:
+            if self.memory_budget is not None and self._memory_bytes + nbytes > self.memory_budget:
+                return False
+            self._memory_bytes += nbytes
+            return True
+
+    def _spill(self, reader: pa.RecordBatchReader, batches: List[pa.RecordBatch]) -> pa.Table:
+        path = self._new_file_path()
+        write_seconds = 0.0
+        with pa.OSFile(str(path), "wb") as sink, pa.ipc.new_file(sink, reader.schema) as writer:
+            # the batches read so far leave memory, except the last one which was never reserved
+            with self._lock:
+                self._memory_bytes -= sum(batch.nbytes for batch in batches[:-1])
+            for batch in itertools.chain(batches, reader):
+                start_write = time.perf_counter()
+                writer.write_table(pa.Table.from_batches([batch]), max_chunksize=BATCH_ROWS)
+                write_seconds += time.perf_counter() - start_write
+            batches.clear()
+
+        start_map = time.perf_counter()
+        table = pa.ipc.open_file(pa.memory_map(str(path))).read_all()
+        with self._lock:
+            self.spilled_bytes += path.stat().st_size
+            self.spill_seconds += write_seconds + time.perf_counter() - start_map
+        return table
+
+    def _new_file_path(self) -> Path:
+        with self._lock:
+            if self._spill_path is None:
+                self._spill_path = Path(tempfile.mkdtemp(prefix="layer-spill-", dir=self.directory))
+            self._file_count += 1
+            return self._spill_path / f"{self._file_count}.arrow"
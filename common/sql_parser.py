@@ -2,7 +2,7 @@ from typing import Any, Callable, List, Optional, Tuple
 
 import sqlparse  # type:ignore
 from sqlparse.sql import Token  # type:ignore
-from sqlparse.tokens import Name, Newline, Punctuation  # type:ignore
+from sqlparse.tokens import Name, Newline, Punctuation, String  # type:ignore
 from sqlparse.utils import remove_quotes  # type:ignore
 
 
@@ -29,27 +29,71 @@ class LayerSqlFunction:
         )
 
 
+class LayerPrediction:
+    """
+    A single `layer.predict` call of a predict statement
+    """
+
+    def __init__(self, model_name: str, predict_columns: List[str], prediction_alias: str) -> None:
+        self.model_name = model_name
+        self.predict_columns = predict_columns
+        self.prediction_alias = prediction_alias
+
+
 class LayerPredictFunction(LayerSqlFunction):
+    """
+    A select with one or more `layer.predict` calls, all of them predict from the same source rows
+    """
+
     def __init__(
         self,
         source_name: str,
         target_name: str,
-        model_name: str,
+        predictions: List[LayerPrediction],
         select_columns: List[str],
-        predict_columns: List[str],
         all_columns: List[str],
-        prediction_alias: str,
         sql: str,
+        statement: str,
+        where_statement: str,
+        select_sql: str,
     ) -> None:
         super().__init__(
             function_type=self.SUPPORTED_FUNCTION_PREDICT, source_name=source_name, target_name=target_name
         )
-        self.model_name = model_name
+        self.predictions = predictions
         self.select_columns = select_columns
-        self.predict_columns = predict_columns
         self.all_columns = all_columns
-        self.prediction_alias = prediction_alias
         self.sql = sql
+        self.statement = statement
+        # the where clause of the select, the rows the source is fetched with
+        self.where_statement = where_statement
+        # the selected columns and predictions as written in the statement
+        self.select_sql = select_sql
+
+    def replace_predictions(self, prediction_expressions: List[str]) -> str:
+        """
+        The statement with each prediction replaced by the given sql expression, under the prediction alias. The
+        columns are selected in the order predictions in Python load them, the selected columns then the predictions.
+        """
+        prediction_aliases = [prediction.prediction_alias for prediction in self.predictions]
+        select_columns = [column for column in self.select_columns if column not in prediction_aliases] + [
+            f"{expression} as {alias}" for expression, alias in zip(prediction_expressions, prediction_aliases)
+        ]
+        return self.statement.replace(self.select_sql, ", ".join(select_columns), 1)
+
+    # the first prediction, the only one for most statements
+
+    @property
+    def model_name(self) -> str:
+        return self.predictions[0].model_name
+
+    @property
+    def predict_columns(self) -> List[str]:
+        return self.predictions[0].predict_columns
+
+    @property
+    def prediction_alias(self) -> str:
+        return self.predictions[0].prediction_alias
 
 
 class LayerTrainFunction(LayerSqlFunction):
@@ -72,12 +116,15 @@ class LayerAutoMLFunction(LayerSqlFunction):
         feature_columns: List[str],
         target_column: str,
         sql: str,
+        where_statement: str,
     ) -> None:
         super().__init__(function_type=self.SUPPORTED_FUNCTION_AUTOML, source_name=source_name, target_name=target_name)
         self.feature_columns = feature_columns
         self.target_column = target_column
         self.model_type = model_type
         self.sql = sql
+        # the where clause of the select, the rows the source is fetched with
+        self.where_statement = where_statement
 
 
 def find_from_token(tokens: List[Token]) -> List[Token]:
@@ -112,6 +159,11 @@ class LayerSQLParser:
 
     ALL_COLUMNS_WILDCARD = "*"
 
+    def __init__(self) -> None:
+        # sqlparse sets up its shared lexer on first use without a lock, so threads parsing at the same time can
+        # see it half initialised. Set it up now, before dbt starts running nodes on several threads.
+        sqlparse.parse("select 1")
+
     def parse(self, sql: str) -> Optional[LayerSqlFunction]:
         """
         returns None if not a layer SQL statement
@@ -122,12 +174,13 @@ class LayerSQLParser:
             return None
 
         tokens = parsed[0].tokens
-        layer_func = next((x for x in find_functions(tokens) if is_layer_function(x)), None)
-        if not layer_func:
+        layer_funcs = [x for x in find_functions(tokens) if is_layer_function(x)]
+        if not layer_funcs:
             return None
+        layer_func = layer_funcs[0]
 
         target_name_group = next(
-            (x for x in expect_tokens(tokens, [keyword("create or replace"), keyword("table"), group()])), None
+            (x for x in expect_tokens(tokens, [create_keyword(), keyword("table"), group()])), None
         )
         if not target_name_group:
             return None
@@ -136,7 +189,9 @@ class LayerSQLParser:
         if is_automl_function(layer_func):
             return self.parse_automl(layer_func, target_name)
         elif is_predict_function(layer_func):
-            return self.parse_predict(layer_func, target_name)
+            if not all(is_predict_function(x) for x in layer_funcs):
+                raise ValueError("Only predict functions can be combined in the same select")
+            return self.parse_predict(layer_funcs, target_name)
         elif is_train_function(layer_func):
             return self.parse_train(layer_func, target_name)
         else:
@@ -150,11 +205,11 @@ class LayerSQLParser:
         else:
             raise ValueError("Invalid sql syntax for Layer function")
 
-    def parse_predict(self, layer_func_token: Token, target: str) -> LayerPredictFunction:
+    def parse_predict(self, layer_func_tokens: List[Token], target: str) -> LayerPredictFunction:
 
-        # We need the parent `select` statement that contains the function
+        # We need the parent `select` statement that contains the functions
         # to get access to the selected columns and the source relation
-        select_sttmt = find_parent(layer_func_token, lambda x: isinstance(x, sqlparse.sql.Parenthesis))
+        select_sttmt = find_parent(layer_func_tokens[0], lambda x: isinstance(x, sqlparse.sql.Parenthesis))
         clean_select_sttmt = []
         if not select_sttmt:
             raise ValueError("SQL syntax error")
@@ -181,32 +236,43 @@ class LayerSQLParser:
         columns = remove_tokens(columns_incl_layer, lambda t: find_layer_function(t) is not None)
         select_columns = [t.value for t in columns]
 
-        # extract the layer prediction function
-        clean_func_tokens = clean_separators(layer_func_token[1].tokens)
-        if len(clean_func_tokens) < 3:
-            invalid_func = " ".join(t.value for t in clean_func_tokens)
-            raise ValueError(f"Invalid predict function syntax {invalid_func}")
-        model_name, _, bracket_container = clean_func_tokens
-        predict_model = remove_quotes(model_name.value)
-        predict_columns = get_cols_from_container(bracket_container)
+        # extract the layer prediction functions
+        predictions = [self._parse_prediction(layer_func_token) for layer_func_token in layer_func_tokens]
+        prediction_aliases = [prediction.prediction_alias for prediction in predictions]
+        if len(set(prediction_aliases)) < len(prediction_aliases):
+            raise ValueError(f"Predict functions need distinct aliases, got {', '.join(prediction_aliases)}")
 
-        all_columns = select_columns + list(set(predict_columns) - set(select_columns))
+        predict_columns = [column for prediction in predictions for column in prediction.predict_columns]
+        all_columns = select_columns + [x for x in dict.fromkeys(predict_columns) if x not in select_columns]
         sql_text = build_sql(all_columns, source, where_statement)
         sql = sqlparse.format(sql_text, keyword_case="lower", strip_whitespace=True)
 
-        prediction_alias = layer_func_token.parent.get_alias() or "prediction"
+        statement = find_parent(layer_func_tokens[0], lambda x: isinstance(x, sqlparse.sql.Statement))
+        select_sql = find_parent(layer_func_tokens[0], lambda x: isinstance(x, sqlparse.sql.IdentifierList))
 
         return LayerPredictFunction(
             source,
             target,
-            predict_model,
+            predictions,
             select_columns,
-            predict_columns,
             all_columns,
-            prediction_alias,
             sql,
+            str(statement),
+            where_statement,
+            str(select_sql),
         )
 
+    def _parse_prediction(self, layer_func_token: Token) -> LayerPrediction:
+        clean_func_tokens = clean_separators(layer_func_token[1].tokens)
+        if len(clean_func_tokens) < 3:
+            invalid_func = " ".join(t.value for t in clean_func_tokens)
+            raise ValueError(f"Invalid predict function syntax {invalid_func}")
+        model_name, _, bracket_container = clean_func_tokens
+        predict_model = remove_quotes(model_name.value)
+        predict_columns = get_cols_from_container(bracket_container)
+        prediction_alias = layer_func_token.parent.get_alias() or "prediction"
+        return LayerPrediction(predict_model, predict_columns, prediction_alias)
+
     def parse_automl(self, layer_func_token: Token, target: str) -> LayerAutoMLFunction:
 
         # We need the parent `select` statement that contains the function
@@ -239,7 +305,7 @@ class LayerSQLParser:
         sql_text = build_sql(all_columns, source, where_statement)
         sql = sqlparse.format(sql_text, keyword_case="lower", strip_whitespace=True)
 
-        return LayerAutoMLFunction(source, target, model_type, feature_columns, target_column, sql)
+        return LayerAutoMLFunction(source, target, model_type, feature_columns, target_column, sql, where_statement)
 
     def parse_train(self, layer_func_token: Token, target: str) -> LayerTrainFunction:
         select = find_parent(layer_func_token, lambda x: isinstance(x, sqlparse.sql.Identifier))
@@ -386,12 +452,21 @@ def keyword(value: str) -> TokenPredicate:
     return check_token
 
 
+def create_keyword() -> TokenPredicate:
+    """
+    `create or replace` for BigQuery and Snowflake, a plain `create` for DuckDB
+    """
+    create_or_replace = keyword("create or replace")
+    create = keyword("create")
+    return lambda x: create_or_replace(x) or create(x)
+
+
 def whitespace() -> Callable[[Token], bool]:
     return lambda x: x.is_whitespace
 
 
 def name() -> Callable[[Token], bool]:
-    return lambda x: x.ttype is Name
+    return lambda x: x.ttype is Name or x.ttype is String.Symbol
 
 
 def newline() -> Callable[[Token], bool]:
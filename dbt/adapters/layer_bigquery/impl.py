@@ -1,8 +1,36 @@
+from __future__ import annotations
+
+from typing import TYPE_CHECKING, Optional
+
 from dbt.adapters.bigquery.impl import BigQueryAdapter  # type:ignore
+from google.cloud import bigquery  # type:ignore
 
-from common.adapter import LayerAdapter
+from common.adapter import LayerAdapter, ScanEstimate
 from dbt.adapters.layer_bigquery.connections import LayerBigQueryConnectionManager
 
 
+if TYPE_CHECKING:
+    import pyarrow as pa  # type: ignore
+
+
 class LayerBigQueryAdapter(LayerAdapter, BigQueryAdapter):
     ConnectionManager = LayerBigQueryConnectionManager
+
+    def _fetch_arrow_batches(self, sql: str) -> pa.RecordBatchReader:
+        # the rows iterator downloads the result one page at a time, as arrow batches instead of agate rows
+        from common import arrow_helper
+
+        _, rows = self.connections.raw_execute(sql, fetch=True)
+        column_names = [field.name for field in rows.schema]
+        return arrow_helper.from_record_batches(iter(rows.to_arrow_iterable()), column_names)
+
+    def _partition_filter(self, column: str, partitions: int, partition: int) -> str:
+        return f"abs(mod(farm_fingerprint(to_json_string({column})), {partitions})) = {partition}"
+
+    def _estimate_scan(self, sql: str) -> Optional[ScanEstimate]:
+        # a dry run validates the query and reports the bytes it would process, without running or billing it
+        client = self.connections.get_thread_connection().handle
+        job_config = bigquery.QueryJobConfig(dry_run=True, use_query_cache=False)
+        query_job = client.query(sql, job_config=job_config)
+        # the processed bytes are the logical bytes of the columns read, about what they take once fetched
+        return ScanEstimate(scan_bytes=query_job.total_bytes_processed, fetch_bytes=query_job.total_bytes_processed)
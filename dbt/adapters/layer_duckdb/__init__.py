@@ -0,0 +1,13 @@
+from dbt.adapters.base import AdapterPlugin  # type: ignore
+
+from dbt.adapters.layer_duckdb.connections import LayerDuckDBCredentials
+from dbt.adapters.layer_duckdb.impl import LayerDuckDBAdapter
+from dbt.include import layer_duckdb
+
+
+Plugin = AdapterPlugin(
+    adapter=LayerDuckDBAdapter,
+    credentials=LayerDuckDBCredentials,
+    include_path=layer_duckdb.PACKAGE_PATH,
+    dependencies=["duckdb"],
+)
@@ -0,0 +1 @@
+version = "1.2.0"  # pylint: disable=invalid-name
@@ -0,0 +1,19 @@
+from dataclasses import dataclass
+
+from dbt.adapters.duckdb.connections import (  # type:ignore
+    DuckDBConnectionManager,
+    DuckDBCredentials,
+)
+
+from common.credentials import LayerCredentials
+
+
+@dataclass
+class LayerDuckDBCredentials(LayerCredentials, DuckDBCredentials):
+    @property
+    def type(self) -> str:
+        return "layer_duckdb"
+
+
+class LayerDuckDBConnectionManager(DuckDBConnectionManager):
+    TYPE = "layer_duckdb"
@@ -0,0 +1,55 @@
+from __future__ import annotations
+
+from contextlib import contextmanager
+from typing import TYPE_CHECKING, Iterator, List
+
+from dbt.adapters.base.relation import BaseRelation  # type: ignore
+from dbt.adapters.duckdb.impl import DuckDBAdapter  # type:ignore
+from dbt.contracts.connection import ConnectionState, LazyHandle  # type: ignore
+from dbt.contracts.graph.compiled import CompileResultNode  # type: ignore
+
+from common.adapter import LayerAdapter
+from dbt.adapters.layer_duckdb.connections import LayerDuckDBConnectionManager
+
+
+if TYPE_CHECKING:
+    import pyarrow as pa  # type: ignore
+
+
+class LayerDuckDBAdapter(LayerAdapter, DuckDBAdapter):
+    """
+    Runs Layer statements against a local DuckDB database, for offline end to end runs
+    """
+
+    ConnectionManager = LayerDuckDBConnectionManager
+
+    @contextmanager
+    def connection_for(self, node: CompileResultNode) -> Iterator[None]:
+        # Layer statements run inside the materialization of their node. Releasing its connection
+        # would close the DuckDB database under the materialization, so reuse it instead. A thread reuses
+        # its connection across nodes, it stays closed until the materialization opens its lazy handle.
+        connection = self.connections.get_if_exists()
+        if connection is not None and (
+            connection.state != ConnectionState.CLOSED
+            or isinstance(connection._handle, LazyHandle)  # pylint: disable=protected-access
+        ):
+            yield
+        else:
+            with super().connection_for(node):
+                yield
+
+    def _get_relation_names(self, relation: BaseRelation) -> List[str]:
+        # DuckDB creates tables without the database in their name
+        return [relation.render(), relation.include(database=False).render()]
+
+    def _fetch_arrow_batches(self, sql: str) -> pa.RecordBatchReader:
+        # DuckDB streams its results as arrow batches, without building agate rows
+        from common import arrow_helper
+        from common.spill import BATCH_ROWS
+
+        _, cursor = self.connections.add_query(sql)
+        return arrow_helper.decimals_to_numbers(cursor.fetch_record_batch(BATCH_ROWS))
+
+    def _partition_filter(self, column: str, partitions: int, partition: int) -> str:
+        # hash returns an unsigned integer, the modulo of another type would cast it to a double
+        return f"hash({column}) % cast({partitions} as ubigint) = {partition}"
@@ -1,9 +1,46 @@
+from __future__ import annotations
+
+import json
+from typing import TYPE_CHECKING, Optional
+
 from dbt.adapters.snowflake.impl import SnowflakeAdapter  # type:ignore
+from snowflake.connector.errors import (  # type:ignore
+    NotSupportedError,
+    ProgrammingError,
+)
 
-from common.adapter import LayerAdapter
+from common.adapter import LayerAdapter, ScanEstimate
 from dbt.adapters.layer_snowflake.connections import LayerSnowflakeConnectionManager
 
 
+if TYPE_CHECKING:
+    import pyarrow as pa  # type: ignore
+
+
 class LayerSnowflakeAdapter(LayerAdapter, SnowflakeAdapter):
     ConnectionManager = LayerSnowflakeConnectionManager
     CASE_SENSITIVE = False
+
+    def _fetch_arrow_batches(self, sql: str) -> pa.RecordBatchReader:
+        # the cursor downloads the result one chunk at a time, as arrow tables instead of agate rows
+        from common import arrow_helper
+        from common.spill import BATCH_ROWS
+
+        _, cursor = self.connections.add_query(sql)
+        try:
+            tables = cursor.fetch_arrow_batches()
+        except (NotSupportedError, ProgrammingError):
+            # without arrow on this platform or in this session, the rows are fetched without streaming them
+            table = arrow_helper.from_agate_table(self.connections.get_result_from_cursor(cursor))
+            return arrow_helper.from_record_batches(
+                iter(table.to_batches(max_chunksize=BATCH_ROWS)), table.column_names
+            )
+        column_names = [column[0] for column in cursor.description]
+        batches = (batch for chunk in tables for batch in chunk.to_batches())
+        return arrow_helper.from_record_batches(batches, column_names)
+
+    def _estimate_scan(self, sql: str) -> Optional[ScanEstimate]:
+        # explain compiles the query and reports the bytes of the micro-partitions it would scan, without running it
+        _, table = self.connections.execute(f"explain using json {sql}", fetch=True)
+        global_stats = json.loads(table.rows[0][0])["GlobalStats"]
+        return ScanEstimate(scan_bytes=global_stats["bytesAssigned"])
@@ -0,0 +1,4 @@
+import os
+
+
+PACKAGE_PATH = os.path.dirname(__file__)
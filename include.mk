@@ -8,6 +8,8 @@ UNAME_ARCH := $(shell uname -m)
 PROJECT_NAME := dbt-layer
 CONDA_ENV_NAME := $(shell echo $(CONDA_DEFAULT_ENV))
 E2E_TEST_SELECTOR := test/e2e
+BENCHMARK_STORAGE := test/benchmark/baseline
+BENCHMARK_TOLERANCE ?= 25%
 
 ifneq ($(shell $(POETRY) --version | sed -En 's/Poetry \(version (.*)\)/\1/p'), $(REQUIRED_POETRY_VERSION))
 $(error "Please use Poetry version $(REQUIRED_POETRY_VERSION). Simply run: poetry self update $(REQUIRED_POETRY_VERSION)")
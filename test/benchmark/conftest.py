@@ -0,0 +1,132 @@
+import decimal
+import sys
+from types import ModuleType, SimpleNamespace
+from typing import Any, Callable, Dict, List
+
+import agate  # type: ignore
+import pytest
+from dbt.adapters.base.relation import BaseRelation  # type: ignore
+from dbt.contracts.graph.manifest import Manifest  # type: ignore
+from dbt.contracts.graph.parsed import ParsedModelNode  # type: ignore
+
+from common.adapter import LayerAdapter
+
+
+def _install_layer_stub() -> None:
+    """
+    Replaces the Layer sdk with an offline stub, so benchmarks never reach the network
+    and only measure the adapter code paths
+    """
+
+    def model(name: str) -> Callable[[Callable[..., Any]], Callable[..., Any]]:
+        def decorator(func: Callable[..., Any]) -> Callable[..., Any]:
+            return func
+
+        return decorator
+
+    layer_module = ModuleType("layer")
+    layer_module.log = lambda data: None  # type: ignore
+    layer_module.init = lambda project_name: None  # type: ignore
+    layer_module.login_with_api_key = lambda api_key: None  # type: ignore
+    decorators_module = ModuleType("layer.decorators")
+    decorators_module.model = model  # type: ignore
+    layer_module.decorators = decorators_module  # type: ignore
+
+    sys.modules["layer"] = layer_module
+    sys.modules["layer.decorators"] = decorators_module
+
+
+_install_layer_stub()
+
+
+TABLE_SIZES = [1_000, 10_000, 50_000]
+MANIFEST_SIZES = [100, 1_000, 5_000]
+
+
+def build_agate_table(row_count: int) -> agate.Table:
+    """
+    Builds an agate table which mimics the result of a warehouse fetch, decimals included
+    """
+    column_names = ["PassengerId", "Pclass", "Sex", "Age", "SibSp", "Parch", "Fare", "Name"]
+    column_types = [
+        agate.Number(),
+        agate.Number(),
+        agate.Number(),
+        agate.Number(),
+        agate.Number(),
+        agate.Number(),
+        agate.Number(),
+        agate.Text(),
+    ]
+    rows = [
+        [
+            decimal.Decimal(ix),
+            decimal.Decimal(ix % 3 + 1),
+            decimal.Decimal(ix % 2),
+            decimal.Decimal(f"{20 + ix % 50}.5"),
+            decimal.Decimal(ix % 4),
+            decimal.Decimal(ix % 2),
+            decimal.Decimal(f"{ix % 500}.25"),
+            f"passenger {ix}",
+        ]
+        for ix in range(row_count)
+    ]
+    return agate.Table(rows, column_names, column_types)
+
+
+def build_manifest_nodes(node_count: int) -> Dict[str, Any]:
+    nodes = {}
+    for ix in range(node_count):
+        node = ParsedModelNode.from_dict(
+            {
+                "resource_type": "model",
+                "database": "test-database",
+                "schema": "analytics",
+                "name": f"model_{ix}",
+                "alias": f"model_{ix}",
+                "package_name": "benchmark",
+                "root_path": "/tmp/benchmark",  # nosec
+                "path": f"model_{ix}.sql",
+                "original_file_path": f"models/model_{ix}.sql",
+                "unique_id": f"model.benchmark.model_{ix}",
+                "fqn": ["benchmark", f"model_{ix}"],
+                "checksum": {"name": "sha256", "checksum": str(ix)},
+                "raw_sql": "select 1",
+                "config": {},
+                "meta": {},
+            }
+        )
+        nodes[node.unique_id] = node
+    return nodes
+
+
+@pytest.fixture(params=TABLE_SIZES, ids=lambda size: f"{size}_rows")
+def agate_table(request: pytest.FixtureRequest) -> agate.Table:
+    return build_agate_table(request.param)  # type: ignore
+
+
+class ManifestAdapter:
+    """
+    Only the adapter state and methods used by the manifest lookups, the connection manager is not needed offline
+    """
+
+    Relation = BaseRelation
+    _get_manifest_node_from_relation_name: Callable[..., Any] = LayerAdapter._get_manifest_node_from_relation_name
+    _get_relation_names: Callable[..., Any] = LayerAdapter._get_relation_names
+
+    def __init__(self, manifest: Manifest) -> None:
+        self._manifest = manifest
+        self.config = SimpleNamespace(quoting={})
+
+    def relation_names(self) -> List[str]:
+        """
+        The relation names of the first, middle and last nodes of the manifest
+        """
+        nodes = list(self._manifest.nodes.values())
+        picked = [nodes[0], nodes[len(nodes) // 2], nodes[-1]]
+        return [self.Relation.create_from_node(self.config, node).render() for node in picked]
+
+
+@pytest.fixture(params=MANIFEST_SIZES, ids=lambda size: f"{size}_nodes")
+def manifest_adapter(request: pytest.FixtureRequest) -> ManifestAdapter:
+    return ManifestAdapter(Manifest(nodes=build_manifest_nodes(request.param)))  # type: ignore
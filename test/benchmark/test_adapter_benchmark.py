@@ -0,0 +1,48 @@
+# pylint: disable=protected-access
+from pathlib import Path
+from typing import Any
+
+import pytest
+
+from common.adapter import (
+    MANIFEST_FILE_NAME,
+    PARTIAL_PARSE_FILE_NAME,
+    _read_manifest_json,
+    _read_manifest_msgpack,
+)
+
+from .conftest import ManifestAdapter
+
+
+def test_get_manifest_node_from_relation_name(benchmark: Any, manifest_adapter: ManifestAdapter) -> None:
+    names = manifest_adapter.relation_names()
+
+    def lookup() -> None:
+        for name in names:
+            assert manifest_adapter._get_manifest_node_from_relation_name(name)
+
+    benchmark(lookup)
+
+
+def test_get_manifest_node_from_relation_name_missing(benchmark: Any, manifest_adapter: ManifestAdapter) -> None:
+    result = benchmark(
+        manifest_adapter._get_manifest_node_from_relation_name,
+        '"test-database"."analytics"."missing"',
+    )
+    assert result is None
+
+
+@pytest.mark.parametrize("file_name", [MANIFEST_FILE_NAME, PARTIAL_PARSE_FILE_NAME])
+def test_read_manifest_artifact(
+    benchmark: Any, manifest_adapter: ManifestAdapter, tmp_path: Path, file_name: str
+) -> None:
+    path = tmp_path / file_name
+    if file_name == MANIFEST_FILE_NAME:
+        manifest_adapter._manifest.write(str(path))
+        reader = _read_manifest_json
+    else:
+        path.write_bytes(manifest_adapter._manifest.to_msgpack())
+        reader = _read_manifest_msgpack
+
+    manifest = benchmark(reader, path)
+    assert len(manifest.nodes) == len(manifest_adapter._manifest.nodes)
@@ -0,0 +1,62 @@
+from pathlib import Path
+from typing import Any, Dict
+
+import agate  # type: ignore
+import pandas as pd  # type: ignore
+import pyarrow as pa  # type: ignore
+
+from common import arrow_helper
+
+
+def test_from_agate_table(benchmark: Any, agate_table: agate.Table) -> None:
+    table = benchmark(arrow_helper.from_agate_table, agate_table)
+    assert table.shape == (len(agate_table.rows), len(agate_table.column_names))
+
+
+def test_to_agate_table_with_path(benchmark: Any, agate_table: agate.Table, tmp_path: Path) -> None:
+    arrow_table = arrow_helper.from_agate_table(agate_table)
+    table = benchmark(arrow_helper.to_agate_table_with_path, arrow_table, tmp_path / "data.csv")
+    assert len(table.rows) == len(agate_table.rows)
+
+
+def test_predict_data_plane(benchmark: Any, agate_table: agate.Table, tmp_path: Path) -> None:
+    """
+    Runs the stages of a prediction, from the fetched rows to the written back table. The memory each stage
+    allocates is kept in the extra info of the benchmark. Only the model input is copied to pandas, the result
+    shares the source column data with the fetched table.
+    """
+    select_columns = ["PassengerId", "Name"]
+    predict_columns = ["Pclass", "Sex", "Age", "SibSp", "Parch", "Fare"]
+
+    def run() -> Dict[str, Any]:
+        stages: Dict[str, Any] = {}
+        allocated = pa.total_allocated_bytes()
+
+        def measure(stage: str) -> None:
+            nonlocal allocated
+            stages[f"{stage}_arrow_bytes"] = pa.total_allocated_bytes() - allocated
+            allocated = pa.total_allocated_bytes()
+
+        table = arrow_helper.from_agate_table(agate_table)
+        measure("fetch")
+        model_input = table.select(predict_columns).to_pandas()
+        measure("model_input")
+        stages["model_input_pandas_bytes"] = int(model_input.memory_usage(deep=True).sum())
+        predictions = pd.DataFrame((model_input["Pclass"] > 1).astype("int64"))
+        result = arrow_helper.concat_columns(
+            [table.select(select_columns), arrow_helper.from_dataframe(predictions, ["prediction"])]
+        )
+        measure("assemble")
+        arrow_helper.to_agate_table_with_path(result, tmp_path / "data.csv")
+        measure("write_back")
+        stages["result"] = result
+        stages["table"] = table
+        return stages
+
+    stages = benchmark(run)
+    result, table = stages.pop("result"), stages.pop("table")
+    benchmark.extra_info.update(stages)
+
+    assert stages["assemble_arrow_bytes"] == 0
+    for column in select_columns:
+        assert result.column(column).chunk(0).buffers()[1].address == table.column(column).chunk(0).buffers()[1].address
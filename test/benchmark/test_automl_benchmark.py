@@ -0,0 +1,54 @@
+from typing import Any, Type
+
+import numpy as np
+import pandas as pd  # type: ignore
+import pytest
+
+from common.automl import AutoML
+from common.automl_models.base_model import LARGE_DATA_ROWS, AutoMLModel, TrainDataset
+
+
+FEATURES = [f"feature_{ix}" for ix in range(8)]
+
+
+def build_training_dataframe(model_type: str, row_count: int = 1_000) -> pd.DataFrame:
+    rng = np.random.default_rng(42)
+    df = pd.DataFrame(rng.normal(size=(row_count, len(FEATURES))), columns=FEATURES)
+    signal = df["feature_0"] * 2 - df["feature_1"] + rng.normal(scale=0.1, size=row_count)
+    df["target"] = (signal > 0).astype(np.int64) if model_type == AutoMLModel.CLASSIFIER else signal
+    return df
+
+
+@pytest.mark.parametrize("model_type", [AutoMLModel.CLASSIFIER, AutoMLModel.REGRESSOR])
+def test_automl_train(benchmark: Any, model_type: str) -> None:
+    df = build_training_dataframe(model_type)
+
+    def train() -> None:
+        AutoML(model_type, df, FEATURES, "target").train("benchmark", f"{model_type}_model")
+
+    benchmark.pedantic(train, rounds=3, iterations=1)
+
+
+@pytest.mark.parametrize(
+    "automl_model",
+    [
+        automl_model
+        for automl_model in AutoML.automl_models
+        if automl_model.is_candidate(0) or automl_model.is_candidate(LARGE_DATA_ROWS)
+    ],
+    ids=lambda automl_model: automl_model.__name__,
+)
+def test_automl_model_train(benchmark: Any, automl_model: Type[AutoMLModel]) -> None:
+    """
+    Compares the training time and score of each candidate, exact split and histogram based alike, on the same data
+    """
+    model_type = automl_model().model_type
+    dataset = TrainDataset(build_training_dataframe(model_type, row_count=20_000), FEATURES, "target")
+
+    def train() -> AutoMLModel:
+        trainer = automl_model()
+        trainer.train(dataset)
+        return trainer
+
+    trainer = benchmark.pedantic(train, rounds=1, iterations=1)
+    benchmark.extra_info["score"] = trainer.score
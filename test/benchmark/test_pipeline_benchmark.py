@@ -0,0 +1,87 @@
+import shutil
+from pathlib import Path
+from typing import Any, List
+
+import pytest
+
+
+pytest.importorskip("dbt.adapters.duckdb")
+
+TITANIC_EXAMPLE_DIR = Path(__file__).parent.parent.parent / "examples" / "titanic"
+
+DBT_PROJECT_YAML = """
+name: 'titanic'
+version: '1.0.0'
+config-version: 2
+profile: 'layer-profile'
+model-paths: ["models"]
+seed-paths: ["seeds"]
+target-path: "target"
+"""
+
+# usage tracking would send events over the network while the pipeline is timed
+DBT_PROFILES_YAML = """
+config:
+  send_anonymous_usage_stats: false
+layer-profile:
+  target: dev
+  outputs:
+    dev:
+      type: layer_duckdb
+      path: {warehouse_path}
+      threads: 4
+      layer_backend: local
+      layer_local_registry: {registry_path}
+"""
+
+MODELS = {
+    "passenger_features.sql": (TITANIC_EXAMPLE_DIR / "models/passenger_features/passenger_features.sql").read_text(),
+    "survival_model.sql": """
+SELECT PassengerId,
+       layer.automl('classifier', ARRAY[Pclass, Sex, Age, SibSp, Parch, Fare], Survived)
+FROM {{ ref('passenger_features') }}
+""",
+    "predictions.sql": """
+-- depends_on: {{ ref('survival_model') }}
+SELECT PassengerId,
+       layer.predict("survival_model", ARRAY[Pclass, Sex, Age, SibSp, Parch, Fare]) as survived
+FROM {{ ref('passenger_features') }}
+""",
+}
+
+
+@pytest.fixture()
+def local_project(tmp_path: Path) -> Path:
+    """
+    The titanic example, training its own model with AutoML, on DuckDB and the local Layer backend
+    """
+    project_path = tmp_path / "titanic"
+    (project_path / "models").mkdir(parents=True)
+    (project_path / "dbt_project.yml").write_text(DBT_PROJECT_YAML)
+    (project_path / "profiles.yml").write_text(
+        DBT_PROFILES_YAML.format(warehouse_path=tmp_path / "warehouse.duckdb", registry_path=tmp_path / "registry")
+    )
+    shutil.copytree(TITANIC_EXAMPLE_DIR / "seeds", project_path / "seeds")
+    for file_name, sql in MODELS.items():
+        (project_path / "models" / file_name).write_text("{{ config(materialized='table') }}\n" + sql)
+    return project_path
+
+
+def test_local_train_predict_pipeline(benchmark: Any, local_project: Path) -> None:
+    dbt_args = ["--project-dir", str(local_project), "--profiles-dir", str(local_project)]
+    run_dbt(["seed"] + dbt_args)
+
+    results = benchmark.pedantic(run_dbt, args=(["run"] + dbt_args,), rounds=1, iterations=1)
+
+    assert [result.adapter_response.get("code") for result in results.results[1:]] == ["LAYER AUTOML", "LAYER PREDICT"]
+    assert results.results[2].adapter_response["rows_affected"] == 891
+
+
+def run_dbt(args: List[str]) -> Any:
+    from dbt.logger import log_manager  # type: ignore
+    from dbt.main import handle_and_check  # type: ignore
+
+    log_manager.reset_handlers()
+    results, succeeded = handle_and_check(args=args)
+    assert succeeded
+    return results
@@ -0,0 +1,85 @@
+from typing import Any
+
+import pytest
+
+from common.sql_parser import LayerSQLParser
+
+
+PREDICT_SQL_BIGQUERY = """
+  create or replace table `test-database`.`titanic`.`predictions`
+  OPTIONS()
+  as (
+    SELECT
+       PassengerId,
+       layer.predict("layer/titanic/models/survival_model:4.8",ARRAY[Pclass, Sex, Age, SibSp, Parch, Fare])
+    FROM
+       `test-database`.`titanic`.`passenger_features`
+  );
+"""
+
+PREDICT_SQL_SNOWFLAKE = """
+  create or replace transient table TEST_DATABASE.order_review.predictions  as
+  (SELECT order_id,
+       review_score,
+       layer.predict("review_score_predictor",
+                     ARRAY[days_between_purchase_and_delivery, order_approved_late,
+                     actual_delivery_vs_expectation_bucket, total_order_price, total_order_freight, is_multiItems_order,
+                     seller_shipped_late]) as review_prediction
+  FROM TEST_DATABASE.order_review.training_data
+  );
+"""
+
+AUTOML_SQL = """
+  create or replace table `test-database`.`order_review`.`review_score_predictor`
+  OPTIONS()
+  as (
+    SELECT order_id,
+       layer.automl('regressor',ARRAY[days_between_purchase_and_delivery, order_approved_late,
+                    actual_delivery_vs_expectation_bucket, total_order_price, total_order_freight, is_multiItems_order,
+                    seller_shipped_late],review_score)
+    FROM `test-database`.`order_review`.`training_data`
+  );
+"""
+
+TRAIN_SQL = """
+  create or replace table `test-database`.`ecommerce`.`customer_features`
+  OPTIONS()
+  as (
+    SELECT
+    layer.train(ARRAY[customer_id, product_id, customer_age])
+    FROM `test-database`.`ecommerce`.`customers`
+  );
+"""
+
+WIDE_PREDICT_SQL = f"""
+  create or replace table `test-database`.`features`.`wide_predictions`
+  OPTIONS()
+  as (
+    SELECT {", ".join(f"feature_{ix}" for ix in range(200))},
+       layer.predict("layer/features/models/wide_model", ARRAY[{", ".join(f"feature_{ix}" for ix in range(200))}])
+       as prediction
+    FROM `test-database`.`features`.`wide_features`
+    WHERE feature_0 is not null
+  );
+"""
+
+PASS_THROUGH_SQL = """
+  create or replace table `test-database`.`titanic`.`passenger_features`
+  OPTIONS()
+  as (
+    SELECT PassengerId, Pclass, SibSp, Parch, Fare, Survived,
+       case when Sex = 'female' then 0 when Sex = 'male' then 1 else 0 end as Sex,
+       case when Age is not null then Age when pclass = 1 then 37 when pclass = 2 then 29 else 24 end as Age
+    FROM `test-database`.`titanic`.`passengers`
+  );
+"""
+
+
+@pytest.mark.parametrize(
+    "sql",
+    [PREDICT_SQL_BIGQUERY, PREDICT_SQL_SNOWFLAKE, AUTOML_SQL, TRAIN_SQL, WIDE_PREDICT_SQL, PASS_THROUGH_SQL],
+    ids=["predict_bigquery", "predict_snowflake", "automl", "train", "predict_wide", "pass_through"],
+)
+def test_parse(benchmark: Any, sql: str) -> None:
+    parser = LayerSQLParser()
+    benchmark(parser.parse, sql)
@@ -0,0 +1,40 @@
+from pathlib import Path
+from types import SimpleNamespace
+from typing import Any, Callable, Optional, Type
+
+import pytest
+
+from common.adapter import LayerAdapter
+from common.credentials import LayerCredentials
+
+
+class OfflineAdapter(LayerAdapter):
+    """
+    A Layer adapter without a warehouse, tests override the methods reaching it. Its credentials are the given Layer
+    fields, the others unset like in a profile without them.
+    """
+
+    ConnectionManager = staticmethod(lambda config: None)
+
+    def __init__(self, project_root: Optional[Path] = None, **credentials: Any) -> None:
+        config = SimpleNamespace(target_path="target", quoting={}, credentials=LayerCredentials(**credentials))
+        if project_root is not None:
+            config.project_root = str(project_root)
+        super().__init__(config)
+
+
+# the warehouse specific methods are never called offline
+OfflineAdapter.__abstractmethods__ = frozenset()
+
+
+@pytest.fixture
+def offline_adapter(tmp_path: Path) -> Callable[..., OfflineAdapter]:
+    """
+    Builds offline adapters of the given class, with their project in the temporary directory and the given Layer
+    credentials fields
+    """
+
+    def build(adapter_class: Type[OfflineAdapter] = OfflineAdapter, **credentials: Any) -> OfflineAdapter:
+        return adapter_class(tmp_path, **credentials)
+
+    return build
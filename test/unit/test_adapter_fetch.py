@@ -0,0 +1,266 @@
+import re
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+from types import SimpleNamespace
+from typing import Any, ContextManager, Iterator, List, Optional
+
+import pyarrow as pa  # type: ignore
+import pytest
+from dbt.adapters.sql import SQLAdapter  # type: ignore
+from dbt.exceptions import RuntimeException  # type: ignore
+
+from common import arrow_helper
+from common.adapter import LayerAdapter, LayerMeta, ScanEstimate
+from common.spill import ArrowSpill
+from common.sql_parser import LayerTrainFunction
+
+from .conftest import OfflineAdapter
+
+
+WAIT_TIMEOUT = 5
+
+SOURCE_NODE = SimpleNamespace(unique_id="model.test.passengers", name="passengers")
+SOURCE_TABLE = pa.table({"id": list(range(10)), "fare": [float(ix) for ix in range(10)]})
+
+
+class FakeAdapter(OfflineAdapter):
+    """
+    A Layer adapter which runs the partition queries against an arrow table, over a fake connection per thread.
+    Fetches wait for each other, so they only complete if they run concurrently.
+    """
+
+    def __init__(self, concurrent_fetches: int = 1, scan_fetch_bytes: Optional[int] = None, **credentials: Any) -> None:
+        super().__init__(**credentials)
+        self.fetch_barrier = threading.Barrier(concurrent_fetches, timeout=WAIT_TIMEOUT)
+        self.thread_connection = threading.local()
+        self.connection_names: List[str] = []
+        self.fetch_threads: List[int] = []
+        self.fetched_sqls: List[str] = []
+        self.estimated_sqls: List[str] = []
+        self.scan_fetch_bytes = scan_fetch_bytes
+
+    @contextmanager
+    def connection_named(self, name: str, node: Optional[Any] = None) -> Iterator[None]:
+        self.connection_names.append(name)
+        self.thread_connection.name = name
+        try:
+            yield
+        finally:
+            self.thread_connection.name = None
+
+    def commit_if_has_connection(self) -> None:
+        pass
+
+    def _partition_filter(self, column: str, partitions: int, partition: int) -> str:
+        return f"{column} % {partitions} = {partition}"
+
+    def _estimate_scan(self, sql: str) -> Optional[ScanEstimate]:
+        assert self.thread_connection.name is not None
+        self.estimated_sqls.append(sql)
+        return ScanEstimate(
+            scan_bytes=SOURCE_TABLE.nbytes, rows=SOURCE_TABLE.num_rows, fetch_bytes=self.scan_fetch_bytes
+        )
+
+    def _fetch_arrow_batches(self, sql: str) -> pa.RecordBatchReader:
+        assert self.thread_connection.name is not None
+        self.fetch_barrier.wait()
+        self.fetch_threads.append(threading.get_ident())
+        self.fetched_sqls.append(sql)
+        table = SOURCE_TABLE
+        if sql.startswith("select count(*)"):
+            table = pa.table({"count": [table.num_rows]})
+        limit_match = re.search(r"limit (\d+)$", sql)
+        if limit_match is not None:
+            table = table.slice(0, int(limit_match.group(1)))
+        match = re.search(r"where (\w+) % (\d+) = (\d+)$", sql)
+        if match is not None:
+            column, partitions, partition = match.group(1), int(match.group(2)), int(match.group(3))
+            table = table.filter(pa.array([value % partitions == partition for value in table[column].to_pylist()]))
+        return pa.RecordBatchReader.from_batches(table.schema, table.to_batches(max_chunksize=4))
+
+
+def test_fetch_table_by_sql_partitioned() -> None:
+    adapter = FakeAdapter(concurrent_fetches=3)
+    layer_meta = LayerMeta(fetch_partitions=3, fetch_partition_column="id")
+
+    table = adapter._fetch_table_by_sql(SOURCE_NODE, "select id, fare from passengers", layer_meta=layer_meta)
+
+    assert table.column("id").to_pylist() == [0, 3, 6, 9, 1, 4, 7, 2, 5, 8]
+    assert table.column("fare").to_pylist() == [0.0, 3.0, 6.0, 9.0, 1.0, 4.0, 7.0, 2.0, 5.0, 8.0]
+    assert sorted(adapter.connection_names) == [f"model.test.passengers.partition_{ix}" for ix in range(3)]
+    assert len(set(adapter.fetch_threads)) == 3
+
+
+def test_fetch_table_by_sql_single_partition() -> None:
+    adapter = FakeAdapter()
+
+    table = adapter._fetch_table_by_sql(SOURCE_NODE, "select id, fare from passengers", layer_meta=LayerMeta())
+
+    assert table.equals(SOURCE_TABLE)
+    assert adapter.connection_names == ["model.test.passengers"]
+    assert adapter.fetch_threads == [threading.get_ident()]
+
+
+def test_fetch_table_by_sql_partitioned_without_column() -> None:
+    adapter = FakeAdapter()
+
+    with pytest.raises(RuntimeException, match="Missing 'fetch_partition_column' to fetch 3 partitions of passengers"):
+        adapter._fetch_table_by_sql(SOURCE_NODE, "select * from passengers", layer_meta=LayerMeta(fetch_partitions=3))
+
+
+def test_fetch_table_by_sql_partitioned_spilled(tmp_path: Path) -> None:
+    adapter = FakeAdapter(concurrent_fetches=2)
+    layer_meta = LayerMeta(fetch_partitions=2, fetch_partition_column="id")
+
+    with ArrowSpill(0, str(tmp_path)) as spill:
+        table = adapter._fetch_table_by_sql(SOURCE_NODE, "select * from passengers", layer_meta=layer_meta, spill=spill)
+
+        assert spill.spilled
+        assert sorted(table.column("id").to_pylist()) == list(range(10))
+        assert len(list(tmp_path.glob("layer-spill-*/*.arrow"))) == 2
+    assert not list(tmp_path.iterdir())
+
+
+def test_fetch_table_by_sql_within_scan_budget() -> None:
+    adapter = FakeAdapter(layer_scan_budget_mb=1)
+
+    table = adapter._fetch_table_by_sql(SOURCE_NODE, "select id, fare from passengers", layer_meta=LayerMeta())
+
+    assert table.equals(SOURCE_TABLE)
+    assert adapter.estimated_sqls == ["select id, fare from passengers"]
+
+
+def test_fetch_table_by_sql_over_scan_budget() -> None:
+    adapter = FakeAdapter(layer_scan_budget_mb=1)
+
+    with pytest.raises(RuntimeException, match="Fetching passengers scans an estimated 0.0 MB, over its 0 MB budget"):
+        adapter._fetch_table_by_sql(SOURCE_NODE, "select * from passengers", layer_meta=LayerMeta(scan_budget_mb=0))
+    assert adapter.fetch_threads == []
+
+
+def test_fetch_table_by_sql_over_scan_budget_spilled(tmp_path: Path) -> None:
+    adapter = FakeAdapter(concurrent_fetches=2, layer_scan_budget_mb=0)
+    layer_meta = LayerMeta(fetch_partitions=2, fetch_partition_column="id", scan_budget_exceeded="spill")
+
+    with ArrowSpill(None, str(tmp_path)) as spill:
+        table = adapter._fetch_table_by_sql(SOURCE_NODE, "select * from passengers", layer_meta=layer_meta, spill=spill)
+
+        assert spill.spilled
+        assert sorted(table.column("id").to_pylist()) == list(range(10))
+    assert adapter.estimated_sqls == ["select * from passengers"]
+
+
+def test_estimate_fetch_memory() -> None:
+    adapter = FakeAdapter()
+
+    nbytes = adapter._estimate_fetch_memory(SOURCE_NODE, "select * from passengers")
+
+    assert nbytes == SOURCE_TABLE.nbytes
+    assert adapter.connection_names == ["model.test.passengers"]
+
+
+def test_estimate_fetch_memory_from_scan_estimate() -> None:
+    adapter = FakeAdapter(layer_scan_budget_mb=1, scan_fetch_bytes=1234)
+
+    nbytes = adapter._estimate_fetch_memory(SOURCE_NODE, "select * from passengers")
+    adapter._fetch_table_by_sql(SOURCE_NODE, "select * from passengers", layer_meta=LayerMeta())
+
+    assert nbytes == 1234
+    # the fetch reused the estimate for its scan budget, and only the data was fetched
+    assert adapter.estimated_sqls == ["select * from passengers"]
+    assert adapter.fetched_sqls == ["select * from passengers"]
+
+
+def admit_train_statement(adapter: FakeAdapter) -> ContextManager[None]:
+    train_function = LayerTrainFunction("passengers", "survival_model", ["age", "fare"])
+    relation = SimpleNamespace(render=lambda: "passengers")
+    target_node = SimpleNamespace(name="survival_model", meta={})
+    return adapter._admit_statement(train_function, SOURCE_NODE, relation, target_node, ArrowSpill(None))
+
+
+def test_admit_statement_estimates_fetch() -> None:
+    adapter = FakeAdapter(layer_concurrent_memory_budget_mb=1)
+
+    with admit_train_statement(adapter):
+        assert adapter._memory_admission.admitted_bytes == SOURCE_TABLE.nbytes
+
+    assert len(adapter.fetched_sqls) == 2
+    assert adapter._scan_estimates == {}
+
+
+def test_admit_statement_with_cached_source() -> None:
+    adapter = FakeAdapter(layer_concurrent_memory_budget_mb=1, layer_source_cache_mb=1)
+    adapter._fetch_table(SOURCE_NODE, SimpleNamespace(render=lambda: "passengers"))
+
+    with admit_train_statement(adapter):
+        assert adapter._memory_admission.admitted_bytes == SOURCE_TABLE.nbytes
+
+    # the source was fetched once to be cached, and not queried to be estimated
+    assert adapter.fetched_sqls == ["select * from passengers"]
+    assert adapter.estimated_sqls == []
+
+
+def test_fetch_source_table_cached() -> None:
+    adapter = FakeAdapter(layer_source_cache_mb=1)
+
+    table = adapter._fetch_source_table(SOURCE_NODE, "select * from passengers", None, "")
+    fares = adapter._fetch_source_table(SOURCE_NODE, "select fare from passengers", ["fare"], "")
+
+    assert table.equals(SOURCE_TABLE)
+    assert fares.equals(SOURCE_TABLE.select(["fare"]))
+    assert len(adapter.fetch_threads) == 1
+
+
+def test_fetch_source_table_cache_disabled() -> None:
+    adapter = FakeAdapter()
+
+    adapter._fetch_source_table(SOURCE_NODE, "select * from passengers", None, "")
+    adapter._fetch_source_table(SOURCE_NODE, "select * from passengers", None, "")
+
+    assert len(adapter.fetch_threads) == 2
+
+
+def test_fetch_source_table_spilled_not_cached(tmp_path: Path) -> None:
+    adapter = FakeAdapter(layer_source_cache_mb=1)
+
+    with ArrowSpill(0, str(tmp_path)) as spill:
+        adapter._fetch_source_table(SOURCE_NODE, "select * from passengers", None, "", LayerMeta(), spill)
+    table = adapter._fetch_source_table(SOURCE_NODE, "select * from passengers", None, "")
+
+    assert table.equals(SOURCE_TABLE)
+    assert len(adapter.fetch_threads) == 2
+
+
+def test_source_cache_invalidated_by_rebuild() -> None:
+    adapter = FakeAdapter(layer_source_cache_mb=1)
+    adapter._fetch_source_table(SOURCE_NODE, "select * from passengers", None, "")
+    executed_sqls: List[str] = []
+
+    def execute(sql: str, auto_begin: bool = False, fetch: bool = False) -> Any:
+        executed_sqls.append(sql)
+        return None, None
+
+    # the statements of the node building the source run on a connection named after it
+    adapter.connections = SimpleNamespace(
+        get_if_exists=lambda: SimpleNamespace(name=SOURCE_NODE.unique_id), execute=execute
+    )
+    adapter.execute("create table passengers as select 1 as id")
+    adapter._fetch_source_table(SOURCE_NODE, "select * from passengers", None, "")
+
+    assert executed_sqls == ["create table passengers as select 1 as id"]
+    assert len(adapter.fetch_threads) == 2
+
+
+class LayerSQLAdapter(LayerAdapter, SQLAdapter):
+    pass
+
+
+def test_convert_number_type_from_schema(tmp_path: Path) -> None:
+    # the float column holds whole numbers only, agate would infer integers from them
+    arrow_table = pa.table({"id": [1, 2], "fare": [1.0, 2.0], "score": [None, None]})
+    table = arrow_helper.to_agate_table_with_path(arrow_table, tmp_path / "data.csv")
+
+    column_types = [LayerSQLAdapter.convert_type(table, ix) for ix in range(len(table.columns))]
+
+    assert column_types == ["integer", "float8", "integer"]
@@ -0,0 +1,139 @@
+# pylint: disable=protected-access
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from types import SimpleNamespace
+from typing import Any, Callable, Dict, Tuple
+
+import agate  # type: ignore
+import pytest
+from dbt.contracts.graph.manifest import Manifest, ManifestMetadata  # type: ignore
+from dbt.contracts.graph.parsed import ParsedModelNode  # type: ignore
+from dbt.events.functions import get_invocation_id  # type: ignore
+from dbt.parser.manifest import ManifestLoader  # type: ignore
+
+from common.adapter import (
+    MANIFEST_FILE_NAME,
+    PARTIAL_PARSE_FILE_NAME,
+    LayerAdapter,
+    LayerAdapterResponse,
+)
+from common.sql_parser import LayerPredictFunction
+
+from .conftest import OfflineAdapter
+
+
+class ManifestAdapter(OfflineAdapter):
+    """
+    A Layer adapter without a warehouse, its Layer predictions only resolve their nodes from the manifest
+    """
+
+    def _run_layer_predict(
+        self, layer_sql_function: LayerPredictFunction, source_node: Any, *args: Any
+    ) -> Tuple[LayerAdapterResponse, agate.Table]:
+        table = agate.Table([[source_node.name]], ["source"])
+        return LayerAdapterResponse(_message="LAYER PREDICT", code="LAYER PREDICT"), table
+
+
+def test_read_target_manifest_json(tmp_path: Path) -> None:
+    write_manifest_json(tmp_path, get_invocation_id())
+
+    manifest_source = LayerAdapter._read_target_manifest(adapter_for(tmp_path))
+
+    assert manifest_source is not None
+    manifest, source = manifest_source
+    assert source == str(tmp_path / "target" / MANIFEST_FILE_NAME)
+    assert list(manifest.nodes) == ["model.test.model_0"]
+    assert manifest.flat_graph
+
+
+def test_read_target_manifest_msgpack(tmp_path: Path) -> None:
+    write_manifest_json(tmp_path, "another-invocation")
+    (tmp_path / "target" / PARTIAL_PARSE_FILE_NAME).write_bytes(build_manifest(get_invocation_id()).to_msgpack())
+
+    manifest_source = LayerAdapter._read_target_manifest(adapter_for(tmp_path))
+
+    assert manifest_source is not None
+    manifest, source = manifest_source
+    assert source == str(tmp_path / "target" / PARTIAL_PARSE_FILE_NAME)
+    assert list(manifest.nodes) == ["model.test.model_0"]
+
+
+def test_read_target_manifest_ignores_stale_artifacts(tmp_path: Path) -> None:
+    write_manifest_json(tmp_path, get_invocation_id())
+    manifest_path = tmp_path / "target" / MANIFEST_FILE_NAME
+    os.utime(manifest_path, (time.time() - 60, time.time() - 60))
+
+    assert LayerAdapter._read_target_manifest(adapter_for(tmp_path)) is None
+
+
+def test_read_target_manifest_missing(tmp_path: Path) -> None:
+    assert LayerAdapter._read_target_manifest(adapter_for(tmp_path)) is None
+
+
+def test_load_manifest_concurrent_execute(
+    offline_adapter: Callable[..., OfflineAdapter], monkeypatch: pytest.MonkeyPatch
+) -> None:
+    node_count = 200
+    manifest = build_manifest(get_invocation_id(), node_count)
+    full_parses = []
+
+    def get_full_manifest(config: Any) -> Manifest:
+        full_parses.append(threading.get_ident())
+        time.sleep(0.2)
+        return manifest
+
+    monkeypatch.setattr(ManifestLoader, "get_full_manifest", get_full_manifest)
+    adapter = offline_adapter(ManifestAdapter)
+
+    def execute(ix: int) -> str:
+        sql = f"""
+  create table "test-database"."analytics"."model_{ix + 1}__dbt_tmp" as (
+    SELECT id, layer.predict("model", ARRAY[id]) as prediction FROM "test-database"."analytics"."model_{ix}"
+  );
+"""
+        _, table = adapter.execute(sql)
+        return table.rows[0]["source"]
+
+    with ThreadPoolExecutor(max_workers=16) as executor:
+        sources = list(executor.map(execute, range(node_count - 1)))
+
+    assert len(full_parses) == 1
+    assert sources == [f"model_{ix}" for ix in range(node_count - 1)]
+
+
+def adapter_for(project_root: Path) -> Any:
+    return SimpleNamespace(
+        config=SimpleNamespace(project_root=str(project_root), target_path="target"),
+        _created_at=time.time() - 10,
+    )
+
+
+def write_manifest_json(project_root: Path, invocation_id: str) -> None:
+    (project_root / "target").mkdir(exist_ok=True)
+    build_manifest(invocation_id).write(str(project_root / "target" / MANIFEST_FILE_NAME))
+
+
+def build_manifest(invocation_id: str, node_count: int = 1) -> Manifest:
+    nodes = {}
+    for ix in range(node_count):
+        node_name = f"model_{ix}"
+        node: Dict[str, Any] = {
+            "resource_type": "model",
+            "database": "test-database",
+            "schema": "analytics",
+            "name": node_name,
+            "alias": node_name,
+            "package_name": "test",
+            "root_path": "/tmp/test",  # nosec
+            "path": f"{node_name}.sql",
+            "original_file_path": f"models/{node_name}.sql",
+            "unique_id": f"model.test.{node_name}",
+            "fqn": ["test", node_name],
+            "checksum": {"name": "sha256", "checksum": str(ix)},
+            "raw_sql": "select 1",
+        }
+        nodes[node["unique_id"]] = ParsedModelNode.from_dict(node)
+    return Manifest(nodes=nodes, metadata=ManifestMetadata(invocation_id=invocation_id))
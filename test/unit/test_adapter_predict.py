@@ -0,0 +1,239 @@
+import re
+import threading
+from types import SimpleNamespace
+from typing import Any, Dict, List, Optional, Tuple
+
+import agate  # type: ignore
+import numpy as np
+import pandas as pd  # type: ignore
+import pyarrow as pa  # type: ignore
+import pytest
+from dbt.exceptions import RuntimeException  # type: ignore
+from sklearn.linear_model import LinearRegression  # type: ignore
+
+from common.adapter import LayerMeta
+from common.layer_backend import LayerBackend
+from common.spill import ArrowSpill
+from common.sql_parser import LayerPredictFunction, LayerSQLParser
+
+from .conftest import OfflineAdapter
+
+
+WAIT_TIMEOUT = 5
+
+PREDICT_SQL = """
+CREATE OR REPLACE TABLE `test-database`.`analytics`.`predictions` AS (
+    SELECT id, layer.predict("titanic/models/survival", ARRAY[age, fare]) as survived
+    FROM `test-database`.`analytics`.`passengers`
+)
+"""
+# the prediction is selected before the source columns, predictions in Python load it after them
+PREDICTION_FIRST_SQL = """
+CREATE OR REPLACE TABLE predictions AS (
+    SELECT layer.predict("titanic/models/survival", ARRAY[age, fare]) as survived, id, fare
+    FROM passengers
+)
+"""
+
+
+class SumModel:
+    def __init__(self) -> None:
+        self.loaded = False
+        self.predicted_rows = 0
+
+    def get_train(self) -> Any:
+        self.loaded = True
+        return self
+
+    def predict(self, input_df: pd.DataFrame) -> pd.DataFrame:
+        assert self.loaded
+        self.predicted_rows += len(input_df)
+        return pd.DataFrame(input_df.sum(axis=1))
+
+
+class TrainedModel:
+    def __init__(self, trained_model: Any) -> None:
+        self.trained_model = trained_model
+
+    def get_train(self) -> Any:
+        return self.trained_model
+
+    def predict(self, input_df: pd.DataFrame) -> pd.DataFrame:
+        return pd.DataFrame(self.trained_model.predict(input_df))
+
+
+class BlockingBackend(LayerBackend):
+    """
+    Only returns models once the source fetch has started, or raises the given error
+    """
+
+    def __init__(
+        self, fetch_started: threading.Event, error: Optional[Exception] = None, trained_model: Any = None
+    ) -> None:
+        self.fetch_started = fetch_started
+        self.error = error
+        self.trained_model = trained_model
+        self.model_requested = threading.Event()
+        self.requested_models: List[str] = []
+
+    def login_with_api_key(self, api_key: str) -> None:
+        pass
+
+    def init(self, project_name: str) -> None:
+        pass
+
+    def get_model(self, name: str) -> Any:
+        self.requested_models.append(name)
+        self.model_requested.set()
+        assert self.fetch_started.wait(WAIT_TIMEOUT)
+        if self.error is not None:
+            raise self.error
+        if self.trained_model is not None:
+            return TrainedModel(self.trained_model)
+        return SumModel()
+
+
+class PredictAdapter(OfflineAdapter):
+    """
+    A Layer adapter which fetches the source table from memory, and waits for a model to be requested meanwhile
+    """
+
+    def __init__(self, backend: BlockingBackend, fetch_started: threading.Event, fetch_error: Optional[Exception]):
+        super().__init__(layer_api_key="api-key", layer_project="titanic")
+        self._layer_backend_lazy = backend
+        self.fetch_started = fetch_started
+        self.fetch_error = fetch_error
+        self.source_table = pa.table({"id": [1, 2], "age": [20.5, 30.0], "fare": [7.25, 10.0]})
+        self.loaded_table: Optional[pa.Table] = None
+        self.executed_sqls: List[str] = []
+        self.connections = SimpleNamespace(execute=self.execute_in_warehouse)
+
+    def execute_in_warehouse(self, sql: str, auto_begin: bool = False, fetch: bool = False) -> Tuple[Any, agate.Table]:
+        self.executed_sqls.append(sql)
+        return SimpleNamespace(rows_affected=2), agate.Table([])
+
+    def _fetch_table_by_sql(
+        self,
+        node: Any,
+        sql: str,
+        query_column_names: Optional[List[str]] = None,
+        layer_meta: Optional[LayerMeta] = None,
+        spill: Optional[ArrowSpill] = None,
+    ) -> pa.Table:
+        self.fetch_started.set()
+        assert self._layer_backend_lazy.model_requested.wait(WAIT_TIMEOUT)  # type: ignore
+        if self.fetch_error is not None:
+            raise self.fetch_error
+        return self.source_table
+
+    def _load_table(self, node: Any, arrow_table: pa.Table) -> Tuple[Dict[Any, Any], agate.Table]:
+        self.loaded_table = arrow_table
+        return {}, agate.Table([])
+
+
+def test_predict_fetches_models_during_source_fetch() -> None:
+    adapter = predict_adapter()
+
+    response, _ = run_predict(adapter)
+
+    assert adapter._layer_backend_lazy.requested_models == ["titanic/models/survival"]  # type: ignore
+    assert response.rows_affected == 2
+    assert adapter.loaded_table is not None
+    assert adapter.loaded_table.to_pydict() == {"id": [1, 2], "survived": [27.75, 40.0]}
+
+
+def test_predict_raises_model_errors() -> None:
+    adapter = predict_adapter(model_error=RuntimeException("Model not found"))
+
+    with pytest.raises(RuntimeException, match="Model not found"):
+        run_predict(adapter)
+    assert adapter.loaded_table is None
+
+
+def test_predict_raises_fetch_errors() -> None:
+    adapter = predict_adapter(fetch_error=RuntimeException("Table not found"))
+
+    with pytest.raises(RuntimeException, match="Table not found"):
+        run_predict(adapter)
+    assert adapter.loaded_table is None
+    # the models download doesn't outlive the statement
+    assert not [thread for thread in threading.enumerate() if thread.name.startswith("layer-models")]
+
+
+def test_predict_pushdown() -> None:
+    model = LinearRegression().fit(pd.DataFrame({"age": [20.0, 30.0, 40.0], "fare": [1.0, 3.0, 2.0]}), [1, 2, 3])
+    adapter = predict_adapter(model=model)
+    # the source is never fetched
+    adapter.fetch_started.set()
+
+    response, _ = run_predict(adapter, predict_pushdown=True)
+
+    assert response.code == "LAYER PREDICT"
+    assert response.rows_affected == 2
+    assert adapter.loaded_table is None
+    assert len(adapter.executed_sqls) == 1
+    assert "layer.predict" not in adapter.executed_sqls[0]
+    assert re.search(r"SELECT id, \(.+ \* age \+ .+ \* fare \+ .+\) as survived\s+FROM", adapter.executed_sqls[0])
+
+
+def test_predict_pushdown_same_table_as_python() -> None:
+    # duckdb only comes with the duckdb extra
+    duckdb = pytest.importorskip("duckdb")
+    model = LinearRegression().fit(pd.DataFrame({"age": [20.0, 30.0, 40.0], "fare": [1.0, 3.0, 2.0]}), [1, 2, 3])
+    python_adapter = predict_adapter(model=model)
+    pushdown_adapter = predict_adapter(model=model)
+    pushdown_adapter.fetch_started.set()
+
+    run_predict(python_adapter, PREDICTION_FIRST_SQL)
+    run_predict(pushdown_adapter, PREDICTION_FIRST_SQL, predict_pushdown=True)
+    connection = duckdb.connect()
+    connection.register("passengers", pushdown_adapter.source_table)
+    connection.execute(pushdown_adapter.executed_sqls[0])
+    pushdown_table = connection.execute("select * from predictions").arrow()
+
+    python_table = python_adapter.loaded_table
+    assert python_table is not None
+    assert pushdown_table.column_names == python_table.column_names == ["id", "fare", "survived"]
+    for column in python_table.column_names:
+        np.testing.assert_allclose(pushdown_table[column].to_numpy(), python_table[column].to_numpy())
+
+
+def test_predict_pushdown_falls_back() -> None:
+    adapter = predict_adapter()
+    adapter.fetch_started.set()
+
+    response, _ = run_predict(adapter, predict_pushdown=True)
+
+    assert response.rows_affected == 2
+    assert adapter.executed_sqls == []
+    assert adapter.loaded_table is not None
+    assert adapter.loaded_table.to_pydict() == {"id": [1, 2], "survived": [27.75, 40.0]}
+
+
+def test_predict_deduplicate() -> None:
+    model = SumModel().get_train()
+    adapter = predict_adapter(model=model)
+    adapter.source_table = pa.table(
+        {"id": [1, 2, 3, 4, 5], "age": [20.5, 30.0, 20.5, None, None], "fare": [7.25, 10.0, 7.25, 8.0, 8.0]}
+    )
+
+    response, _ = run_predict(adapter, predict_deduplicate=True)
+
+    assert response.deduplication_ratio == 0.6
+    assert model.predicted_rows == 3
+    assert adapter.loaded_table is not None
+    assert adapter.loaded_table.to_pydict() == {"id": [1, 2, 3, 4, 5], "survived": [27.75, 40.0, 27.75, 8.0, 8.0]}
+
+
+def predict_adapter(
+    model_error: Optional[Exception] = None, fetch_error: Optional[Exception] = None, model: Any = None
+) -> PredictAdapter:
+    fetch_started = threading.Event()
+    return PredictAdapter(BlockingBackend(fetch_started, model_error, model), fetch_started, fetch_error)
+
+
+def run_predict(adapter: PredictAdapter, sql: str = PREDICT_SQL, **layer_meta: Any) -> Tuple[Any, agate.Table]:
+    layer_sql_function = LayerSQLParser().parse(sql)
+    assert isinstance(layer_sql_function, LayerPredictFunction)
+    node = SimpleNamespace(fqn=["titanic", "predictions"], meta={"layer": layer_meta})
+    return adapter._run_layer_predict(layer_sql_function, node, None, node, None)  # pylint: disable=protected-access
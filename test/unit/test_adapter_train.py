@@ -0,0 +1,125 @@
+from contextlib import contextmanager
+from pathlib import Path
+from types import SimpleNamespace
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+import agate  # type: ignore
+import pandas as pd  # type: ignore
+import pyarrow as pa  # type: ignore
+import pyarrow.parquet as pq  # type: ignore
+import pytest
+from dbt.exceptions import RuntimeException  # type: ignore
+
+from common.arrow_helper import DataFrameBatches
+from common.layer_backend import LocalLayerBackend
+from common.spill import ArrowSpill
+from common.sql_parser import LayerSQLParser, LayerTrainFunction
+
+from .conftest import OfflineAdapter
+
+
+TRAIN_SQL = """
+CREATE OR REPLACE TABLE `test-database`.`analytics`.`survival_model` AS (
+    SELECT layer.train(ARRAY[age, fare]) FROM `test-database`.`analytics`.`passengers`
+)
+"""
+
+SOURCE_TABLE = pa.table({"id": list(range(10)), "age": [20.0 + ix for ix in range(10)], "fare": [7.25] * 10})
+
+
+class TrainAdapter(OfflineAdapter):
+    """
+    A Layer adapter which fetches the source table from memory, in batches of 4 rows, and trains with the given
+    entrypoint in a local registry
+    """
+
+    def __init__(self, registry_path: Path, entrypoint_main: Any) -> None:
+        super().__init__(layer_project="titanic")
+        self._layer_backend_lazy = LocalLayerBackend(registry_path)
+        self.entrypoint_main = entrypoint_main
+        self.fetched_sqls: List[str] = []
+
+    def _get_layer_entrypoint_module(self, node: Any) -> Any:
+        return SimpleNamespace(main=self.entrypoint_main)
+
+    @contextmanager
+    def connection_named(self, name: str, node: Optional[Any] = None) -> Iterator[None]:
+        yield
+
+    def commit_if_has_connection(self) -> None:
+        pass
+
+    def _fetch_arrow_batches(self, sql: str) -> pa.RecordBatchReader:
+        self.fetched_sqls.append(sql)
+        return pa.RecordBatchReader.from_batches(SOURCE_TABLE.schema, SOURCE_TABLE.to_batches(max_chunksize=4))
+
+    def _load_table(self, node: Any, arrow_table: pa.Table) -> Tuple[Dict[Any, Any], agate.Table]:
+        return {}, agate.Table([])
+
+
+def run_train(adapter: TrainAdapter, spill: ArrowSpill, **layer_meta: Any) -> Any:
+    layer_sql_function = LayerSQLParser().parse(TRAIN_SQL)
+    assert isinstance(layer_sql_function, LayerTrainFunction)
+    node = SimpleNamespace(
+        unique_id="model.titanic.survival_model", name="survival_model", fqn=["titanic"], meta={"layer": layer_meta}
+    )
+    relation = SimpleNamespace(render=lambda: "`test-database`.`analytics`.`passengers`")
+    return adapter._run_layer_train(layer_sql_function, node, relation, node, None, spill)
+
+
+def test_train_dataframe(tmp_path: Path) -> None:
+    train_inputs: List[Any] = []
+    adapter = TrainAdapter(tmp_path / "registry", lambda train_input: train_inputs.append(train_input))
+
+    with ArrowSpill(None, str(tmp_path)) as spill:
+        run_train(adapter, spill)
+
+        assert not spill.spilled
+    assert len(train_inputs) == 1
+    pd.testing.assert_frame_equal(train_inputs[0], SOURCE_TABLE.select(["age", "fare"]).to_pandas())
+
+
+def test_train_batches(tmp_path: Path) -> None:
+    epochs: List[List[pd.DataFrame]] = []
+
+    def main(batches: DataFrameBatches) -> Any:
+        assert batches.columns == ["age", "fare"] and batches.num_rows == 10
+        # batches can be iterated for several epochs
+        epochs.extend([list(batches), list(batches)])
+        return "model"
+
+    adapter = TrainAdapter(tmp_path / "registry", main)
+
+    with ArrowSpill(None, str(tmp_path)) as spill:
+        run_train(adapter, spill, train_input="batches")
+
+        assert spill.spilled
+    assert [[len(batch) for batch in epoch] for epoch in epochs] == [[4, 4, 2], [4, 4, 2]]
+    pd.testing.assert_frame_equal(
+        pd.concat(epochs[0], ignore_index=True), SOURCE_TABLE.select(["age", "fare"]).to_pandas()
+    )
+
+
+def test_train_parquet(tmp_path: Path) -> None:
+    parquet_paths: List[Path] = []
+
+    def main(parquet_path: str) -> Any:
+        parquet_paths.append(Path(parquet_path))
+        assert pq.read_table(parquet_path).equals(SOURCE_TABLE.select(["age", "fare"]))
+        return "model"
+
+    adapter = TrainAdapter(tmp_path / "registry", main)
+
+    with ArrowSpill(None, str(tmp_path)) as spill:
+        run_train(adapter, spill, train_input="parquet")
+
+    assert parquet_paths[0].parent == tmp_path
+    assert not parquet_paths[0].exists()
+
+
+def test_train_unknown_input(tmp_path: Path) -> None:
+    adapter = TrainAdapter(tmp_path / "registry", lambda train_input: None)
+
+    with pytest.raises(RuntimeException, match='Unknown train_input "arrow" of survival_model'):
+        run_train(adapter, ArrowSpill(None), train_input="arrow")
+    assert not adapter.fetched_sqls
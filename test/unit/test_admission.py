@@ -0,0 +1,66 @@
+import threading
+from typing import List
+
+from common.admission import MemoryAdmission
+
+
+WAIT_TIMEOUT = 5
+
+
+def admit_in_thread(
+    admission: MemoryAdmission, nbytes: int, memory_budget: int, admitted: List[int]
+) -> threading.Thread:
+    def run() -> None:
+        with admission.admit(nbytes, memory_budget):
+            admitted.append(nbytes)
+
+    thread = threading.Thread(target=run)
+    thread.start()
+    return thread
+
+
+def test_admit_within_budget() -> None:
+    admission = MemoryAdmission()
+
+    with admission.admit(40, 100), admission.admit(60, 100):
+        assert admission.admitted_bytes == 100
+    assert admission.admitted_bytes == 0
+
+
+def test_admit_waits_for_memory() -> None:
+    admission = MemoryAdmission()
+    admitted: List[int] = []
+
+    with admission.admit(60, 100):
+        thread = admit_in_thread(admission, 50, 100, admitted)
+        thread.join(0.1)
+        assert thread.is_alive()
+        assert not admitted
+    thread.join(WAIT_TIMEOUT)
+
+    assert admitted == [50]
+    assert admission.admitted_bytes == 0
+
+
+def test_admit_over_budget_alone() -> None:
+    admission = MemoryAdmission()
+
+    with admission.admit(500, 100):
+        assert admission.admitted_bytes == 500
+
+
+def test_admit_in_order() -> None:
+    admission = MemoryAdmission()
+    admitted: List[int] = []
+
+    with admission.admit(60, 100):
+        large_thread = admit_in_thread(admission, 80, 100, admitted)
+        large_thread.join(0.1)
+        # the small statement would fit, it waits for the large one ahead of it
+        small_thread = admit_in_thread(admission, 10, 100, admitted)
+        small_thread.join(0.1)
+        assert small_thread.is_alive()
+    large_thread.join(WAIT_TIMEOUT)
+    small_thread.join(WAIT_TIMEOUT)
+
+    assert admitted == [80, 10]
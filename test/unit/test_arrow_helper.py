@@ -0,0 +1,174 @@
+import datetime
+import decimal
+from pathlib import Path
+from typing import Iterator, List
+
+import agate  # type: ignore
+import pandas as pd  # type: ignore
+import pyarrow as pa  # type: ignore
+
+from common import arrow_helper
+
+
+def test_from_agate_table() -> None:
+    agate_table = agate.Table(
+        [
+            [decimal.Decimal(1), decimal.Decimal("1.5"), "a"],
+            [decimal.Decimal(2), None, None],
+        ],
+        ["id", "score", "name"],
+        [agate.Number(), agate.Number(), agate.Text()],
+    )
+
+    table = arrow_helper.from_agate_table(agate_table)
+
+    assert table.schema.types == [pa.int64(), pa.float64(), pa.string()]
+    assert table.to_pydict() == {"id": [1, 2], "score": [1.5, None], "name": ["a", None]}
+
+
+def test_to_agate_table_with_path(tmp_path: Path) -> None:
+    dataframe = pd.DataFrame(
+        {
+            "whole": [1.0, 2.0],
+            "whole_with_null": [1.0, None],
+            "fraction": [1.5, 2.0],
+            "integer": [1, 2],
+            "flag": [True, False],
+            "name": ["a", None],
+            "timestamp": [datetime.datetime(2022, 1, 1, 10, 30), datetime.datetime(2022, 1, 2, 11, 30)],
+            "timestamp_utc": pd.to_datetime(["2022-01-01 10:30:00.5", "2022-01-02 11:30"]).tz_localize("UTC"),
+        }
+    )
+    path = tmp_path / "data.csv"
+
+    table = arrow_helper.to_agate_table_with_path(pa.Table.from_pandas(dataframe), path)
+
+    assert path.read_text().splitlines() == [
+        '"whole","whole_with_null","fraction","integer","flag","name","timestamp","timestamp_utc"',
+        '1,1,1.5,1,true,"a","2022-01-01 10:30:00","2022-01-01 10:30:00.500000+00:00"',
+        '2,,2,2,false,,"2022-01-02 11:30:00","2022-01-02 11:30:00.000000+00:00"',
+    ]
+    assert table.original_abspath == path
+    assert [type(column_type).__name__ for column_type in table.column_types] == [
+        "SchemaNumber",
+        "SchemaNumber",
+        "SchemaNumber",
+        "SchemaNumber",
+        "Boolean",
+        "Text",
+        "DateTime",
+        "Text",
+    ]
+    # whole floats stay fractional numbers, whatever their values
+    assert [column_type.whole for column_type in table.column_types[:4]] == [False, False, False, True]
+    assert list(table.rows[0]) == [
+        decimal.Decimal("1.0"),
+        decimal.Decimal("1.0"),
+        decimal.Decimal("1.5"),
+        decimal.Decimal(1),
+        True,
+        "a",
+        datetime.datetime(2022, 1, 1, 10, 30),
+        "2022-01-01 10:30:00.500000+00:00",
+    ]
+    assert list(table.rows[1])[:2] == [decimal.Decimal("2.0"), None]
+
+
+def test_concat_tables() -> None:
+    tables = [
+        pa.table({"id": [1, 2], "fare": [7, 10], "name": ["a", "b"]}),
+        pa.table({"id": pa.array([], pa.int64()), "fare": pa.array([], pa.null()), "name": pa.array([], pa.null())}),
+        pa.table({"id": [3], "fare": [8.5], "name": ["c"]}),
+    ]
+
+    table = arrow_helper.concat_tables(tables)
+
+    assert table.schema == pa.schema([("id", pa.int64()), ("fare", pa.float64()), ("name", pa.string())])
+    assert table.to_pydict() == {"id": [1, 2, 3], "fare": [7.0, 10.0, 8.5], "name": ["a", "b", "c"]}
+
+
+def test_decimals_to_numbers() -> None:
+    schema = pa.schema([("whole", pa.decimal128(10, 0)), ("fraction", pa.decimal128(10, 2)), ("name", pa.string())])
+    batch = pa.RecordBatch.from_arrays(
+        [
+            pa.array([decimal.Decimal(1), None], pa.decimal128(10, 0)),
+            pa.array([decimal.Decimal("1.25"), decimal.Decimal("2.50")], pa.decimal128(10, 2)),
+            pa.array(["a", "b"]),
+        ],
+        schema=schema,
+    )
+
+    table = arrow_helper.decimals_to_numbers(pa.RecordBatchReader.from_batches(schema, [batch, batch])).read_all()
+
+    assert table.schema == pa.schema([("whole", pa.int64()), ("fraction", pa.float64()), ("name", pa.string())])
+    assert table.to_pydict() == {"whole": [1, None] * 2, "fraction": [1.25, 2.5] * 2, "name": ["a", "b"] * 2}
+
+
+def test_from_record_batches() -> None:
+    # each batch is typed from its own values, like the chunks of a Snowflake result
+    chunks = [
+        ([1, 2], pa.int8(), [decimal.Decimal("7.25"), decimal.Decimal("10.50")], pa.decimal128(4, 2)),
+        ([300_000], pa.int32(), [decimal.Decimal("8.125")], pa.decimal128(4, 3)),
+    ]
+    read_ids: List[List[int]] = []
+
+    def batches() -> Iterator[pa.RecordBatch]:
+        for ids, id_type, fares, fare_type in chunks:
+            read_ids.append(ids)
+            yield pa.RecordBatch.from_arrays([pa.array(ids, id_type), pa.array(fares, fare_type)], ["id", "fare"])
+
+    reader = arrow_helper.from_record_batches(batches(), ["id", "fare"])
+
+    # only the first batch is read for the schema
+    assert read_ids == [[1, 2]]
+    table = reader.read_all()
+    assert table.schema == pa.schema([("id", pa.int64()), ("fare", pa.float64())])
+    assert table.to_pydict() == {"id": [1, 2, 300_000], "fare": [7.25, 10.5, 8.125]}
+
+
+def test_from_record_batches_empty() -> None:
+    table = arrow_helper.from_record_batches(iter([]), ["id", "fare"]).read_all()
+
+    assert table.column_names == ["id", "fare"]
+    assert table.num_rows == 0
+
+
+def test_to_compact_dataframe() -> None:
+    table = pa.table(
+        {
+            "sex": ["male", "female", "male", None] * 25,
+            "name": [f"passenger {ix}" for ix in range(100)],
+            "pclass": [1, 2, 3, 2] * 25,
+            "ticket": [1, 70_000, 3, 4] * 25,
+            "age": [22.0, None, 0.5, 38.0] * 25,
+            "fare": [7.25, 71.2833, 8.05, None] * 25,
+            "id": [2**40 + ix for ix in range(100)],
+        }
+    )
+
+    dataframe = arrow_helper.to_compact_dataframe(table)
+
+    assert [str(dtype) for dtype in dataframe.dtypes] == [
+        "category",
+        "string",
+        "int8",
+        "int32",
+        "float32",
+        "float64",
+        "int64",
+    ]
+    pd.testing.assert_frame_equal(dataframe, table.to_pandas(), check_dtype=False, check_categorical=False)
+    assert dataframe.memory_usage(deep=True, index=False).sum() < arrow_helper.estimate_dataframe_nbytes(table) / 2
+
+
+def test_unique_rows() -> None:
+    table = pa.Table.from_batches(
+        pa.table({"review": ["good", "bad", "good", None, "bad", None], "stars": [5, 1, 5, 3, 2, 3]}).to_batches(
+            max_chunksize=4
+        )
+    )
+
+    unique_table, unique_row_positions = arrow_helper.unique_rows(table)
+
+    assert unique_table.to_pydict() == {"review": ["good", "bad", None, "bad"], "stars": [5, 1, 3, 2]}
+    assert unique_table.take(unique_row_positions).to_pydict() == table.to_pydict()
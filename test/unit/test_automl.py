@@ -0,0 +1,329 @@
+import json
+import pickle
+import subprocess
+import sys
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Type
+
+import numpy as np
+import pandas as pd  # type: ignore
+import pytest
+from joblib import Parallel, delayed  # type: ignore
+from sklearn.dummy import DummyClassifier  # type: ignore
+from sklearn.ensemble import RandomForestClassifier  # type: ignore
+
+from common.automl import AutoML, AutoMLPruning, _child_pids, estimate_model_bytes
+from common.automl_models.base_model import LARGE_DATA_ROWS, AutoMLModel, TrainDataset
+from common.automl_models.sklearn_models import (
+    ScikitLearnHistGradientBoostingClassifier,
+    ScikitLearnHistGradientBoostingRegressor,
+    ScikitLearnRidgeClassifier,
+)
+from common.automl_models.xgboost_models import (
+    HYPERPARAMETER_GRID,
+    XGBoostClassifier,
+    XGBoostHistClassifier,
+    XGBoostHistRegressor,
+    search_grid,
+)
+from common.layer_backend import LocalLayerBackend
+
+
+FEATURES = ["age", "fare", "pclass"]
+
+
+def build_training_dataframe(row_count: int = 300) -> pd.DataFrame:
+    rng = np.random.default_rng(42)
+    df = pd.DataFrame(rng.normal(size=(row_count, len(FEATURES))), columns=FEATURES)
+    df["survived"] = (df["age"] * 2 - df["fare"] > 0).astype(np.int64)
+    return df
+
+
+def read_logs(registry_path: Path, version: int) -> Dict[str, Any]:
+    logs_path = (
+        registry_path / "titanic" / "models" / "survival_model" / str(version) / LocalLayerBackend.LOGS_FILE_NAME
+    )
+    return json.loads(logs_path.read_text())
+
+
+def test_automl_warm_start(tmp_path: Path) -> None:
+    backend = LocalLayerBackend(tmp_path / "registry")
+    backend.init("titanic")
+    warm_start_path = tmp_path / "warm_start.json"
+    df = build_training_dataframe()
+
+    for _ in range(2):
+        automl = AutoML(AutoMLModel.CLASSIFIER, df, FEATURES, "survived", backend, str(warm_start_path))
+        automl.train("titanic", "survival_model")
+
+    first_run_logs = read_logs(tmp_path / "registry", 1)
+    second_run_logs = read_logs(tmp_path / "registry", 2)
+    (warm_start_run,) = json.loads(warm_start_path.read_text()).values()
+    assert len(first_run_logs["models"]) == 5
+    assert list(second_run_logs["models"]) == [first_run_logs["best model"]]
+    assert second_run_logs["warm start"] == f"kept {first_run_logs['best model']} of the previous run"
+    assert warm_start_run["model"] == first_run_logs["best model"]
+    assert warm_start_run["score"] == first_run_logs["best score"]
+
+
+class ScoredClassifier(AutoMLModel):
+    """
+    Scores the given scores, one per run
+    """
+
+    name = "Scored Classifier"
+    model_type = AutoMLModel.CLASSIFIER
+    scores: List[Any] = []
+
+    def train(self, ds: TrainDataset) -> None:
+        self.model = DummyClassifier().fit(ds.x_train, ds.y_train)
+        self.score = self.scores.pop(0)
+
+    def compare_score(self, score: float) -> bool:
+        return self.score > score
+
+
+class LosingClassifier(ScoredClassifier):
+    name = "Losing Classifier"
+    scores = [0.5] * 10
+
+
+def test_automl_warm_start_scores_compared_to_full_search(tmp_path: Path) -> None:
+    backend = LocalLayerBackend(tmp_path / "registry")
+    backend.init("titanic")
+    warm_start_path = tmp_path / "warm_start.json"
+    df = build_training_dataframe()
+    # each run scores less than the tolerance below the previous one
+    ScoredClassifier.scores = [0.9, 0.885, 0.87, 0.86]
+
+    for _ in range(4):
+        automl = AutoML(AutoMLModel.CLASSIFIER, df, FEATURES, "survived", backend, str(warm_start_path))
+        automl.automl_models = [ScoredClassifier, LosingClassifier]
+        automl.train("titanic", "survival_model")
+
+    trained_models = [list(read_logs(tmp_path / "registry", version)["models"]) for version in range(1, 5)]
+    (warm_start_run,) = json.loads(warm_start_path.read_text()).values()
+    # the third run is over the tolerance below the first one, which trained every candidate
+    assert trained_models == [
+        [ScoredClassifier.name, LosingClassifier.name],
+        [ScoredClassifier.name],
+        [ScoredClassifier.name, LosingClassifier.name],
+        [ScoredClassifier.name],
+    ]
+    assert warm_start_run["score"] == 0.86
+    assert warm_start_run["baseline_score"] == 0.87
+
+
+def test_automl_candidate_costs(tmp_path: Path) -> None:
+    backend = LocalLayerBackend(tmp_path / "registry")
+    backend.init("titanic")
+    warm_start_path = tmp_path / "warm_start.json"
+
+    AutoML(
+        AutoMLModel.CLASSIFIER, build_training_dataframe(), FEATURES, "survived", backend, str(warm_start_path)
+    ).train("titanic", "survival_model")
+
+    logs = read_logs(tmp_path / "registry", 1)
+    (warm_start_run,) = json.loads(warm_start_path.read_text()).values()
+    for costs in ["model fit seconds", "model predict seconds", "model peak memory bytes", "model size bytes"]:
+        assert list(logs[costs]) == list(logs["models"])
+    assert all(size > 0 for size in logs["model size bytes"].values())
+    assert sorted(warm_start_run["candidates"]) == sorted(logs["models"])
+    (run,) = warm_start_run["candidates"][logs["best model"]]["runs"]
+    assert run["score"] == run["best_score"] == logs["best score"]
+    assert run["fit_seconds"] == logs["model fit seconds"][logs["best model"]]
+    assert run["run_fit_seconds"] == pytest.approx(sum(logs["model fit seconds"].values()))
+
+
+def test_estimate_model_bytes() -> None:
+    df = build_training_dataframe()
+    model = RandomForestClassifier(n_estimators=20, random_state=42).fit(df[FEATURES], df["survived"])
+
+    # the trees keep their nodes in their pickled state
+    assert 0.5 < estimate_model_bytes(model) / len(pickle.dumps(model)) < 2
+
+
+def test_peak_memory_of_children() -> None:
+    child = subprocess.Popen([sys.executable, "-c", "import time; time.sleep(30)"])
+    try:
+        assert str(child.pid) in _child_pids()
+    finally:
+        child.kill()
+        child.wait()
+
+
+def losing_runs(count: int, fit_seconds: float) -> Dict[str, Any]:
+    run = {"score": 0.5, "best_score": 0.9, "fit_seconds": fit_seconds, "run_fit_seconds": 10.0}
+    return {"runs": [run] * count, "skipped_runs": 0}
+
+
+def test_automl_pruning_policy() -> None:
+    pruning = AutoMLPruning(after_runs=2, score_tolerance=0.1, min_cost_share=0.2, retry_after_runs=3)
+
+    assert pruning.should_skip(losing_runs(2, fit_seconds=5.0))
+    # too few runs, cheap or scoring close to the best
+    assert not pruning.should_skip({})
+    assert not pruning.should_skip(losing_runs(1, fit_seconds=5.0))
+    assert not pruning.should_skip(losing_runs(2, fit_seconds=1.0))
+    close_runs = losing_runs(2, fit_seconds=5.0)
+    close_runs["runs"] = [dict(run, score=0.85) for run in close_runs["runs"]]
+    assert not pruning.should_skip(close_runs)
+    # retried once skipped long enough
+    assert not pruning.should_skip(dict(losing_runs(2, fit_seconds=5.0), skipped_runs=3))
+
+
+@pytest.mark.parametrize("warm_start", [True, False])
+def test_automl_pruned_candidates(tmp_path: Path, warm_start: bool) -> None:
+    backend = LocalLayerBackend(tmp_path / "registry")
+    backend.init("titanic")
+    runs_path = tmp_path / "runs.json"
+    runs_key = json.dumps(["titanic", "survival_model", AutoMLModel.CLASSIFIER, "survived", sorted(FEATURES)])
+    pruned_model = ScikitLearnRidgeClassifier.name
+    runs_path.write_text(json.dumps({runs_key: {"candidates": {pruned_model: losing_runs(3, 5.0)}}}))
+
+    # the history is kept in the warm start file, or in its own without warm starts
+    automl = AutoML(
+        AutoMLModel.CLASSIFIER,
+        build_training_dataframe(),
+        FEATURES,
+        "survived",
+        backend,
+        str(runs_path) if warm_start else None,
+        AutoMLPruning(),
+        None if warm_start else str(runs_path),
+    )
+    automl.train("titanic", "survival_model")
+
+    logs = read_logs(tmp_path / "registry", 1)
+    candidates = json.loads(runs_path.read_text())[runs_key]["candidates"]
+    assert logs["skipped models"] == [pruned_model]
+    assert pruned_model not in logs["models"]
+    assert len(logs["models"]) == 4
+    assert candidates[pruned_model] == dict(losing_runs(3, 5.0), skipped_runs=1)
+
+
+def test_search_grid() -> None:
+    warm_start_params = {"max_depth": 6, "n_estimators": 200, "learning_rate": 0.1}
+
+    grid = search_grid(HYPERPARAMETER_GRID, warm_start_params)
+
+    assert grid == [
+        {"max_depth": [6], "n_estimators": [200], "learning_rate": [0.1]},
+        {"max_depth": [2, 10], "n_estimators": [200], "learning_rate": [0.1]},
+        {"max_depth": [6], "n_estimators": [60], "learning_rate": [0.1]},
+        {"max_depth": [6], "n_estimators": [200], "learning_rate": [0.01]},
+    ]
+    assert search_grid(HYPERPARAMETER_GRID, None) == HYPERPARAMETER_GRID
+    assert search_grid(HYPERPARAMETER_GRID, {**warm_start_params, "max_depth": 4}) == HYPERPARAMETER_GRID
+
+
+def test_automl_candidates_by_data_size() -> None:
+    small_data_candidates = [model for model in AutoML.automl_models if model.is_candidate(LARGE_DATA_ROWS - 1)]
+    large_data_candidates = [model for model in AutoML.automl_models if model.is_candidate(LARGE_DATA_ROWS)]
+
+    assert XGBoostClassifier in small_data_candidates
+    assert XGBoostHistClassifier not in small_data_candidates
+    assert ScikitLearnHistGradientBoostingRegressor not in small_data_candidates
+    assert XGBoostClassifier not in large_data_candidates
+    assert XGBoostHistClassifier in large_data_candidates
+    assert ScikitLearnHistGradientBoostingRegressor in large_data_candidates
+    assert ScikitLearnRidgeClassifier in small_data_candidates
+    assert ScikitLearnRidgeClassifier in large_data_candidates
+
+
+@pytest.mark.parametrize(
+    "automl_model,target",
+    [
+        (ScikitLearnHistGradientBoostingClassifier, "survived"),
+        (ScikitLearnHistGradientBoostingRegressor, "score"),
+        (XGBoostHistClassifier, "survived"),
+        (XGBoostHistRegressor, "score"),
+    ],
+    ids=[
+        "ScikitLearnHistGradientBoostingClassifier",
+        "ScikitLearnHistGradientBoostingRegressor",
+        "XGBoostHistClassifier",
+        "XGBoostHistRegressor",
+    ],
+)
+def test_train_histogram_model(automl_model: Type[AutoMLModel], target: str) -> None:
+    df = build_training_dataframe()
+    df["score"] = df["age"] * 2 - df["fare"]
+    trainer = automl_model()
+
+    trainer.train(TrainDataset(df.drop(columns=["survived", "score"]).assign(**{target: df[target]}), FEATURES, target))
+
+    assert trainer.score > 0.5
+
+
+def memmap_filenames(df: pd.DataFrame) -> List[Optional[str]]:
+    """
+    The files of the memory maps backing the columns of the dataframe, pandas keeps views of them
+    """
+    filenames = []
+    for column in df:
+        values = df[column].to_numpy()
+        while values is not None and not isinstance(values, np.memmap):
+            values = getattr(values, "base", None)
+        filenames.append(None if values is None else values.filename)
+    return filenames
+
+
+def test_train_dataset_memory_mapped() -> None:
+    # mixed dtypes are kept, a block of columns per dtype
+    df = build_training_dataframe(row_count=100_000).astype({"fare": np.float32, "pclass": np.int32})
+
+    with TrainDataset(df, FEATURES, "survived") as dataset:
+        filenames = memmap_filenames(dataset.x_train)
+        worker_filenames = Parallel(n_jobs=2)(delayed(memmap_filenames)(dataset.x_train) for _ in range(2))
+
+        assert None not in filenames
+        assert len(set(filenames)) == 3
+        assert worker_filenames == [filenames, filenames]
+        pd.testing.assert_frame_equal(dataset.x_train, df.loc[dataset.x_train.index, FEATURES])
+        pd.testing.assert_series_equal(dataset.y_train, df.loc[dataset.y_train.index, "survived"])
+    assert not any(Path(filename).exists() for filename in filenames if filename)
+
+
+def read_worker_private_bytes(x: pd.DataFrame) -> int:
+    """
+    The private resident memory of the worker once it read the data, mapped pages of files aren't counted
+    """
+    for column in x:
+        x[column].to_numpy().sum()
+    with open("/proc/self/status", encoding="ascii") as f:
+        (rss_anon,) = [line.split()[1] for line in f if line.startswith("RssAnon:")]
+    return int(rss_anon) * 1024
+
+
+@pytest.mark.skipif(not Path("/proc/self/status").is_file(), reason="reads the memory of the workers from /proc")
+def test_train_dataset_worker_memory_flat() -> None:
+    df = build_training_dataframe(row_count=1_000_000).astype({"pclass": np.int32})
+
+    with TrainDataset(df, FEATURES, "survived") as dataset:
+        data_bytes = dataset.x_train.memory_usage(index=False).sum()
+        # the most private memory of a worker, for more workers reading the data
+        peak_private_bytes = [
+            max(Parallel(n_jobs=n_jobs)(delayed(read_worker_private_bytes)(dataset.x_train) for _ in range(n_jobs)))
+            for n_jobs in [2, 4]
+        ]
+        # workers given copies of the data, to check the private memory shows them
+        copied_private_bytes = max(
+            Parallel(n_jobs=2, max_nbytes=None)(
+                delayed(read_worker_private_bytes)(dataset.x_train.copy()) for _ in range(2)
+            )
+        )
+
+    assert abs(peak_private_bytes[1] - peak_private_bytes[0]) < data_bytes / 2
+    assert copied_private_bytes - max(peak_private_bytes) > data_bytes / 2
+
+
+def test_train_dataset_in_memory() -> None:
+    small_df = build_training_dataframe()
+    text_df = build_training_dataframe(row_count=100_000).assign(pclass="first")
+
+    with TrainDataset(small_df, FEATURES, "survived") as small_dataset, TrainDataset(
+        text_df, FEATURES, "survived"
+    ) as text_dataset:
+        assert memmap_filenames(small_dataset.x_train) == [None] * len(FEATURES)
+        assert memmap_filenames(text_dataset.x_train) == [None] * len(FEATURES)
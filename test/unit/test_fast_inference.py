@@ -0,0 +1,125 @@
+from pathlib import Path
+from typing import Any
+
+import numpy as np
+import pandas as pd  # type: ignore
+import pytest
+from sklearn.ensemble import RandomForestRegressor  # type: ignore
+from sklearn.model_selection import GridSearchCV  # type: ignore
+from sklearn.tree import DecisionTreeClassifier  # type: ignore
+
+from common import fast_inference
+from common.fast_inference import (
+    FastInferenceModel,
+    compile_model,
+    compile_model_cached,
+)
+
+
+FEATURES = pd.DataFrame({"age": np.arange(200.0) % 70, "fare": (np.arange(200.0) * 7.3) % 90})
+LABELS = np.where(FEATURES["age"] + FEATURES["fare"] / 3 > 50, "survived", "died")
+TARGETS = FEATURES["age"] * 0.5 + FEATURES["fare"]
+
+
+class TrainedModel:
+    def __init__(self, trained_model: Any) -> None:
+        self.trained_model = trained_model
+        self.predicted_rows = 0
+
+    def get_train(self) -> Any:
+        return self.trained_model
+
+    def predict(self, input_df: pd.DataFrame) -> pd.DataFrame:
+        self.predicted_rows += len(input_df)
+        return pd.DataFrame(self.trained_model.predict(input_df))
+
+
+def test_compile_model_unsupported() -> None:
+    assert compile_model(object(), 2) is None
+    assert compile_model(DecisionTreeClassifier().fit(FEATURES, LABELS), 3) is None
+
+
+def test_fast_inference_classifier() -> None:
+    pytest.importorskip("onnxruntime")
+    pytest.importorskip("skl2onnx")
+    grid = GridSearchCV(DecisionTreeClassifier(random_state=42), {"max_depth": [3, 5]}, cv=2).fit(FEATURES, LABELS)
+    model = TrainedModel(grid)
+    onnx_model = compile_model(grid, 2)
+    assert onnx_model is not None
+
+    fast_model = FastInferenceModel(model, onnx_model)
+    predictions = fast_model.predict(FEATURES)
+
+    assert fast_model.compiled
+    pd.testing.assert_frame_equal(predictions, pd.DataFrame(grid.predict(FEATURES)))
+    # the model predicted the rows of the equivalence check only
+    fast_model.predict(FEATURES)
+    assert model.predicted_rows == len(FEATURES)
+
+
+def test_fast_inference_regressor() -> None:
+    pytest.importorskip("onnxruntime")
+    pytest.importorskip("skl2onnx")
+    forest = RandomForestRegressor(n_estimators=5, random_state=42).fit(FEATURES, TARGETS)
+    onnx_model = compile_model(forest, 2)
+    assert onnx_model is not None
+
+    fast_model = FastInferenceModel(TrainedModel(forest), onnx_model)
+    predictions = fast_model.predict(FEATURES)
+
+    assert fast_model.compiled
+    assert predictions[0].dtype == np.float64
+    np.testing.assert_allclose(predictions[0], forest.predict(FEATURES), rtol=1e-5)
+
+
+def test_fast_inference_falls_back_on_disagreement() -> None:
+    pytest.importorskip("onnxruntime")
+    pytest.importorskip("skl2onnx")
+    forest = RandomForestRegressor(n_estimators=5, random_state=42).fit(FEATURES, TARGETS)
+    other_forest = RandomForestRegressor(n_estimators=5, random_state=7).fit(FEATURES, TARGETS * 2)
+    onnx_model = compile_model(other_forest, 2)
+    assert onnx_model is not None
+
+    fast_model = FastInferenceModel(TrainedModel(forest), onnx_model)
+    predictions = fast_model.predict(FEATURES)
+
+    assert not fast_model.compiled
+    np.testing.assert_array_equal(predictions[0], forest.predict(FEATURES))
+
+
+def test_fast_inference_predicts_missing_values_with_model() -> None:
+    pytest.importorskip("onnxruntime")
+    pytest.importorskip("skl2onnx")
+    forest = RandomForestRegressor(n_estimators=5, random_state=42).fit(FEATURES, TARGETS)
+    onnx_model = compile_model(forest, 2)
+    assert onnx_model is not None
+    model = TrainedModel(forest)
+
+    fast_model = FastInferenceModel(model, onnx_model)
+    with pytest.raises(ValueError, match="NaN"):
+        fast_model.predict(FEATURES.assign(age=np.nan))
+
+    assert model.predicted_rows == len(FEATURES)
+
+
+def test_compile_model_cached(tmp_path: Path) -> None:
+    pytest.importorskip("onnxruntime")
+    pytest.importorskip("skl2onnx")
+    forest = RandomForestRegressor(n_estimators=5, random_state=42).fit(FEATURES, TARGETS)
+    cache_path = tmp_path / "survival" / "3.onnx"
+
+    onnx_model = compile_model_cached(forest, 2, cache_path)
+
+    assert onnx_model is not None and cache_path.read_bytes() == onnx_model
+    assert [path.name for path in cache_path.parent.iterdir()] == ["3.onnx"]
+    # the compiled model version is not compiled again
+    assert compile_model_cached(object(), 2, cache_path) == onnx_model
+
+
+def test_compile_model_cached_without_onnx_runtime(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    cache_path = tmp_path / "survival" / "3.onnx"
+    cache_path.parent.mkdir()
+    cache_path.write_bytes(b"compiled where onnx runtime is installed")
+    monkeypatch.setattr(fast_inference, "is_available", lambda: False)
+
+    assert compile_model_cached(object(), 2, cache_path) is None
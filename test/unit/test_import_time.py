@@ -0,0 +1,50 @@
+import subprocess  # nosec
+import sys
+from pathlib import Path
+from typing import Dict
+
+import pytest
+
+
+# dependencies only Layer statements need, plugins import them once a statement runs
+DEFERRED_MODULES = ["pandas", "pyarrow", "cloudpickle", "sklearn", "xgboost", "lightgbm", "layer"]
+# the plugin modules take a fraction of this to import over the warehouse adapter, pandas alone takes longer
+PLUGIN_IMPORT_SECONDS = 0.25
+REPO_ROOT = Path(__file__).parents[2]
+
+
+def import_times(module: str) -> Dict[str, float]:
+    """
+    The seconds each module imported by a fresh interpreter importing the given module took, without the modules it
+    imported, from `python -X importtime`
+    """
+    result = subprocess.run(  # nosec
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True,
+        text=True,
+        check=True,
+        cwd=REPO_ROOT,
+    )
+    times = {}
+    for line in result.stderr.splitlines():
+        if line.startswith("import time:") and not line.endswith("| imported package"):
+            self_us, _, name = line.split(":", 1)[1].split("|")
+            times[name.strip()] = int(self_us) / 1_000_000
+    return times
+
+
+@pytest.mark.parametrize("warehouse", ["bigquery", "snowflake", "duckdb"])
+def test_plugin_import_defers_dependencies(warehouse: str) -> None:
+    pytest.importorskip(f"dbt.adapters.{warehouse}")
+
+    warehouse_times = import_times(f"dbt.adapters.{warehouse}")
+    plugin_times = {
+        name: seconds
+        for name, seconds in import_times(f"dbt.adapters.layer_{warehouse}").items()
+        if name not in warehouse_times
+    }
+
+    plugin_modules = {name.split(".")[0] for name in plugin_times}
+    assert plugin_modules.isdisjoint(DEFERRED_MODULES), plugin_modules & set(DEFERRED_MODULES)
+    slowest_modules = sorted(plugin_times.items(), key=lambda item: -item[1])[:10]
+    assert sum(plugin_times.values()) < PLUGIN_IMPORT_SECONDS, slowest_modules
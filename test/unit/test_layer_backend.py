@@ -0,0 +1,66 @@
+from pathlib import Path
+from typing import Any
+
+import pandas as pd  # type: ignore
+import pytest
+
+from common.layer_backend import LocalLayerBackend
+
+
+class ConstantModel:
+    def __init__(self, value: int) -> None:
+        self.value = value
+
+    def predict(self, input_df: pd.DataFrame) -> Any:
+        return [self.value] * len(input_df)
+
+
+def train(backend: LocalLayerBackend, name: str, value: int) -> None:
+    def training_func() -> ConstantModel:
+        backend.log({"value": value, "model": ConstantModel(value)})
+        return ConstantModel(value)
+
+    backend.model(name)(training_func)()
+
+
+def test_local_backend_train_and_predict(tmp_path: Path) -> None:
+    backend = LocalLayerBackend(tmp_path)
+    backend.login_with_api_key("unused")
+    backend.init("titanic")
+    train(backend, "survival_model", 1)
+    train(backend, "survival_model", 2)
+
+    assert (tmp_path / "titanic" / "models" / "survival_model" / "2" / LocalLayerBackend.MODEL_FILE_NAME).exists()
+
+    input_df = pd.DataFrame({"Age": [20, 30, 40]})
+    latest = backend.get_model("survival_model")
+    assert latest.version == "2"
+    assert latest.predict(input_df)[0].tolist() == [2, 2, 2]
+    assert backend.get_model("layer/titanic/models/survival_model:1").predict(input_df)[0].tolist() == [1, 1, 1]
+    assert backend.get_model("titanic/models/survival_model:2").version == "2"
+
+
+def test_local_backend_get_model_from_other_project(tmp_path: Path) -> None:
+    backend = LocalLayerBackend(tmp_path)
+    backend.init("titanic")
+    train(backend, "survival_model", 1)
+
+    other_backend = LocalLayerBackend(tmp_path)
+    other_backend.init("ecommerce")
+    assert other_backend.get_model("layer/titanic/models/survival_model").version == "1"
+    with pytest.raises(Exception, match=r".*not found in the local registry.*"):
+        other_backend.get_model("survival_model")
+
+
+def test_local_backend_missing_version(tmp_path: Path) -> None:
+    backend = LocalLayerBackend(tmp_path)
+    backend.init("titanic")
+    train(backend, "survival_model", 1)
+
+    with pytest.raises(Exception, match=r".*has no version 4.8.*"):
+        backend.get_model("layer/titanic/models/survival_model:4.8")
+
+
+def test_local_backend_requires_project(tmp_path: Path) -> None:
+    with pytest.raises(Exception, match=r".*has no project.*"):
+        LocalLayerBackend(tmp_path).get_model("survival_model")
@@ -0,0 +1,79 @@
+import decimal
+from types import SimpleNamespace
+from typing import Any, Iterator, List, Tuple
+
+import pyarrow as pa  # type: ignore
+import pytest
+
+from common.adapter import ScanEstimate
+
+
+impl = pytest.importorskip("dbt.adapters.layer_bigquery.impl")
+
+
+def bigquery_adapter(total_bytes_processed: int) -> Tuple[Any, List[Tuple[str, Any]]]:
+    """
+    A Layer BigQuery adapter whose client dry runs queries as processing the given bytes, and the queries it got
+    """
+    queries: List[Tuple[str, Any]] = []
+
+    def query(sql: str, job_config: Any) -> Any:
+        queries.append((sql, job_config))
+        return SimpleNamespace(total_bytes_processed=total_bytes_processed)
+
+    adapter = impl.LayerBigQueryAdapter.__new__(impl.LayerBigQueryAdapter)
+    client = SimpleNamespace(query=query)
+    adapter.connections = SimpleNamespace(get_thread_connection=lambda: SimpleNamespace(handle=client))
+    return adapter, queries
+
+
+def test_estimate_scan_dry_run() -> None:
+    adapter, queries = bigquery_adapter(total_bytes_processed=123_456)
+
+    estimate = adapter._estimate_scan("select id, fare from `test-database`.`analytics`.`passengers`")
+
+    assert estimate == ScanEstimate(scan_bytes=123_456, fetch_bytes=123_456)
+    ((sql, job_config),) = queries
+    assert sql == "select id, fare from `test-database`.`analytics`.`passengers`"
+    # never run nor answered from the cache, which reports no bytes
+    assert job_config.dry_run
+    assert not job_config.use_query_cache
+
+
+def test_partition_filter() -> None:
+    adapter, _ = bigquery_adapter(total_bytes_processed=0)
+
+    filters = [adapter._partition_filter("id", 4, partition) for partition in range(4)]
+
+    # farm_fingerprint hashes any column type once it is a json string, mod keeps the sign of the hash
+    assert filters == [f"abs(mod(farm_fingerprint(to_json_string(id)), 4)) = {partition}" for partition in range(4)]
+
+
+def test_fetch_arrow_batches_pages() -> None:
+    read_pages: List[int] = []
+
+    def to_arrow_iterable() -> Iterator[pa.RecordBatch]:
+        for page, ids in enumerate(([1, 2], [3])):
+            read_pages.append(page)
+            yield pa.RecordBatch.from_arrays(
+                [pa.array(ids), pa.array([decimal.Decimal("7.25")] * len(ids))], ["id", "fare"]
+            )
+
+    rows = SimpleNamespace(
+        schema=[SimpleNamespace(name="id"), SimpleNamespace(name="fare")], to_arrow_iterable=to_arrow_iterable
+    )
+    executed_sqls: List[str] = []
+
+    def raw_execute(sql: str, fetch: bool = False) -> Tuple[Any, Any]:
+        executed_sqls.append(sql)
+        return SimpleNamespace(), rows
+
+    adapter = impl.LayerBigQueryAdapter.__new__(impl.LayerBigQueryAdapter)
+    adapter.connections = SimpleNamespace(raw_execute=raw_execute)
+
+    reader = adapter._fetch_arrow_batches("select id, fare from `test-database`.`analytics`.`passengers`")
+
+    # the pages are downloaded as they are read, not all at once
+    assert read_pages == [0]
+    assert reader.read_all().to_pydict() == {"id": [1, 2, 3], "fare": [7.25] * 3}
+    assert executed_sqls == ["select id, fare from `test-database`.`analytics`.`passengers`"]
@@ -0,0 +1,84 @@
+import decimal
+import json
+from types import SimpleNamespace
+from typing import Any, Iterator, List, Tuple
+
+import agate  # type: ignore
+import pyarrow as pa  # type: ignore
+import pytest
+
+from common.adapter import ScanEstimate
+
+
+impl = pytest.importorskip("dbt.adapters.layer_snowflake.impl")
+NotSupportedError = pytest.importorskip("snowflake.connector.errors").NotSupportedError
+
+
+def snowflake_adapter(global_stats: Any) -> Tuple[Any, List[str]]:
+    """
+    A Layer Snowflake adapter whose explain plans have the given global stats, and the statements it executed
+    """
+    executed_sqls: List[str] = []
+    plan = {"GlobalStats": global_stats, "Operations": [[{"id": 0, "operation": "Result"}]]}
+
+    def execute(sql: str, auto_begin: bool = False, fetch: bool = False) -> Tuple[Any, agate.Table]:
+        executed_sqls.append(sql)
+        return SimpleNamespace(rows_affected=1), agate.Table([[json.dumps(plan)]], ["content"], [agate.Text()])
+
+    adapter = impl.LayerSnowflakeAdapter.__new__(impl.LayerSnowflakeAdapter)
+    adapter.connections = SimpleNamespace(execute=execute)
+    return adapter, executed_sqls
+
+
+def test_estimate_scan_explain() -> None:
+    adapter, executed_sqls = snowflake_adapter(
+        {"partitionsTotal": 12, "partitionsAssigned": 3, "bytesAssigned": 654_321}
+    )
+
+    estimate = adapter._estimate_scan('select id, fare from "TEST"."ANALYTICS"."PASSENGERS"')
+
+    assert estimate == ScanEstimate(scan_bytes=654_321)
+    assert executed_sqls == ['explain using json select id, fare from "TEST"."ANALYTICS"."PASSENGERS"']
+
+
+def test_partition_filter() -> None:
+    adapter, _ = snowflake_adapter({})
+
+    filters = [adapter._partition_filter("id", 4, partition) for partition in range(4)]
+
+    assert filters == [f"abs(mod(hash(id), 4)) = {partition}" for partition in range(4)]
+
+
+def test_fetch_arrow_batches_chunks() -> None:
+    read_chunks: List[int] = []
+
+    def fetch_arrow_batches() -> Iterator[pa.Table]:
+        for chunk, (ids, id_type) in enumerate((([1, 2], pa.int8()), ([300_000], pa.int32()))):
+            read_chunks.append(chunk)
+            yield pa.table({"ID": pa.array(ids, id_type)})
+
+    cursor = SimpleNamespace(description=[("ID",)], fetch_arrow_batches=fetch_arrow_batches)
+    adapter = impl.LayerSnowflakeAdapter.__new__(impl.LayerSnowflakeAdapter)
+    adapter.connections = SimpleNamespace(add_query=lambda sql: (None, cursor))
+
+    reader = adapter._fetch_arrow_batches('select id from "TEST"."ANALYTICS"."PASSENGERS"')
+
+    # the chunks are downloaded as they are read, not all at once
+    assert read_chunks == [0]
+    assert reader.read_all().to_pydict() == {"ID": [1, 2, 300_000]}
+
+
+def test_fetch_arrow_batches_without_arrow() -> None:
+    def fetch_arrow_batches() -> Iterator[pa.Table]:
+        raise NotSupportedError
+
+    cursor = SimpleNamespace(description=[("ID",)], fetch_arrow_batches=fetch_arrow_batches)
+    adapter = impl.LayerSnowflakeAdapter.__new__(impl.LayerSnowflakeAdapter)
+    adapter.connections = SimpleNamespace(
+        add_query=lambda sql: (None, cursor),
+        get_result_from_cursor=lambda cursor: agate.Table([[decimal.Decimal(1)], [decimal.Decimal(2)]], ["ID"]),
+    )
+
+    reader = adapter._fetch_arrow_batches('select id from "TEST"."ANALYTICS"."PASSENGERS"')
+
+    assert reader.read_all().to_pydict() == {"ID": [1, 2]}
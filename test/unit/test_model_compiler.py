@@ -0,0 +1,118 @@
+from typing import Any
+
+import numpy as np
+import pandas as pd  # type: ignore
+import pytest
+from sklearn.ensemble import AdaBoostClassifier, RandomForestClassifier  # type: ignore
+from sklearn.linear_model import LinearRegression, RidgeClassifier  # type: ignore
+from sklearn.model_selection import GridSearchCV  # type: ignore
+from sklearn.neighbors import KNeighborsClassifier  # type: ignore
+from sklearn.tree import DecisionTreeClassifier, DecisionTreeRegressor  # type: ignore
+from xgboost import XGBClassifier, XGBRegressor
+
+from common.model_compiler import compile_model
+
+
+FEATURES = ["age", "fare", "pclass"]
+
+
+def build_features(row_count: int = 200) -> pd.DataFrame:
+    random = np.random.RandomState(42)
+    return pd.DataFrame(
+        {
+            "age": random.uniform(1, 80, row_count).round(1),
+            "fare": random.exponential(30, row_count).round(2),
+            "pclass": random.randint(1, 4, row_count),
+        }
+    )
+
+
+def build_target(features: pd.DataFrame, class_count: int) -> pd.Series:
+    score = features["age"] / 10 - features["fare"] / 20 + features["pclass"]
+    return pd.Series(pd.qcut(score, class_count, labels=False), name="target")
+
+
+def predict_in_sql(expression: str, features: pd.DataFrame) -> Any:
+    # duckdb only comes with the duckdb extra
+    duckdb = pytest.importorskip("duckdb")
+    connection = duckdb.connect()
+    connection.register("features", features.assign(row_ix=range(len(features))))
+    return connection.execute(f"select {expression} from features order by row_ix").fetchnumpy()["prediction"]
+
+
+def assert_same_predictions(model: Any, features: pd.DataFrame) -> None:
+    expression = compile_model(model, FEATURES)
+    assert expression is not None
+    predictions = predict_in_sql(f"{expression} as prediction", features)
+    np.testing.assert_allclose(predictions, model.predict(features[FEATURES]), rtol=1e-5)
+
+
+@pytest.mark.parametrize(
+    "model",
+    [
+        DecisionTreeClassifier(max_depth=5),
+        RandomForestClassifier(n_estimators=5, max_depth=4, random_state=42),
+        AdaBoostClassifier(n_estimators=10, random_state=42),
+        AdaBoostClassifier(n_estimators=10, algorithm="SAMME", random_state=42),
+        RidgeClassifier(),
+        XGBClassifier(n_estimators=5, max_depth=3, eval_metric="logloss", use_label_encoder=False),
+    ],
+    ids=lambda model: f"{type(model).__name__}-{getattr(model, 'algorithm', '')}".rstrip("-"),
+)
+@pytest.mark.parametrize("class_count", [2, 3])
+def test_compile_classifier(model: Any, class_count: int) -> None:
+    features = build_features()
+    model.fit(features[FEATURES], build_target(features, class_count))
+
+    assert_same_predictions(model, features)
+
+
+@pytest.mark.parametrize(
+    "model",
+    [
+        DecisionTreeRegressor(max_depth=5),
+        LinearRegression(),
+        XGBRegressor(n_estimators=5, max_depth=3, objective="reg:squarederror"),
+    ],
+    ids=lambda model: type(model).__name__,
+)
+def test_compile_regressor(model: Any) -> None:
+    features = build_features()
+    model.fit(features[FEATURES], features["age"] * 2 + features["fare"])
+
+    assert_same_predictions(model, features)
+
+
+def test_compile_grid_search() -> None:
+    features = build_features()
+    model = GridSearchCV(XGBRegressor(n_estimators=5), {"max_depth": [2, 3]}, cv=2)
+    model.fit(features[FEATURES], features["fare"])
+
+    assert_same_predictions(model, features)
+
+
+def test_compile_string_labels() -> None:
+    features = build_features()
+    model = DecisionTreeClassifier(max_depth=3)
+    model.fit(features[FEATURES], build_target(features, 2).map({0: "no", 1: "yes"}))
+
+    expression = compile_model(model, FEATURES)
+
+    assert expression is not None
+    assert list(predict_in_sql(f"{expression} as prediction", features)) == list(model.predict(features[FEATURES]))
+
+
+def test_compile_unsupported_model() -> None:
+    features = build_features()
+    model = KNeighborsClassifier()
+    model.fit(features[FEATURES], build_target(features, 2))
+
+    assert compile_model(model, FEATURES) is None
+
+
+def test_compile_model_with_other_features() -> None:
+    features = build_features()
+    model = LinearRegression()
+    model.fit(features[FEATURES], features["fare"])
+
+    assert compile_model(model, ["age", "fare"]) is None
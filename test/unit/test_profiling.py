@@ -0,0 +1,65 @@
+import pstats
+import tracemalloc
+from pathlib import Path
+from types import SimpleNamespace
+from typing import Any, Callable, List
+
+from common.profiling import StatementProfiler
+
+from .conftest import OfflineAdapter
+
+
+NODE = SimpleNamespace(unique_id="model.titanic.predictions", name="predictions", meta={"layer": {}})
+
+
+def convert_rows(row_count: int) -> List[Any]:
+    # slow enough to be sampled, with an allocation of a few megabytes
+    rows = [list(range(20)) for _ in range(row_count)]
+    return [sum(row) for row in rows for _ in range(5)]
+
+
+def test_statement_profiler(tmp_path: Path) -> None:
+    with StatementProfiler(tmp_path, "model.titanic.predictions", sample_interval=0.001):
+        convert_rows(20_000)
+
+    stats = pstats.Stats(str(tmp_path / "model.titanic.predictions.pstats"))
+    assert any(function_name == "convert_rows" for _, _, function_name in stats.stats)  # type: ignore
+    collapsed_lines = (tmp_path / "model.titanic.predictions.collapsed").read_text().splitlines()
+    assert any(";convert_rows (" in line for line in collapsed_lines)
+    assert all(line.rsplit(" ", 1)[1].isdigit() for line in collapsed_lines)
+    allocations = (tmp_path / "model.titanic.predictions.allocations.txt").read_text()
+    assert allocations.startswith("Peak traced memory: ")
+    assert "rows = [list(range(20)) for _ in range(row_count)]" in allocations
+    assert not tracemalloc.is_tracing()
+
+
+def test_statement_profiler_keeps_tracemalloc_running(tmp_path: Path) -> None:
+    tracemalloc.start()
+    try:
+        with StatementProfiler(tmp_path, "first"), StatementProfiler(tmp_path, "second"):
+            convert_rows(100)
+        assert tracemalloc.is_tracing()
+    finally:
+        tracemalloc.stop()
+
+
+def test_profile_statement(tmp_path: Path, offline_adapter: Callable[..., OfflineAdapter]) -> None:
+    adapter = offline_adapter(layer_profile=True)
+
+    with adapter._profile_statement(NODE):
+        convert_rows(100)
+
+    assert sorted(path.name for path in (tmp_path / "target" / "layer_profiles").iterdir()) == [
+        "model.titanic.predictions.allocations.txt",
+        "model.titanic.predictions.collapsed",
+        "model.titanic.predictions.pstats",
+    ]
+
+
+def test_profile_statement_disabled(tmp_path: Path, offline_adapter: Callable[..., OfflineAdapter]) -> None:
+    adapter = offline_adapter(layer_profile=False)
+
+    with adapter._profile_statement(NODE):
+        convert_rows(100)
+
+    assert not (tmp_path / "target").exists()
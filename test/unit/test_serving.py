@@ -0,0 +1,170 @@
+import os
+import shutil
+import stat
+import threading
+from pathlib import Path
+from types import SimpleNamespace
+from typing import Any, Iterator
+
+import pandas as pd  # type: ignore
+import pyarrow as pa  # type: ignore
+import pytest
+
+from common.adapter import LayerMeta
+from common.layer_backend import LocalLayerBackend
+from common.serving import LoadedModels, ModelServer, ModelServingError, ServedModel
+from common.sql_parser import LayerPredictFunction, LayerSQLParser
+
+from .conftest import OfflineAdapter
+
+
+PREDICT_SQL = """
+CREATE OR REPLACE TABLE `test-database`.`analytics`.`predictions` AS (
+    SELECT id, layer.predict("survival_model", ARRAY[age, fare]) as survived
+    FROM `test-database`.`analytics`.`passengers`
+)
+"""
+INPUT_TABLE = pa.table({"age": [20.5, 30.0, 41.0], "fare": [7.25, 10.0, 8.05]})
+
+
+class SumModel:
+    def __init__(self, offset: float) -> None:
+        self.offset = offset
+
+    def predict(self, input_df: pd.DataFrame) -> Any:
+        return (input_df.sum(axis=1) + self.offset).to_numpy()
+
+
+def train(registry_path: Path, offset: float) -> None:
+    backend = LocalLayerBackend(registry_path)
+    backend.init("titanic")
+    backend.model("survival_model")(lambda: SumModel(offset))()
+
+
+@pytest.fixture
+def registry_path(tmp_path: Path) -> Path:
+    train(tmp_path / "registry", 0.0)
+    return tmp_path / "registry"
+
+
+@pytest.fixture
+def socket_path(tmp_path: Path) -> Iterator[str]:
+    path = str(tmp_path / "serving.sock")
+    server = ModelServer(path, LoadedModels(registries=[tmp_path / "registry"]))
+    thread = threading.Thread(target=server.serve_forever, kwargs={"poll_interval": 0.05})
+    thread.start()
+    try:
+        yield path
+    finally:
+        server.shutdown()
+        server.server_close()
+        thread.join()
+
+
+def served_model(socket_path: str, registry_path: Path, name: str = "survival_model") -> ServedModel:
+    return ServedModel(socket_path, {"backend": "local", "registry": str(registry_path), "project": "titanic"}, name)
+
+
+def test_served_model_predict(socket_path: str, registry_path: Path) -> None:
+    model = served_model(socket_path, registry_path)
+    model.load()
+
+    predictions = model.predict_table(INPUT_TABLE)
+
+    assert predictions.iloc[:, 0].tolist() == [27.75, 40.0, 49.05]
+    # a new version is loaded once trained
+    train(registry_path, 100.0)
+    assert served_model(socket_path, registry_path).predict_table(INPUT_TABLE).iloc[:, 0].tolist() == [
+        127.75,
+        140.0,
+        149.05,
+    ]
+
+
+def test_served_model_errors(socket_path: str, registry_path: Path) -> None:
+    with pytest.raises(ModelServingError, match="Serving model crew_model failed: Exception: Model 'crew_model' not"):
+        served_model(socket_path, registry_path, "crew_model").load()
+
+
+def test_served_socket_owner_only(socket_path: str) -> None:
+    assert stat.S_IMODE(os.stat(socket_path).st_mode) == 0o600
+
+
+def test_loaded_models_only_from_served_registries(tmp_path: Path, registry_path: Path) -> None:
+    models = LoadedModels(registries=[registry_path])
+    # a model next to the registry, which a model name with relative path components points to
+    shutil.copytree(registry_path / "titanic" / "models", tmp_path / "models")
+    train(tmp_path / "other_registry", 0.0)
+
+    with pytest.raises(ModelServingError, match="The local registry .*other_registry isn't served by this daemon"):
+        models.get(
+            {"backend": "local", "registry": str(tmp_path / "other_registry"), "project": "titanic"}, "survival_model"
+        )
+    with pytest.raises(
+        ModelServingError, match="Model owner/../models/survival_model is outside of the local registry"
+    ):
+        models.get(
+            {"backend": "local", "registry": str(registry_path), "project": "titanic"},
+            "owner/../models/survival_model",
+        )
+    assert models.loaded_bytes == 0
+
+
+def test_loaded_models_kept(registry_path: Path) -> None:
+    models = LoadedModels(registries=[registry_path])
+    backend = {"backend": "local", "registry": str(registry_path), "project": "titanic"}
+
+    model = models.get(backend, "survival_model")
+
+    assert models.get(backend, "survival_model") is model
+    assert models.loaded_bytes == (model.path / LocalLayerBackend.MODEL_FILE_NAME).stat().st_size
+
+
+def test_loaded_models_evicted_over_memory_budget(registry_path: Path) -> None:
+    models = LoadedModels(memory_budget=1, registries=[registry_path])
+    backend = {"backend": "local", "registry": str(registry_path), "project": "titanic"}
+    first_model = models.get(backend, "survival_model:1")
+
+    # a model over the budget on its own is kept until another one is loaded
+    assert models.get(backend, "survival_model:1") is first_model
+    second_model = models.get(backend, "titanic/models/survival_model")
+
+    assert models.loaded_bytes == (second_model.path / LocalLayerBackend.MODEL_FILE_NAME).stat().st_size
+    assert models.get(backend, "survival_model:1") is not first_model
+
+
+def test_loaded_models_evicted_once_idle(registry_path: Path) -> None:
+    models = LoadedModels(idle_seconds=0, registries=[registry_path])
+    models.get({"backend": "local", "registry": str(registry_path), "project": "titanic"}, "survival_model")
+
+    assert models.evict_idle() == ["survival_model"]
+    assert models.loaded_bytes == 0
+
+
+class ServingAdapter(OfflineAdapter):
+    def __init__(self, registry_path: Path, serving_socket: str) -> None:
+        super().__init__(layer_project="titanic", layer_serving_socket=serving_socket)
+        self._layer_backend_lazy = LocalLayerBackend(registry_path)
+
+
+def get_models(adapter: ServingAdapter) -> Any:
+    layer_sql_function = LayerSQLParser().parse(PREDICT_SQL)
+    assert isinstance(layer_sql_function, LayerPredictFunction)
+    node = SimpleNamespace(name="predictions", fqn=["titanic"], meta={"layer": {}})
+    return adapter._get_models(layer_sql_function, node)["survival_model"]
+
+
+def test_predict_with_serving_daemon(socket_path: str, registry_path: Path) -> None:
+    model = get_models(ServingAdapter(registry_path, socket_path))
+
+    predictions = ServingAdapter._predict(model, INPUT_TABLE, LayerMeta(), spilled=False)
+
+    assert isinstance(model, ServedModel)
+    assert predictions.iloc[:, 0].tolist() == [27.75, 40.0, 49.05]
+
+
+def test_predict_without_serving_daemon(tmp_path: Path, registry_path: Path) -> None:
+    model = get_models(ServingAdapter(registry_path, str(tmp_path / "missing.sock")))
+
+    assert not isinstance(model, ServedModel)
+    assert model.version == "1"
@@ -0,0 +1,79 @@
+import pyarrow as pa  # type: ignore
+
+from common.source_cache import SourceCache
+
+
+SOURCE_ID = "model.titanic.passengers"
+TABLE = pa.table({"id": [1, 2, 3], "age": [20.5, 30.0, 41.0], "fare": [7.25, 10.0, 8.05]})
+MEMORY_BUDGET = 10 * TABLE.nbytes
+
+
+def test_get_subset_of_columns() -> None:
+    cache = SourceCache()
+    cache.put(SOURCE_ID, "", ["id", "age", "fare"], TABLE, MEMORY_BUDGET)
+
+    assert cache.get(SOURCE_ID, "", ["fare", "id"]) == TABLE.select(["fare", "id"])
+    assert cache.get(SOURCE_ID, "", ["id", "sex"]) is None
+    assert cache.get(SOURCE_ID, "", None) is None
+    assert cache.get(SOURCE_ID, "where age > 30", ["id"]) is None
+    assert cache.get("model.titanic.crew", "", ["id"]) is None
+
+
+def test_get_all_columns() -> None:
+    cache = SourceCache()
+    cache.put(SOURCE_ID, "", None, TABLE, MEMORY_BUDGET)
+
+    assert cache.get(SOURCE_ID, "", None) == TABLE
+    assert cache.get(SOURCE_ID, "", ["age"]) == TABLE.select(["age"])
+    # quoted identifiers aren't the names of the fetched columns
+    assert cache.get(SOURCE_ID, "", ['"age"']) is None
+
+
+def test_get_case_insensitive() -> None:
+    cache = SourceCache(case_sensitive=False)
+    cache.put(SOURCE_ID, "", None, TABLE.rename_columns(["ID", "AGE", "FARE"]), MEMORY_BUDGET)
+
+    assert cache.get(SOURCE_ID, "", ["age", "Id"]) == TABLE.select(["age", "id"]).rename_columns(["age", "Id"])
+
+
+def test_put_replaces_subsets() -> None:
+    cache = SourceCache()
+    cache.put(SOURCE_ID, "", ["age"], TABLE.select(["age"]), MEMORY_BUDGET)
+    cache.put(SOURCE_ID, "", ["id", "age"], TABLE.select(["id", "age"]), MEMORY_BUDGET)
+
+    assert cache.cached_bytes == TABLE.select(["id", "age"]).nbytes
+
+
+def test_put_evicts_least_recently_used() -> None:
+    cache = SourceCache()
+    cache.put("model.titanic.first", "", None, TABLE, 2 * TABLE.nbytes)
+    cache.put("model.titanic.second", "", None, TABLE, 2 * TABLE.nbytes)
+    cache.get("model.titanic.first", "", None)
+    cache.put("model.titanic.third", "", None, TABLE, 2 * TABLE.nbytes)
+
+    assert cache.get("model.titanic.first", "", None) is not None
+    assert cache.get("model.titanic.second", "", None) is None
+    assert cache.get("model.titanic.third", "", None) is not None
+    assert cache.cached_bytes == 2 * TABLE.nbytes
+
+
+def test_put_over_memory_budget() -> None:
+    cache = SourceCache()
+    cache.put(SOURCE_ID, "", None, TABLE, TABLE.nbytes - 1)
+
+    assert cache.get(SOURCE_ID, "", None) is None
+    assert cache.cached_bytes == 0
+
+
+def test_invalidate() -> None:
+    cache = SourceCache()
+    cache.put(SOURCE_ID, "", None, TABLE, MEMORY_BUDGET)
+    cache.put(SOURCE_ID, "where age > 30", ["id"], TABLE.select(["id"]), MEMORY_BUDGET)
+    cache.put("model.titanic.crew", "", None, TABLE, MEMORY_BUDGET)
+
+    cache.invalidate(SOURCE_ID)
+
+    assert cache.get(SOURCE_ID, "", None) is None
+    assert cache.get(SOURCE_ID, "where age > 30", ["id"]) is None
+    assert cache.get("model.titanic.crew", "", None) is not None
+    assert cache.cached_bytes == TABLE.nbytes
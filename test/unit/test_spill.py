@@ -0,0 +1,50 @@
+from pathlib import Path
+
+import pyarrow as pa  # type: ignore
+
+from common.spill import ArrowSpill
+
+
+TABLE = pa.table({"id": list(range(100)), "name": [f"passenger {ix}" for ix in range(100)]})
+
+
+def table_reader(table: pa.Table) -> pa.RecordBatchReader:
+    return pa.RecordBatchReader.from_batches(table.schema, table.to_batches(max_chunksize=10))
+
+
+def test_spill_within_memory_budget(tmp_path: Path) -> None:
+    with ArrowSpill(TABLE.nbytes * 2, str(tmp_path)) as spill:
+        table = spill.read_all(table_reader(TABLE))
+
+        assert table.equals(TABLE)
+        assert not spill.spilled
+        assert not list(tmp_path.iterdir())
+
+
+def test_spill_over_memory_budget(tmp_path: Path) -> None:
+    with ArrowSpill(TABLE.nbytes // 2, str(tmp_path)) as spill:
+        table = spill.read_all(table_reader(TABLE))
+
+        assert table.equals(TABLE)
+        assert spill.spilled
+        assert spill.spill_seconds > 0
+        assert len(list(tmp_path.glob("layer-spill-*/1.arrow"))) == 1
+    assert not list(tmp_path.iterdir())
+
+
+def test_spill_shares_memory_budget(tmp_path: Path) -> None:
+    with ArrowSpill(int(TABLE.nbytes * 1.5), str(tmp_path)) as spill:
+        first_table = spill.read_all(table_reader(TABLE))
+        assert not spill.spilled
+
+        second_table = spill.read_all(table_reader(TABLE))
+
+        assert first_table.equals(TABLE)
+        assert second_table.equals(TABLE)
+        assert spill.spilled
+
+
+def test_spill_without_memory_budget() -> None:
+    with ArrowSpill(None) as spill:
+        assert spill.read_all(table_reader(TABLE)).equals(TABLE)
+        assert not spill.spilled
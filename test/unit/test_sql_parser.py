@@ -53,6 +53,100 @@ def test_sql_parser_with_predict_snowflake() -> None:
     assert parsed.prediction_alias == "likely_to_buy_score"
 
 
+def test_sql_parser_with_predict_duckdb() -> None:
+    sql = """
+  create  table
+    "main"."customer_features__dbt_tmp"
+  as (
+    SELECT customer_id, product_id, customer_age,
+    layer.predict("layer/ecommerce/models/buy_it_again:latest", ARRAY[customer_id, product_id]) as likely_to_buy_score
+    FROM "main"."ecommerce"."customers"
+  );
+"""
+    parsed = LayerSQLParser().parse(sql=sql)
+    assert parsed
+    assert isinstance(parsed, LayerPredictFunction)
+    assert parsed.function_type == "predict"
+    assert parsed.source_name == '"main"."ecommerce"."customers"'
+    assert parsed.target_name == '"main"."customer_features__dbt_tmp"'
+    assert parsed.model_name == "layer/ecommerce/models/buy_it_again:latest"
+    assert parsed.select_columns == ["customer_id", "product_id", "customer_age"]
+    assert parsed.predict_columns == ["customer_id", "product_id"]
+    assert parsed.sql == 'select customer_id, product_id, customer_age from "main"."ecommerce"."customers"'
+    assert parsed.prediction_alias == "likely_to_buy_score"
+
+
+def test_sql_parser_with_multiple_predicts() -> None:
+    sql = """
+  create or replace table `test-database`.`ecommerce`.`customer_features`
+  OPTIONS()
+  as (
+    SELECT customer_id, customer_age,
+    layer.predict("layer/ecommerce/models/buy_it_again", ARRAY[customer_id, product_id]) as likely_to_buy_score,
+    layer.predict("layer/ecommerce/models/churn", ARRAY[customer_age, last_order_days]) as churn
+    FROM `test-database`.`ecommerce`.`customers`
+  );
+"""
+    parsed = LayerSQLParser().parse(sql=sql)
+    assert parsed
+    assert isinstance(parsed, LayerPredictFunction)
+    assert parsed.source_name == "`test-database`.`ecommerce`.`customers`"
+    assert [prediction.model_name for prediction in parsed.predictions] == [
+        "layer/ecommerce/models/buy_it_again",
+        "layer/ecommerce/models/churn",
+    ]
+    assert [prediction.predict_columns for prediction in parsed.predictions] == [
+        ["customer_id", "product_id"],
+        ["customer_age", "last_order_days"],
+    ]
+    assert [prediction.prediction_alias for prediction in parsed.predictions] == ["likely_to_buy_score", "churn"]
+    assert parsed.select_columns == ["customer_id", "customer_age"]
+    assert parsed.all_columns == ["customer_id", "customer_age", "product_id", "last_order_days"]
+    assert parsed.sql == (
+        "select customer_id, customer_age, product_id, last_order_days from `test-database`.`ecommerce`.`customers`"
+    )
+
+
+def test_sql_parser_replace_predictions() -> None:
+    sql = """
+  create or replace table `test-database`.`ecommerce`.`customer_features`
+  OPTIONS()
+  as (
+    SELECT customer_id,
+    layer.predict("layer/ecommerce/models/buy_it_again", ARRAY[customer_id, product_id]) as likely_to_buy_score,
+    layer.predict("layer/ecommerce/models/churn", ARRAY[customer_age, last_order_days])
+    FROM `test-database`.`ecommerce`.`customers`
+  );
+"""
+    parsed = LayerSQLParser().parse(sql=sql)
+    assert isinstance(parsed, LayerPredictFunction)
+
+    assert parsed.replace_predictions(["0.5e0 * product_id", "last_order_days / 30"]) == (
+        """
+  create or replace table `test-database`.`ecommerce`.`customer_features`
+  OPTIONS()
+  as (
+    SELECT customer_id, 0.5e0 * product_id as likely_to_buy_score, last_order_days / 30 as prediction
+    FROM `test-database`.`ecommerce`.`customers`
+  );"""
+    )
+
+
+def test_sql_parser_with_multiple_predicts_same_alias() -> None:
+    sql = """
+  create or replace table `test-database`.`ecommerce`.`customer_features`
+  OPTIONS()
+  as (
+    SELECT customer_id,
+    layer.predict("layer/ecommerce/models/buy_it_again", ARRAY[customer_id, product_id]),
+    layer.predict("layer/ecommerce/models/churn", ARRAY[customer_age, last_order_days])
+    FROM `test-database`.`ecommerce`.`customers`
+  );
+"""
+    with pytest.raises(ValueError, match=r".*Predict functions need distinct aliases.*"):
+        LayerSQLParser().parse(sql=sql)
+
+
 def test_sql_parser_for_train() -> None:
     sql = """
   create or replace table `test-database`.`ecommerce`.`customer_features`